@@ -7,6 +7,8 @@ from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
 from celery import Celery
 from backend.config import Config
+from backend.app.utils.storage import Storage
+from backend.app.utils.audit import Audit
 import os
 
 # Initialize extensions
@@ -15,6 +17,8 @@ migrate = Migrate()
 ma = Marshmallow()
 jwt = JWTManager()
 celery = Celery()
+storage = Storage()
+audit = Audit()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -25,6 +29,8 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     ma.init_app(app)
     jwt.init_app(app)
+    storage.init_app(app)
+    audit.init_app(app)
     
     # Configure CORS properly
     CORS(app, resources={
@@ -32,7 +38,7 @@ def create_app(config_class=Config):
             "origins": ["http://localhost:5173", "http://localhost:3000", "http://med-care-app-frontend.s3-website.eu-central-1.amazonaws.com"],
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"],
-            "expose_headers": ["Content-Type", "Content-Disposition"],
+            "expose_headers": ["Content-Type", "Content-Disposition", "X-Next-Cursor", "X-Total-Count"],
             "supports_credentials": True
         }
     })
@@ -76,6 +82,19 @@ def create_app(config_class=Config):
     def health_check():
         return {'status': 'healthy'}, 200
 
+    from backend.app.services.stats import StatsCache
+    app.extensions['stats'] = StatsCache(app)
+
+    from backend.app.utils.token_blocklist import init_token_blocklist
+    init_token_blocklist(app)
+
+    from backend.app.utils.passwords import PasswordHasherBusy, init_password_hasher
+    init_password_hasher(app)
+
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(e):
+        return {'msg': 'Too many sign-in attempts in progress, try again shortly'}, 503, {'Retry-After': '1'}
+
     from .cli import register_commands
     register_commands(app)
 
@@ -1,50 +1,56 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from backend.app import db
-from backend.app.models import User, Patient, MedicalDocument, AuditLog
-from backend.app.schemas import audit_logs_schema
+from backend.app.models import AuditLog
+from backend.app.schemas import audit_log_schema, audit_logs_schema
+from backend.app.services.stats import get_admin_stats, get_timeseries
 from backend.app.utils.decorators import admin_required
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from backend.app.utils.pagination import keyset_paginate
+from backend.app.utils.search import escape_like
+from werkzeug.exceptions import BadRequest
+from datetime import date, datetime, timedelta
+import csv
+import io
+import json
+import uuid
 
 bp = Blueprint('admin', __name__)
 
+LOG_EXPORT_COLUMNS = ['id', 'user_id', 'action', 'timestamp', 'details']
+LOG_EXPORT_BATCH_SIZE = 1000
+
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
 @admin_required
 def get_stats():
     """Get system analytics"""
-    # Get total counts
-    total_users = User.query.count()
-    total_patients = Patient.query.count()
-    total_documents = MedicalDocument.query.count()
-    
-    # Get counts for last 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    new_users = User.query.filter(User.created_at >= thirty_days_ago).count()
-    new_documents = MedicalDocument.query.filter(
-        MedicalDocument.uploaded_at >= thirty_days_ago
-    ).count()
+    return jsonify(get_admin_stats()), 200
+
+@bp.route('/stats/timeseries', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_stats_timeseries():
+    """Get new users and documents per day or week from the daily rollups"""
+    interval = request.args.get('interval', 'day')
+    if interval not in ('day', 'week'):
+        return jsonify({"msg": "interval must be 'day' or 'week'"}), 400
     
-    # Get user distribution by role
-    role_distribution = db.session.query(
-        User.role, func.count(User.id)
-    ).group_by(User.role).all()
+    try:
+        end = date.fromisoformat(request.args['end']) if 'end' in request.args else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['start']) if 'start' in request.args else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({"msg": "start and end must be YYYY-MM-DD dates"}), 400
     
-    # Format role distribution
-    role_stats = {role: count for role, count in role_distribution}
+    if start > end:
+        return jsonify({"msg": "start must not be after end"}), 400
+    if (end - start).days >= current_app.config['STATS_TIMESERIES_MAX_DAYS']:
+        return jsonify({"msg": "Date range too large"}), 400
     
     return jsonify({
-        "total_stats": {
-            "users": total_users,
-            "patients": total_patients,
-            "documents": total_documents
-        },
-        "last_30_days": {
-            "new_users": new_users,
-            "new_documents": new_documents
-        },
-        "role_distribution": role_stats
+        "interval": interval,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": get_timeseries(start, end, interval)
     }), 200
 
 @bp.route('/logs', methods=['GET'])
@@ -52,35 +58,88 @@ def get_stats():
 @admin_required
 def get_logs():
     """Get audit logs"""
-    # Get the last 100 logs by default
-    logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(100).all()
+    # Get the last 100 logs by default, only looking at recent partitions
+    since = datetime.utcnow() - timedelta(days=current_app.config['AUDIT_LOG_HOT_DAYS'])
+    logs = AuditLog.query.filter(AuditLog.timestamp >= since) \
+        .order_by(AuditLog.timestamp.desc()).limit(100).all()
     
     return jsonify(audit_logs_schema.dump(logs)), 200
 
-@bp.route('/logs/search', methods=['GET'])
-@jwt_required()
-@admin_required
-def search_logs():
-    """Search audit logs with filters"""
-    # Get query parameters
+def filter_logs(query):
+    """Apply the audit log filters from the query string to `query`"""
     user_id = request.args.get('user_id')
     action = request.args.get('action')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # Build query
-    query = AuditLog.query
-    
     if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
+        try:
+            query = query.filter(AuditLog.user_id == uuid.UUID(user_id))
+        except ValueError:
+            raise BadRequest('Invalid user_id')
     if action:
-        query = query.filter(AuditLog.action.ilike(f'%{action}%'))
+        # Served by the trigram index on action in PostgreSQL
+        query = query.filter(AuditLog.action.ilike(f'%{escape_like(action)}%', escape='!'))
     if start_date:
         query = query.filter(AuditLog.timestamp >= start_date)
     if end_date:
         query = query.filter(AuditLog.timestamp <= end_date)
+    return query
+
+@bp.route('/logs/search', methods=['GET'])
+@jwt_required()
+@admin_required
+def search_logs():
+    """Search audit logs with filters, newest first, one page at a time"""
+    logs, headers = keyset_paginate(filter_logs(AuditLog.query), AuditLog, AuditLog.timestamp)
+    
+    return jsonify(audit_logs_schema.dump(logs)), 200, headers
+
+def export_logs_ndjson(logs):
+    for log in logs:
+        yield json.dumps(audit_log_schema.dump(log)) + '\n'
+
+def export_logs_csv(logs):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(LOG_EXPORT_COLUMNS)
+    for log in logs:
+        row = audit_log_schema.dump(log)
+        writer.writerow([
+            json.dumps(row[column]) if column == 'details' else row[column]
+            for column in LOG_EXPORT_COLUMNS
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+LOG_EXPORT_FORMATS = {
+    'ndjson': (export_logs_ndjson, 'application/x-ndjson'),
+    'csv': (export_logs_csv, 'text/csv')
+}
+
+@bp.route('/logs/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_logs():
+    """Stream every audit log matching the search filters as NDJSON or CSV.
+
+    Rows are fetched from a server-side cursor in batches of
+    LOG_EXPORT_BATCH_SIZE and written out as they arrive, so exports of any
+    size run in constant memory.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in LOG_EXPORT_FORMATS:
+        return jsonify({"msg": f"Unsupported export format: {export_format}"}), 400
+    serialize, mimetype = LOG_EXPORT_FORMATS[export_format]
     
-    # Get results
-    logs = query.order_by(AuditLog.timestamp.desc()).all()
+    logs = filter_logs(db.session.query(*(getattr(AuditLog, column) for column in LOG_EXPORT_COLUMNS))) \
+        .order_by(AuditLog.timestamp, AuditLog.id) \
+        .execution_options(stream_results=True, yield_per=LOG_EXPORT_BATCH_SIZE)
     
-    return jsonify(audit_logs_schema.dump(logs)), 200 
\ No newline at end of file
+    return Response(
+        stream_with_context(serialize(logs)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=audit-logs.{export_format}'}
+    )
@@ -3,7 +3,8 @@ from flask_jwt_extended import jwt_required
 from backend.app.constants import UsersRoles
 from backend.app.models import User
 from backend.app.schemas import users_schema
-from sqlalchemy import or_
+from backend.app.utils.pagination import keyset_paginate, offset_paginate
+from backend.app.utils.search import search_users
 
 bp = Blueprint('admins', __name__)
 
@@ -15,14 +16,9 @@ def get_admins():
     admin_users_query = User.query.filter(User.role == UsersRoles.ADMIN)
 
     if search:
-        admin_users_query = admin_users_query.filter(
-            or_(
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-            )
-        )
+        # Ranked matches, best match first
+        admins_list, headers = offset_paginate(search_users(admin_users_query, search))
+    else:
+        admins_list, headers = keyset_paginate(admin_users_query, User)
 
-    admins_list = admin_users_query.all()
-
-    return jsonify(users_schema.dump(admins_list)), 200
+    return jsonify(users_schema.dump(admins_list)), 200, headers
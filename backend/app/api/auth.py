@@ -1,13 +1,14 @@
-from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
-    jwt_required, get_jwt_identity, get_jwt
+    jwt_required, get_jwt
 )
-from backend.app import db
-from backend.app.models import User, TokenBlocklist, Patient
+from backend.app import db, jwt
+from backend.app.models import User, Patient
 from backend.app.schemas import user_schema, login_schema
 from backend.app.constants import UsersRoles, UsersStatus
+from backend.app.utils.decorators import load_current_user, token_claims
+from backend.app.utils.token_blocklist import get_token_blocklist, revoke_token
 
 bp = Blueprint('auth', __name__)
 
@@ -77,8 +78,14 @@ def login():
     
     if not user or not user.check_password(data['password']):
         return jsonify({"msg": "Invalid email or password"}), 401
+
+    # Upgrade hashes made before BCRYPT_LOG_ROUNDS changed
+    if user.password_needs_rehash():
+        user.set_password(data['password'])
+        db.session.commit()
     
-    access_token = create_access_token(identity=str(user.id))
+    # The role claim lets role checks skip the users table
+    access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
     refresh_token = create_refresh_token(identity=str(user.id))
     
     return jsonify({
@@ -91,8 +98,11 @@ def login():
 @jwt_required(refresh=True)
 def refresh():
     """Refresh access token"""
-    current_user_id = get_jwt_identity()
-    access_token = create_access_token(identity=current_user_id)
+    # Reload the user so a changed role is picked up
+    user = load_current_user()
+    if user is None:
+        return jsonify({"msg": "User not found"}), 401
+    access_token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
     
     return jsonify({
         "access_token": access_token
@@ -102,18 +112,11 @@ def refresh():
 @jwt_required()
 def logout():
     """Revoke access token"""
-    jti = get_jwt()["jti"]
-    now = datetime.utcnow()
-    
-    token_block = TokenBlocklist(jti=jti, created_at=now)
-    db.session.add(token_block)
-    db.session.commit()
+    revoke_token(get_jwt())
     
     return jsonify({"msg": "Successfully logged out"}), 200
 
-# Callback function to check if a JWT exists in the database blocklist
-# @jwt.token_in_blocklist_loader
-# def check_if_token_revoked(jwt_header, jwt_payload):
-#     jti = jwt_payload["jti"]
-#     token = TokenBlocklist.query.filter_by(jti=jti).first()
-#     return token is not None
\ No newline at end of file
+# Callback function to check if a JWT has been revoked, without a database query
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return get_token_blocklist().is_revoked(jwt_payload["jti"])
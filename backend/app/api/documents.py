@@ -1,17 +1,35 @@
-from flask import Blueprint, jsonify, request, current_app, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, jsonify, request, current_app, send_file, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import BadRequest, HTTPException
 from werkzeug.utils import secure_filename
+from itsdangerous import BadSignature, SignatureExpired, Signer
+from celery.states import READY_STATES
 from backend.app import db, celery
-from backend.app.models import User, Patient, MedicalDocument, AuditLog
+from backend.app.models import Patient, MedicalDocument, DocumentText, AuditLog
 from backend.app.schemas import medical_document_schema, medical_documents_schema
-from backend.app.utils.decorators import patient_required, admin_required
-from backend.app.utils.storage import upload_file_to_s3, delete_file_from_s3, get_file_from_s3, generate_presigned_url
+from backend.app.constants import UsersRoles
+from backend.app.utils.decorators import patient_required, admin_required, get_current_user_id, get_current_role
+from backend.app.utils.audit import record_audit
+from backend.app.utils.storage import (
+    delete_file, delete_files, generate_file_url, get_storage, LocalStorageBackend
+)
+from backend.app.utils.streaming import StreamingUpload
 from backend.app.services.medical_ai_service import MedicalAIService
+from backend.app.utils.ai import generate_document_summary, generate_document_summaries
+from backend.app.services.document_store import (
+    content_key, hash_file, find_stored_files, store_file, store_stream, add_reference, release_references,
+    purge_stored_files_task
+)
+from backend.app.services.patient_deletion import delete_stored_files
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+import base64
+import json
 import os
+import time
 import uuid
 import logging
-from pypdf import PdfReader
 
 bp = Blueprint('documents', __name__)
 
@@ -19,6 +37,9 @@ bp = Blueprint('documents', __name__)
 @jwt_required()
 def upload_document():
     """Upload a medical document"""
+    if current_app.config['UPLOAD_STREAMING']:
+        return upload_document_streaming()
+
     if 'file' not in request.files:
         return jsonify({"msg": "No file provided"}), 400
     
@@ -30,14 +51,17 @@ def upload_document():
     user_id = request.form.get('user_id')
     if not user_id:
         return jsonify({"msg": "No user_id provided"}), 400
+    try:
+        user_id = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"msg": "Invalid user_id"}), 400
     
     # Validate file extension
     if not allowed_file(file.filename):
         return jsonify({"msg": "File type not allowed"}), 400
     
     # Get current user for permission check
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user_id = get_current_user_id()
     
     # Find patient by user_id
     patient = Patient.query.filter_by(user_id=user_id).first()
@@ -45,26 +69,82 @@ def upload_document():
         return jsonify({"msg": "Patient not found"}), 404
     
     # Check permissions
-    if current_user.role == 'Patient' and str(current_user_id) != str(user_id):
+    if get_current_role() == UsersRoles.PATIENT and str(current_user_id) != str(user_id):
         return jsonify({"msg": "Access denied"}), 403
     
-    # Secure filename and generate unique name
     filename = secure_filename(file.filename)
-    file_extension = os.path.splitext(filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
     
-    # Upload to S3
+    # Upload to storage, unless the same content is stored already
     try:
-        file_path = upload_file_to_s3(file, unique_filename)
+        file_path, content_hash, size = store_file(file, filename)
     except Exception as e:
         return jsonify({"msg": "Error uploading file", "error": str(e)}), 500
     
-    # Create document record
+    return record_uploaded_document(
+        current_user_id, patient, request.form.get('title', filename), filename, file_path, content_hash, size
+    )
+
+def upload_document_streaming():
+    """Upload a medical document by piping the request body into storage.
+
+    The multipart body is parsed incrementally, so `user_id` and `title` have
+    to be sent either in the query string or as form fields before the file.
+    """
+    try:
+        upload = StreamingUpload(
+            request.stream,
+            request.headers.get('Content-Type', ''),
+            chunk_size=current_app.config['UPLOAD_CHUNK_SIZE']
+        )
+    except BadRequest as e:
+        return jsonify({"msg": e.description}), 400
+
+    if not upload.filename:
+        return jsonify({"msg": "No file selected"}), 400
+
+    user_id = request.args.get('user_id') or upload.fields.get('user_id')
+    if not user_id:
+        return jsonify({"msg": "No user_id provided"}), 400
+    try:
+        user_id = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"msg": "Invalid user_id"}), 400
+
+    if not allowed_file(upload.filename):
+        return jsonify({"msg": "File type not allowed"}), 400
+
+    current_user_id = get_current_user_id()
+
+    patient = Patient.query.filter_by(user_id=user_id).first()
+    if not patient:
+        return jsonify({"msg": "Patient not found"}), 404
+
+    if get_current_role() == UsersRoles.PATIENT and str(current_user_id) != str(user_id):
+        return jsonify({"msg": "Access denied"}), 403
+
+    filename = secure_filename(upload.filename)
+
+    try:
+        file_path, content_hash, size = store_stream(upload.chunks(), filename, upload.content_type)
+    except HTTPException as e:
+        # The body was malformed or too large, not a storage failure
+        return jsonify({"msg": e.description}), e.code
+    except Exception as e:
+        return jsonify({"msg": "Error uploading file", "error": str(e)}), 500
+
+    title = request.args.get('title') or upload.fields.get('title', filename)
+    return record_uploaded_document(current_user_id, patient, title, filename, file_path, content_hash, size)
+
+def record_uploaded_document(current_user_id, patient, title, filename, file_path, content_hash, size):
+    """Create the document record and audit entry for an uploaded file"""
     document = MedicalDocument(
+        id=uuid.uuid4(),
         patient_id=patient.id,
-        title=request.form.get('title', filename),
-        file_path=file_path
+        title=title,
+        file_path=file_path,
+        content_hash=content_hash
     )
+    add_reference(content_hash, file_path, size)
     
     # Log the action
     log = AuditLog(
@@ -86,28 +166,139 @@ def upload_document():
         "document": medical_document_schema.dump(document)
     }), 201
 
+@bp.route('/upload/batch', methods=['POST'])
+@jwt_required()
+def upload_documents():
+    """Upload several medical documents of one patient at once.
+
+    Files are sent as repeated `file` fields. They are uploaded to storage
+    concurrently (DOCUMENT_UPLOAD_WORKERS) and every document that made it
+    is recorded in a single transaction. Each file gets its own entry in
+    `results`, in the order the files were sent.
+    """
+    files = request.files.getlist('file')
+    if not files:
+        return jsonify({"msg": "No file provided"}), 400
+    if len(files) > current_app.config['DOCUMENT_BATCH_MAX_FILES']:
+        return jsonify({"msg": f"At most {current_app.config['DOCUMENT_BATCH_MAX_FILES']} files per request"}), 400
+
+    user_id = request.form.get('user_id')
+    if not user_id:
+        return jsonify({"msg": "No user_id provided"}), 400
+    try:
+        user_id = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"msg": "Invalid user_id"}), 400
+
+    current_user_id = get_current_user_id()
+
+    patient = Patient.query.filter_by(user_id=user_id).first()
+    if not patient:
+        return jsonify({"msg": "Patient not found"}), 404
+
+    if get_current_role() == UsersRoles.PATIENT and current_user_id != user_id:
+        return jsonify({"msg": "Access denied"}), 403
+
+    results = []
+    uploads = []
+    for file in files:
+        filename = secure_filename(file.filename)
+        if not filename or not allowed_file(filename):
+            results.append({"filename": file.filename, "status": "error", "msg": "File type not allowed"})
+            continue
+        content_hash, size = hash_file(file, current_app.config['UPLOAD_CHUNK_SIZE'])
+        results.append({"filename": filename, "status": "pending"})
+        uploads.append((results[-1], file, content_hash, size))
+
+    # Each content not stored yet is uploaded once, however many files carry it
+    file_paths = {
+        content_hash: stored.file_path
+        for content_hash, stored in find_stored_files(upload[2] for upload in uploads).items()
+    }
+    new_files = {}
+    for result, file, content_hash, _ in uploads:
+        if content_hash not in file_paths and content_hash not in new_files:
+            new_files[content_hash] = (file, content_key(content_hash, result['filename']))
+
+    # Storage backends are thread-safe, resolve it here as workers have no app context
+    storage = get_storage()
+    if new_files:
+        workers = min(current_app.config['DOCUMENT_UPLOAD_WORKERS'], len(new_files))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                content_hash: pool.submit(storage.upload, file, key)
+                for content_hash, (file, key) in new_files.items()
+            }
+            for content_hash, future in futures.items():
+                try:
+                    file_paths[content_hash] = future.result()
+                except Exception as e:
+                    logging.error(f"Error uploading {new_files[content_hash][1]}: {e}")
+
+    documents = []
+    for result, _, content_hash, size in uploads:
+        if content_hash not in file_paths:
+            result.update(status="error", msg="Error uploading file")
+            continue
+        document = MedicalDocument(
+            id=uuid.uuid4(),
+            patient_id=patient.id,
+            title=result['filename'],
+            file_path=file_paths[content_hash],
+            content_hash=content_hash
+        )
+        documents.append((result, document))
+        add_reference(content_hash, document.file_path, size)
+
+    for result, document in documents:
+        db.session.add(document)
+        db.session.add(AuditLog(
+            user_id=current_user_id,
+            action="Uploaded medical document",
+            details={
+                "document_id": str(document.id),
+                "filename": result['filename'],
+                "patient_id": str(patient.id)
+            }
+        ))
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        delete_files([file_paths[content_hash] for content_hash in new_files if content_hash in file_paths])
+        return jsonify({"msg": "Error saving documents", "error": str(e)}), 500
+
+    for result, document in documents:
+        result.update(status="created", document=medical_document_schema.dump(document))
+
+    created = len(documents)
+    status = 201 if created == len(results) else 207 if created else 400
+    return jsonify({"created": created, "results": results}), status
+
+def get_document_or_404(id):
+    """Load a document together with its patient, used for permission checks"""
+    return MedicalDocument.query.options(joinedload(MedicalDocument.patient)) \
+        .filter(MedicalDocument.id == id).first_or_404()
+
 @bp.route('/<uuid:id>', methods=['GET'])
 @jwt_required()
 def get_document(id):
     """Get document details"""
-    document = MedicalDocument.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    document = get_document_or_404(id)
+    current_user_id = get_current_user_id()
     
     # Check access permissions
-    if user.role == 'Patient' and document.patient.user_id != current_user_id:
+    if get_current_role() == UsersRoles.PATIENT and document.patient.user_id != current_user_id:
         return jsonify({"msg": "Access denied"}), 403
     
     # Log the action
-    log = AuditLog(
+    record_audit(
         user_id=current_user_id,
         action="Retrieved document details",
         details={"document_id": str(id)}
     )
-    db.session.add(log)
-    db.session.commit()
 
-    doc_link = generate_presigned_url(document.file_path)
+    doc_link = generate_file_url(document.file_path)
 
     return jsonify({"link": doc_link}), 200
 
@@ -115,19 +306,20 @@ def get_document(id):
 @jwt_required()
 def delete_document(id):
     """Delete document"""
-    document = MedicalDocument.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    document = get_document_or_404(id)
+    current_user_id = get_current_user_id()
     
     # Check access permissions
-    if user.role == 'Patient' and document.patient.user_id != current_user_id:
+    if get_current_role() == UsersRoles.PATIENT and document.patient.user_id != current_user_id:
         return jsonify({"msg": "Access denied"}), 403
     
-    # Delete from S3
-    try:
-        delete_file_from_s3(document.file_path)
-    except Exception as e:
-        return jsonify({"msg": "Error deleting file", "error": str(e)}), 500
+    # Delete from storage, files shared by duplicates once their last document is gone
+    if document.content_hash is None:
+        try:
+            delete_file(document.file_path)
+        except Exception as e:
+            return jsonify({"msg": "Error deleting file", "error": str(e)}), 500
+    unused = release_references([document.content_hash])
     
     # Log the action
     log = AuditLog(
@@ -142,72 +334,326 @@ def delete_document(id):
     db.session.delete(document)
     db.session.add(log)
     db.session.commit()
+    if unused:
+        purge_stored_files_task.delay(unused)
     
     return jsonify({"msg": "Document deleted successfully"}), 200
 
+@bp.route('/batch-delete', methods=['POST'])
+@jwt_required()
+def delete_documents():
+    """Delete several documents given as `{"document_ids": [...]}`.
+
+    Permissions are checked with one query and the rows are deleted in one
+    transaction. Files that were only used by these documents are removed
+    once it is committed, so a failed commit never leaves rows pointing at deleted
+    files. Each id gets its own entry in `results`.
+    """
+    data = request.get_json(silent=True) or {}
+    document_ids = data.get('document_ids')
+    if not isinstance(document_ids, list) or not document_ids:
+        return jsonify({"msg": "No document_ids provided"}), 400
+    if len(document_ids) > current_app.config['DOCUMENT_BATCH_MAX_FILES']:
+        return jsonify({"msg": f"At most {current_app.config['DOCUMENT_BATCH_MAX_FILES']} documents per request"}), 400
+
+    current_user_id = get_current_user_id()
+    is_patient = get_current_role() == UsersRoles.PATIENT
+
+    ids = {}
+    for document_id in document_ids:
+        try:
+            ids[str(document_id)] = uuid.UUID(str(document_id))
+        except ValueError:
+            ids[str(document_id)] = None
+
+    rows = db.session.query(
+        MedicalDocument.id, MedicalDocument.file_path, MedicalDocument.content_hash,
+        MedicalDocument.patient_id, Patient.user_id
+    ).join(Patient).filter(MedicalDocument.id.in_([id for id in ids.values() if id is not None])).all()
+    found = {row.id: row for row in rows}
+
+    results = {}
+    deleted = []
+    for document_id, id in ids.items():
+        row = found.get(id)
+        if row is None:
+            results[document_id] = {"id": document_id, "status": "not_found"}
+        elif is_patient and row.user_id != current_user_id:
+            results[document_id] = {"id": document_id, "status": "error", "msg": "Access denied"}
+        else:
+            results[document_id] = {"id": document_id, "status": "deleted"}
+            deleted.append(row)
+
+    if deleted:
+        deleted_ids = [row.id for row in deleted]
+        db.session.execute(DocumentText.__table__.delete().where(DocumentText.document_id.in_(deleted_ids)))
+        db.session.execute(MedicalDocument.__table__.delete().where(MedicalDocument.id.in_(deleted_ids)))
+        unused = release_references([row.content_hash for row in deleted])
+        db.session.add_all([
+            AuditLog(
+                user_id=current_user_id,
+                action="Deleted medical document",
+                details={"document_id": str(row.id), "patient_id": str(row.patient_id)}
+            )
+            for row in deleted
+        ])
+        db.session.commit()
+
+        # Files of deduplicated documents are only deleted with their last document
+        file_paths = [row.file_path for row in deleted if row.content_hash is None]
+        if file_paths:
+            delete_stored_files.delay(file_paths)
+        if unused:
+            purge_stored_files_task.delay(unused)
+        # Bulk deletes bypass the ORM events the stats cache listens to
+        current_app.extensions['stats'].invalidate()
+
+    status = 200 if len(deleted) == len(results) else 207 if deleted else 400
+    return jsonify({
+        "deleted": len(deleted),
+        "results": [results[document_id] for document_id in ids]
+    }), status
+
 @bp.route('/patients/<uuid:patient_id>/documents', methods=['GET'])
 @jwt_required()
 def get_patient_documents(patient_id):
     """Get all documents for a patient"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    print(user)
-    
-    # First fetch the patient by user_id
-    patient = Patient.query.filter_by(user_id=patient_id).first()
-    if not patient:
-        return jsonify({"msg": "Patient not found"}), 404
+    current_user_id = get_current_user_id()
     
-    # Check access permissions
-    if user.role == 'Patient' and str(user.patient.id) != str(patient.id):
+    # Check access permissions, `patient_id` is the patient's user id
+    if get_current_role() == UsersRoles.PATIENT and patient_id != current_user_id:
         return jsonify({"msg": "Access denied"}), 403
     
-    documents = MedicalDocument.query.filter_by(patient_id=patient.id).all()
-    print(documents)
+    # Fetch the patient and its documents in one query
+    rows = db.session.query(Patient.id, MedicalDocument).select_from(Patient) \
+        .outerjoin(MedicalDocument, MedicalDocument.patient_id == Patient.id) \
+        .filter(Patient.user_id == patient_id).all()
+    if not rows:
+        return jsonify({"msg": "Patient not found"}), 404
+    documents = [document for _, document in rows if document is not None]
     
     # Log the action
-    log = AuditLog(
+    record_audit(
         user_id=current_user_id,
         action="Retrieved patient documents",
-        details={"patient_id": str(patient.id)}
+        details={"patient_id": str(rows[0][0])}
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify(medical_documents_schema.dump(documents)), 200
 
 @bp.route('/patients/agreement', methods=['GET'])
 @jwt_required()
 def get_patient_agreement():
-    doc_link = generate_presigned_url('patient-treatment-agreement.pdf')
+    doc_link = generate_file_url('patient-treatment-agreement.pdf')
     return jsonify({"link": doc_link}), 200
 
+@bp.route('/files/<token>', methods=['GET'])
+def get_stored_file(token):
+    """Serve a locally stored file for a signed download link"""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorageBackend):
+        return jsonify({"msg": "Not found"}), 404
+
+    try:
+        return storage.send(token)
+    except SignatureExpired:
+        return jsonify({"msg": "Download link expired"}), 403
+    except BadSignature:
+        return jsonify({"msg": "Invalid download link"}), 403
+    except FileNotFoundError:
+        return jsonify({"msg": "File not found"}), 404
+
 @bp.route('/<uuid:id>/summarize', methods=['POST'])
 @jwt_required()
 def summarize_document(id):
     """Trigger document summarization"""
-    document = MedicalDocument.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    document = get_document_or_404(id)
+    current_user_id = get_current_user_id()
     
     # Check access permissions
-    if user.role == 'Patient' and document.patient.user_id != current_user_id:
+    if get_current_role() == UsersRoles.PATIENT and document.patient.user_id != current_user_id:
         return jsonify({"msg": "Access denied"}), 403
     
     # Trigger async summarization task
-    task = generate_document_summary.delay(str(id))
+    task = generate_document_summary.apply_async(args=[str(id)], task_id=new_task_id(current_user_id))
     
     return jsonify({
         "msg": "Document summarization started",
         "task_id": task.id
     }), 202
 
+@bp.route('/summarize', methods=['POST'])
+@jwt_required()
+def summarize_documents():
+    """Trigger summarization of many documents in one background task.
+
+    Accepts either `document_ids` or `patient_id` (the patient's user id) to
+    summarize every document of that patient that has no summary yet.
+    """
+    data = request.get_json() or {}
+    current_user_id = get_current_user_id()
+
+    query = MedicalDocument.query.join(Patient)
+    try:
+        if data.get('document_ids'):
+            query = query.filter(MedicalDocument.id.in_([uuid.UUID(str(i)) for i in data['document_ids']]))
+        elif data.get('patient_id'):
+            query = query.filter(
+                Patient.user_id == uuid.UUID(str(data['patient_id'])),
+                MedicalDocument.summary.is_(None)
+            )
+        else:
+            return jsonify({"msg": "Provide document_ids or patient_id"}), 400
+    except ValueError:
+        return jsonify({"msg": "Invalid id"}), 400
+
+    # Patients may only summarize their own documents
+    if get_current_role() == UsersRoles.PATIENT:
+        query = query.filter(Patient.user_id == current_user_id)
+
+    document_ids = [str(document_id) for (document_id,) in query.with_entities(MedicalDocument.id)]
+    if not document_ids:
+        return jsonify({"msg": "No documents to summarize"}), 404
+
+    task = generate_document_summaries.apply_async(args=[document_ids], task_id=new_task_id(current_user_id))
+
+    return jsonify({
+        "msg": "Document summarization started",
+        "task_id": task.id,
+        "document_ids": document_ids
+    }), 202
+
+@bp.route('/tasks/<task_id>', methods=['GET'])
+@jwt_required()
+def get_task_status(task_id):
+    """Get state, progress and result of a summarization or import task"""
+    if not owns_task(task_id, get_current_user_id()):
+        return jsonify({"msg": "Task not found"}), 404
+    return jsonify(task_status(celery.AsyncResult(task_id))), 200
+
+@bp.route('/tasks/<task_id>/events', methods=['GET'])
+@jwt_required()
+def stream_task_events(task_id):
+    """Stream server-sent events for a task until it completes"""
+    if not owns_task(task_id, get_current_user_id()):
+        return jsonify({"msg": "Task not found"}), 404
+    return task_events_response([task_id])
+
+@bp.route('/tasks/events', methods=['GET'])
+@jwt_required()
+def stream_tasks_events():
+    """Stream server-sent events for several tasks (`?task_id=...&task_id=...`)"""
+    task_ids = request.args.getlist('task_id')
+    if not task_ids:
+        return jsonify({"msg": "No task_id provided"}), 400
+    current_user_id = get_current_user_id()
+    if not all(owns_task(task_id, current_user_id) for task_id in task_ids):
+        return jsonify({"msg": "Task not found"}), 404
+    return task_events_response(task_ids)
+
+def task_signer(user_id):
+    return Signer(current_app.config['SECRET_KEY'], salt=f'task-owner-{user_id}')
+
+def new_task_id(user_id):
+    """Id for a task started by `user_id`.
+
+    The id is signed for its owner, so reading the task later only needs
+    the signature checked, no record of who started it.
+    """
+    return task_signer(user_id).sign(str(uuid.uuid4())).decode('ascii')
+
+def owns_task(task_id, user_id):
+    """Whether `task_id` was created by `new_task_id` for `user_id`"""
+    return task_signer(user_id).validate(task_id)
+
+def task_status(result):
+    """Serialize a Celery AsyncResult"""
+    status = {
+        "task_id": result.id,
+        "state": result.state,
+        "progress": None,
+        "result": None,
+        "error": None
+    }
+    if result.state == 'PROGRESS':
+        status["progress"] = result.info
+    elif result.state == 'SUCCESS':
+        status["result"] = result.result
+    elif result.state == 'FAILURE':
+        status["error"] = str(result.result)
+    return status
+
+def encode_event_id(seen):
+    """Event id carrying the last state sent for each task"""
+    return base64.urlsafe_b64encode(json.dumps(seen).encode('utf-8')).decode('ascii')
+
+def decode_event_id(event_id):
+    try:
+        seen = json.loads(base64.urlsafe_b64decode(event_id.encode('ascii')))
+    except (ValueError, UnicodeError):
+        return {}
+    return seen if isinstance(seen, dict) else {}
+
+def task_events_response(task_ids):
+    """SSE response polling the result backend for task changes.
+
+    A `progress` event is sent whenever a task's state or progress changes,
+    then `completed` or `failed` once it is done. Each request holds a
+    worker, so the stream closes after TASK_EVENTS_TIMEOUT seconds with a
+    `timeout` event and the client reconnects. The id of every event
+    records what was sent, and a reconnect with `Last-Event-ID` resumes
+    from there; once every task was reported done it gets a 204, which
+    makes EventSource stop reconnecting.
+    """
+    poll_interval = current_app.config['TASK_EVENTS_POLL_INTERVAL']
+    timeout = current_app.config['TASK_EVENTS_TIMEOUT']
+
+    seen = decode_event_id(request.headers.get('Last-Event-ID', ''))
+    seen = {task_id: seen[task_id] for task_id in task_ids if task_id in seen}
+    pending = {
+        task_id: seen.get(task_id)
+        for task_id in task_ids
+        if not seen.get(task_id) or seen[task_id][0] not in READY_STATES
+    }
+    if not pending:
+        return Response(status=204)
+
+    def events():
+        yield f"retry: {int(poll_interval * 1000)}\n\n"
+        deadline = time.monotonic() + timeout
+        while pending and time.monotonic() < deadline:
+            for task_id, last_seen in list(pending.items()):
+                status = task_status(celery.AsyncResult(task_id))
+                current = [status["state"], status["progress"]]
+                if status["state"] in READY_STATES:
+                    event = 'completed' if status["state"] == 'SUCCESS' else 'failed'
+                    del pending[task_id]
+                elif current != last_seen:
+                    event = 'progress'
+                    pending[task_id] = current
+                else:
+                    continue
+                seen[task_id] = current
+                yield f"id: {encode_event_id(seen)}\nevent: {event}\ndata: {json.dumps(status)}\n\n"
+            if pending:
+                time.sleep(poll_interval)
+        if pending:
+            yield f"event: timeout\ndata: {json.dumps({'task_ids': list(pending)})}\n\n"
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/patients/<uuid:patient_id>/analyze', methods=['POST'])
 @jwt_required()
 async def analyze_patient_documents(patient_id):
-    """Analyze all medical documents for a patient and generate a comprehensive summary PDF"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    """Analyze all medical documents for a patient and generate a comprehensive summary PDF.
+
+    Pass `?full=true` to rebuild the summary from every document.
+    """
+    current_user_id = get_current_user_id()
     
     # First fetch the patient by user_id
     patient = Patient.query.filter_by(user_id=patient_id).first()
@@ -215,7 +661,7 @@ async def analyze_patient_documents(patient_id):
         return jsonify({"msg": "Patient not found"}), 404
     
     # Check access permissions
-    if user.role == 'Patient' and str(user.patient.id) != str(patient.id):
+    if get_current_role() == UsersRoles.PATIENT and patient.user_id != current_user_id:
         return jsonify({"msg": "Access denied"}), 403
     
     try:
@@ -228,49 +674,11 @@ async def analyze_patient_documents(patient_id):
                 "error": "No documents found for this patient"
             }), 404
         
-        # Prepare documents for analysis
-        doc_list = []
-        for doc in documents:
-            try:
-                # Get file content from S3
-                file_obj = get_file_from_s3(doc.file_path)
-                file_bytes = file_obj.read()
-                
-                # Check if it's a PDF file
-                if doc.file_path.lower().endswith('.pdf'):
-                    # Create a BytesIO object from the file bytes
-                    pdf_file = BytesIO(file_bytes)
-                    # Create PDF reader object
-                    reader = PdfReader(pdf_file)
-                    # Extract text from all pages
-                    content = ""
-                    for page in reader.pages:
-                        content += page.extract_text() + "\n"
-                else:
-                    # For non-PDF files, try UTF-8 decoding
-                    content = file_bytes.decode('utf-8')
-                
-                doc_list.append({
-                    'content': content,
-                    'date': doc.uploaded_at.isoformat(),
-                    'title': doc.title
-                })
-            except Exception as e:
-                logging.error(f"Error reading document {doc.id}: {str(e)}")
-                continue
-        
-        if not doc_list:
-            return jsonify({
-                "success": False,
-                "error": "Could not process any documents"
-            }), 500
-        
-        # Initialize AI service and process documents
+        # Only documents added since the last summary are sent to the model,
+        # unless a full regeneration is requested
+        full = request.args.get('full', 'false').lower() == 'true'
         ai_service = MedicalAIService()
-        result = await ai_service.process_medical_documents(
-            patient_id=str(patient.id),
-            documents=doc_list
-        )
+        result = await ai_service.analyze_patient(patient.id, documents, full=full)
         
         if not result['success']:
             return jsonify(result), 500
@@ -285,7 +693,8 @@ async def analyze_patient_documents(patient_id):
             action="Generated patient document summary",
             details={
                 "patient_id": str(patient.id),
-                "document_count": result['document_count']
+                "document_count": result['document_count'],
+                "processed_count": result['processed_count']
             }
         )
         db.session.add(log)
@@ -2,9 +2,14 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required
 from backend.app import db
 from backend.app.constants import UsersRoles, UsersStatus
-from backend.app.models import User, Patient, AuditLog, MedicalDocument
+from backend.app.models import User
 from backend.app.schemas import users_schema
-from sqlalchemy import or_
+from backend.app.services.patient_deletion import delete_patient_records
+from backend.app.services.patient_import import import_format, parse_rows, import_patients_task
+from backend.app.api.documents import new_task_id
+from backend.app.utils.decorators import admin_required, get_current_user_id
+from backend.app.utils.pagination import keyset_paginate, offset_paginate
+from backend.app.utils.search import search_users
 
 bp = Blueprint('patients', __name__)
 
@@ -14,37 +19,52 @@ bp = Blueprint('patients', __name__)
 def get_patients():
     search = request.args.get('search')
     patients_list_query = User.query.filter(User.role == UsersRoles.PATIENT)
+    status = request.args.get('status')
+    if status:
+        patients_list_query = patients_list_query.filter(User.status == status)
 
     if search:
-        patients_list_query = patients_list_query.filter(
-            or_(
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%"),
-                User.email.ilike(f"%{search}%"),
-            )
-        )
+        # Ranked matches, best match first
+        patients_list, headers = offset_paginate(search_users(patients_list_query, search))
+    else:
+        patients_list, headers = keyset_paginate(patients_list_query, User)
 
-    patients_list = patients_list_query.all()
+    return jsonify(users_schema.dump(patients_list)), 200, headers
 
-    return jsonify(users_schema.dump(patients_list)), 200
+@bp.route('/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_patients_file():
+    """Create patients in bulk from an uploaded CSV or NDJSON file.
+
+    Hashing every password takes too long for a request, so the rows are
+    imported by a Celery task whose result is polled from the task endpoints.
+    """
+    if 'file' not in request.files:
+        return jsonify({"msg": "No file provided"}), 400
+
+    file = request.files['file']
+    format = request.args.get('format') or import_format(file.filename)
+    if format not in ('csv', 'ndjson'):
+        return jsonify({"msg": "Unsupported format, use csv or ndjson"}), 400
+
+    rows = parse_rows(file.stream, format)
+    current_user_id = get_current_user_id()
+    task = import_patients_task.apply_async(args=[rows, str(current_user_id)], task_id=new_task_id(current_user_id))
+
+    return jsonify({
+        "msg": "Patient import started",
+        "task_id": task.id,
+        "rows": len(rows)
+    }), 202
 
 @bp.route('/<uuid:user_id>', methods=['DELETE'])
 @jwt_required()
+@admin_required
 def delete_patient(user_id):
-    current_user = User.query.filter_by(id=user_id).one_or_none()
-    if current_user is not None:
-        audit_logs = AuditLog.query.filter_by(user_id=user_id).all()
-        for log in audit_logs:
-            db.session.delete(log)
-        current_patient = Patient.query.filter_by(user_id=user_id).one_or_none()
-        med_docs = MedicalDocument.query.filter_by(patient_id=current_patient.id).all()
-        for doc in med_docs:
-            db.session.delete(doc)
-
-        db.session.delete(current_patient)
-        db.session.delete(current_user)
-        db.session.commit()
-        return jsonify({"msg": "Patient deleted successfully"}), 200
+    if not delete_patient_records(user_id):
+        return jsonify({"msg": "Patient not found"}), 404
+    return jsonify({"msg": "Patient deleted successfully"}), 200
 
 @bp.route('/<uuid:user_id>/status', methods=['PATCH'])
 @jwt_required()
@@ -1,9 +1,11 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, abort, jsonify, request
+from flask_jwt_extended import jwt_required
 from backend.app import db
 from backend.app.models import User, Patient, AuditLog
 from backend.app.schemas import user_schema, patient_schema
-from backend.app.utils.decorators import admin_required
+from backend.app.constants import UsersRoles
+from backend.app.utils.decorators import admin_required, get_current_user_id, get_current_role, load_current_user
+from backend.app.utils.audit import record_audit
 
 bp = Blueprint('users', __name__)
 
@@ -11,17 +13,17 @@ bp = Blueprint('users', __name__)
 @jwt_required()
 def get_current_user():
     """Get current user details"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    current_user_id = get_current_user_id()
+    user = load_current_user()
+    if user is None:
+        abort(404)
     
     # Log the action
-    log = AuditLog(
+    record_audit(
         user_id=current_user_id,
         action="Retrieved user profile",
         details={"user_id": str(current_user_id)}
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify(user_schema.dump(user)), 200
 
@@ -31,16 +33,14 @@ def get_current_user():
 def get_user(id):
     """Get user details (Admin only)"""
     user = User.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
+    current_user_id = get_current_user_id()
     
     # Log the action
-    log = AuditLog(
+    record_audit(
         user_id=current_user_id,
         action="Retrieved user details",
         details={"target_user_id": str(id)}
     )
-    db.session.add(log)
-    db.session.commit()
     
     return jsonify(user_schema.dump(user)), 200
 
@@ -50,9 +50,9 @@ def get_user(id):
 def delete_user(id):
     """Delete user (Admin only)"""
     user = User.query.get_or_404(id)
-    current_user_id = get_jwt_identity()
+    current_user_id = get_current_user_id()
     
-    if str(user.id) == current_user_id:
+    if user.id == current_user_id:
         return jsonify({"msg": "Cannot delete yourself"}), 400
     
     # Log the action before deletion
@@ -76,10 +76,12 @@ def delete_user(id):
 @jwt_required()
 def create_patient_profile():
     """Create patient profile for current user"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get_or_404(current_user_id)
+    current_user_id = get_current_user_id()
+    user = load_current_user()
+    if user is None:
+        abort(404)
     
-    if user.role != 'Patient':
+    if get_current_role() != UsersRoles.PATIENT:
         return jsonify({"msg": "Only patients can create patient profiles"}), 403
     
     if user.patient:
@@ -1,12 +1,104 @@
 import click
+from flask import current_app
 from flask.cli import with_appcontext
+from backend.app import db
+from .models import User
 from .seeders import seed_database
+from .utils.audit_partitions import create_partitions, archive_partitions
+from .services.stats import rollup_daily_stats
+from .utils.token_blocklist import purge_expired_tokens
+from .services.patient_import import import_format, parse_rows, import_patients
+from datetime import datetime, timedelta
 
 def register_commands(app):
     app.cli.add_command(seed_db_command)
+    app.cli.add_command(import_patients_command)
+    app.cli.add_command(audit_logs_group)
+    app.cli.add_command(stats_group)
+    app.cli.add_command(purge_tokens_command)
 
 @click.command('seed-db')
 @with_appcontext
 def seed_db_command():
     """Seed the database with initial data."""
-    seed_database() 
\ No newline at end of file
+    seed_database()
+
+@click.command('import-patients')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--chunk-size', type=int, help='Rows per transaction, defaults to PATIENT_IMPORT_CHUNK_SIZE.')
+@with_appcontext
+def import_patients_command(path, format, chunk_size):
+    """Create patients in bulk from a CSV or NDJSON file."""
+    format = format or import_format(path)
+    if format is None:
+        raise click.ClickException('Cannot tell the format from the file name, pass --format')
+
+    with open(path, 'rb') as stream:
+        rows = parse_rows(stream, format)
+    created, errors = import_patients(rows, chunk_size)
+
+    for row, row_errors in errors.items():
+        click.echo(f"Row {row}: {row_errors}", err=True)
+    click.echo(f"Imported {created} of {len(rows)} patients")
+
+@click.group('audit-logs')
+def audit_logs_group():
+    """Manage the monthly audit_logs partitions."""
+
+def require_postgresql():
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('audit_logs is only partitioned on PostgreSQL')
+
+@audit_logs_group.command('create-partitions')
+@click.option('--months-ahead', default=3, show_default=True, help='Months to create partitions for in advance.')
+@with_appcontext
+def create_partitions_command(months_ahead):
+    """Create the monthly partitions for upcoming audit logs."""
+    require_postgresql()
+    created = create_partitions(months_ahead)
+    click.echo(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+
+@audit_logs_group.command('archive')
+@click.option('--retention-months', type=int, help='Months of audit logs to keep in the database.')
+@with_appcontext
+def archive_command(retention_months):
+    """Move partitions past the retention period to compressed files in storage."""
+    require_postgresql()
+    if retention_months is None:
+        retention_months = current_app.config['AUDIT_LOG_RETENTION_MONTHS']
+    for name, key in archive_partitions(retention_months):
+        click.echo(f"Archived {name} to {key}")
+
+
+@click.group('stats')
+def stats_group():
+    """Manage the pre-aggregated admin stats."""
+
+@stats_group.command('backfill')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to roll up, defaults to the first user.')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to roll up, defaults to today.')
+@with_appcontext
+def backfill_stats_command(start, end):
+    """Compute the daily stats rollups for a range of days."""
+    end = end.date() if end else datetime.utcnow().date()
+    if start:
+        start = start.date()
+    else:
+        first = db.session.query(db.func.min(User.created_at)).scalar()
+        start = first.date() if first else end
+
+    # One month per transaction keeps backfills of long histories cheap to retry
+    day = start
+    while day <= end:
+        chunk_end = min(day + timedelta(days=30), end)
+        rollup_daily_stats(day, chunk_end)
+        day = chunk_end + timedelta(days=1)
+    click.echo(f"Rolled up {(end - start).days + 1} days from {start} to {end}")
+
+
+@click.command('purge-tokens')
+@with_appcontext
+def purge_tokens_command():
+    """Delete blocklist entries of tokens that have expired."""
+    click.echo(f"Purged {purge_expired_tokens()} expired tokens")
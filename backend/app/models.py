@@ -1,11 +1,23 @@
 from datetime import datetime
 from backend.app import db
-import bcrypt
+from backend.app.utils.passwords import hash_password, check_password, needs_rehash
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import UUID, JSON
 import uuid
 
 class User(db.Model):
     __tablename__ = 'users'
+    # Serves the keyset-paginated user lists, filtered by role
+    __table_args__ = (
+        db.Index('ix_users_role_created_at_id', 'role', 'created_at', 'id'),
+    ) + tuple(
+        # Trigram indexes let PostgreSQL answer substring ILIKE searches
+        db.Index(
+            f'ix_users_{column}_trgm', column,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+        )
+        for column in ('first_name', 'last_name', 'email')
+    )
 
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
@@ -13,7 +25,8 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(20), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Not null, keyset pagination would skip rows without it
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     phone = db.Column(db.String(20), nullable=True)
     status = db.Column(db.String(20), nullable=True, default='Unapproved')
     
@@ -21,21 +34,54 @@ class User(db.Model):
     patient = db.relationship('Patient', backref='user', uselist=False)
     audit_logs = db.relationship('AuditLog', backref='user', lazy='dynamic')
     
-    def __init__(self, email, password, role, first_name, last_name, phone, status):
+    def __init__(self, email, password, role, first_name, last_name, phone, status, password_hash=None):
         self.email = email
         self.first_name = first_name
         self.last_name = last_name
-        self.set_password(password)
+        # Callers hashing in bulk pass the hash in precomputed
+        if password_hash is not None:
+            self.password_hash = password_hash
+        else:
+            self.set_password(password)
         self.role = role
         self.phone = phone
         self.status = status
     
     def set_password(self, password):
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return check_password(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        """Whether the hash was made with a different BCRYPT_LOG_ROUNDS"""
+        return needs_rehash(self.password_hash)
+
+# SQLite has no trigram indexes, mirror the user search columns into an FTS5
+# table with the trigram tokenizer instead (used by the test suite)
+USERS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE users_fts USING fts5(
+        first_name, last_name, email, content='users', content_rowid='rowid', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, first_name, last_name, email)
+        VALUES (new.rowid, new.first_name, new.last_name, new.email);
+    END""",
+    """CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.rowid, old.first_name, old.last_name, old.email);
+    END""",
+    """CREATE TRIGGER users_fts_update AFTER UPDATE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, first_name, last_name, email)
+        VALUES ('delete', old.rowid, old.first_name, old.last_name, old.email);
+        INSERT INTO users_fts(rowid, first_name, last_name, email)
+        VALUES (new.rowid, new.first_name, new.last_name, new.email);
+    END"""
+]
+
+for statement in USERS_FTS_DDL:
+    event.listen(User.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(User.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS users_fts').execute_if(dialect='sqlite'))
 
 class Patient(db.Model):
     __tablename__ = 'patients'
@@ -47,6 +93,18 @@ class Patient(db.Model):
     
     # Relationships
     medical_documents = db.relationship('MedicalDocument', backref='patient', lazy='dynamic')
+    summary = db.relationship('PatientSummary', uselist=False, cascade='all, delete-orphan')
+
+class PatientSummary(db.Model):
+    __tablename__ = 'patient_summaries'
+    
+    patient_id = db.Column(UUID(as_uuid=True), db.ForeignKey('patients.id'), primary_key=True)
+    summary_data = db.Column(db.JSON, nullable=False)
+    document_ids = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PatientSummary {self.patient_id} covering {len(self.document_ids)} documents>'
 
 class MedicalDocument(db.Model):
     __tablename__ = 'medical_documents'
@@ -56,27 +114,92 @@ class MedicalDocument(db.Model):
     title = db.Column(db.String(200), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
     summary = db.Column(db.Text)
-    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # SHA-256 of the file, None for documents uploaded before deduplication
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+    
+    # Relationships
+    extracted_text = db.relationship(
+        'DocumentText', backref='document', uselist=False, cascade='all, delete-orphan'
+    )
     
     def __repr__(self):
         return f'<MedicalDocument {self.title}>'
 
+class StoredFile(db.Model):
+    """A file in storage shared by every document with the same content"""
+    __tablename__ = 'stored_files'
+
+    content_hash = db.Column(db.String(64), primary_key=True)
+    file_path = db.Column(db.String(500), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    # Number of medical_documents rows pointing at the file
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StoredFile {self.content_hash[:12]} x{self.ref_count}>'
+
+class DocumentText(db.Model):
+    __tablename__ = 'document_texts'
+    
+    document_id = db.Column(UUID(as_uuid=True), db.ForeignKey('medical_documents.id'), primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, index=True)
+    text = db.Column(db.Text, nullable=False)
+    extracted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DocumentText {self.document_id} {self.content_hash[:12]}>'
+
+class DailyStat(db.Model):
+    __tablename__ = 'daily_stats'
+    
+    day = db.Column(db.Date, primary_key=True)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+    new_documents = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailyStat {self.day}: {self.new_users} users, {self.new_documents} documents>'
+
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
+    __table_args__ = (
+        # Keyset pagination and time range filters
+        db.Index('ix_audit_logs_timestamp_id', 'timestamp', 'id'),
+        # Per-user history
+        db.Index('ix_audit_logs_user_id_timestamp', 'user_id', 'timestamp'),
+        # Substring search on action
+        db.Index(
+            'ix_audit_logs_action_trgm', 'action',
+            postgresql_using='gin', postgresql_ops={'action': 'gin_trgm_ops'}
+        ),
+        # Monthly partitions are created by Celery beat and the `flask audit-logs` commands
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     action = db.Column(db.String(200), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # Part of the primary key because PostgreSQL partitions the table by month on it
+    timestamp = db.Column(db.DateTime, primary_key=True, default=datetime.utcnow)
     details = db.Column(db.JSON)
     
     def __repr__(self):
         return f'<AuditLog {self.action} by {self.user_id} at {self.timestamp}>'
 
+# Rows outside every monthly partition land here instead of failing
+event.listen(
+    AuditLog.__table__, 'after_create',
+    DDL('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT').execute_if(dialect='postgresql')
+)
+
 # Token Blocklist for JWT
 class TokenBlocklist(db.Model):
     __tablename__ = 'token_blocklist'
     
     id = db.Column(db.Integer, primary_key=True)
     jti = db.Column(db.String(36), nullable=False, unique=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # When the revoked token expires, the row is useless after that
+    expires_at = db.Column(db.DateTime, nullable=False, index=True) 
\ No newline at end of file
@@ -2,8 +2,10 @@ from backend.app import db
 from backend.app.constants import UsersRoles
 from backend.app.models import User, Patient, AuditLog, MedicalDocument
 from datetime import datetime, date
+from sqlalchemy.orm import joinedload
 from backend.app.sample_data.generate_samples import create_sample_documents
-from backend.app.utils.storage import upload_file_to_s3
+from backend.app.utils.storage import upload_file
+from backend.app.utils.passwords import hash_passwords
 import uuid
 import os
 
@@ -139,6 +141,12 @@ def seed_database():
     print("Generating sample medical documents...")
     sample_documents = create_sample_documents()
 
+    # Hash every password up front, in parallel on the password hashing pool
+    password_hashes = dict(zip(
+        [user_data['email'] for user_data in users_data],
+        hash_passwords([user_data['password'] for user_data in users_data])
+    ))
+
     created_patients = []
     for user_data in users_data:
         # Check if user exists
@@ -158,6 +166,7 @@ def seed_database():
             last_name=user_data['last_name'],
             phone=user_data['phone'],
             status=user_data['status'],
+            password_hash=password_hashes[user_data['email']],
         )
         db.session.add(user)
         db.session.flush()  # This will assign the ID to the user
@@ -187,11 +196,23 @@ def seed_database():
     db.session.commit()
 
     print("Adding medical documents to patients...")
+    # Load the patients' users and which patients have documents up front
+    # instead of querying both per patient
+    patient_ids = [patient.id for patient in created_patients]
+    patients = {
+        patient.id: patient
+        for patient in Patient.query.options(joinedload(Patient.user)).filter(Patient.id.in_(patient_ids))
+    } if patient_ids else {}
+    created_patients = [patients[patient_id] for patient_id in patient_ids]
+    patients_with_documents = {
+        patient_id for (patient_id,) in db.session.query(MedicalDocument.patient_id)
+        .filter(MedicalDocument.patient_id.in_(patient_ids)).distinct()
+    } if patient_ids else set()
+
     # Distribute sample documents among patients
     for i, patient in enumerate(created_patients):
         # Check if patient already has documents
-        existing_docs = MedicalDocument.query.filter_by(patient_id=patient.id).count()
-        if existing_docs > 0:
+        if patient.id in patients_with_documents:
             print(f"Patient {patient.user.email} already has documents")
             continue
 
@@ -202,15 +223,15 @@ def seed_database():
                 file_extension = os.path.splitext(doc_info['path'])[1]
                 unique_filename = f"{uuid.uuid4()}{file_extension}"
                 
-                # Upload to S3
+                # Upload to storage
                 with open(doc_info['path'], 'rb') as file:
-                    s3_path = upload_file_to_s3(file, unique_filename)
+                    file_path = upload_file(file, unique_filename)
                 
                 # Create document record
                 document = MedicalDocument(
                     patient_id=patient.id,
                     title=f"{doc_info['title']} - {patient.user.first_name} {patient.user.last_name}",
-                    file_path=s3_path
+                    file_path=file_path
                 )
                 db.session.add(document)
                 
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+from openai import AsyncOpenAI
+from flask import current_app
+import asyncio
+import json
+from backend.app.utils.chunking import CHARS_PER_TOKEN, estimate_tokens
+
+def create_ai_client():
+    """Create the async chat completion client selected by AI_CLIENT"""
+    if current_app.config['AI_CLIENT'] == 'fake':
+        return FakeAsyncOpenAI()
+    return AsyncOpenAI(api_key=current_app.config['AI_API_KEY'])
+
+class FakeAsyncOpenAI:
+    """Offline stand-in for `AsyncOpenAI` chat completions.
+
+    Every completion echoes the last message back, cut to the requested
+    `max_tokens` the way a real model's output is bounded, and wrapped in a
+    JSON object when JSON output is requested. Calls, token usage and peak
+    concurrency are recorded so summarization throughput and completeness
+    can be measured without network access.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, model, messages, max_tokens=None, response_format=None, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            self.prompt_tokens += sum(estimate_tokens(message['content']) for message in messages)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            content = messages[-1]['content']
+            if max_tokens is not None:
+                content = content[:max_tokens * CHARS_PER_TOKEN]
+            if response_format and response_format.get('type') == 'json_object':
+                content = json.dumps({"summary": content})
+
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,178 @@
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
+import hashlib
+import logging
+import os
+import uuid
+from backend.app import celery, db
+from backend.app.models import StoredFile
+from backend.app.utils.storage import upload_file, stream_file, delete_file
+
+# Content-addressed keys look like sha256/ab/ab12...ef.pdf
+CONTENT_PREFIX = 'sha256/'
+
+
+def content_key(content_hash, filename):
+    """Storage key of a file with the given content"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{CONTENT_PREFIX}{content_hash[:2]}/{content_hash}{extension}"
+
+def hash_file(file_obj, chunk_size=64 * 1024):
+    """SHA-256 and size of a seekable file, which is rewound afterwards"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: file_obj.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest(), size
+
+class HashingStream:
+    """Wraps an iterable of byte chunks, hashing them as they are consumed"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.digest.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+    @property
+    def content_hash(self):
+        return self.digest.hexdigest()
+
+def lock_stored_files(content_hashes):
+    """Rows of `content_hashes` in `stored_files`, locked until the transaction ends.
+
+    Uploads and deletes of the same content lock its row before deciding
+    whether the stored file is still used, so they take turns. Rows are
+    locked in hash order to avoid deadlocks between batches.
+    """
+    content_hashes = set(content_hashes)
+    if not content_hashes:
+        return {}
+    query = StoredFile.query.filter(StoredFile.content_hash.in_(content_hashes)) \
+        .order_by(StoredFile.content_hash).with_for_update().populate_existing()
+    return {stored.content_hash: stored for stored in query}
+
+def find_stored_files(content_hashes):
+    """Files among `content_hashes` still used by a document, by content hash.
+
+    Files whose last document was deleted are left out even if they are not
+    purged yet, as `purge_stored_files` may remove them at any time after
+    the transaction ends; their content is uploaded again instead.
+    """
+    return {
+        content_hash: stored
+        for content_hash, stored in lock_stored_files(content_hashes).items()
+        if stored.ref_count > 0
+    }
+
+def store_file(file_obj, filename):
+    """Upload a file unless a file with the same content is stored already.
+
+    Returns `(file_path, content_hash, size)`. The new document's reference
+    has to be counted with `add_reference` in the transaction creating it.
+    """
+    content_hash, size = hash_file(file_obj, current_app.config['UPLOAD_CHUNK_SIZE'])
+    stored = find_stored_files([content_hash]).get(content_hash)
+    if stored is not None:
+        return stored.file_path, content_hash, size
+    return upload_file(file_obj, content_key(content_hash, filename)), content_hash, size
+
+def store_stream(chunks, filename, content_type=None):
+    """Stream a file into storage, hashing it on the way.
+
+    The hash is only known once the upload is done, so the file is written
+    under a random key and dropped again if its content turns out to be
+    stored already. Returns `(file_path, content_hash, size)` like
+    `store_file`.
+    """
+    stream = HashingStream(chunks)
+    extension = os.path.splitext(filename)[1].lower()
+    file_path = stream_file(stream, f"{uuid.uuid4()}{extension}", content_type)
+
+    stored = find_stored_files([stream.content_hash]).get(stream.content_hash)
+    if stored is not None:
+        delete_file(file_path)
+        return stored.file_path, stream.content_hash, stream.size
+    return file_path, stream.content_hash, stream.size
+
+def add_reference(content_hash, file_path, size):
+    """Count one more document using a file, registering the file if it is new.
+
+    Runs in the caller's transaction. A file waiting to be purged is taken
+    over by the new upload of its content.
+    """
+    stored = lock_stored_files([content_hash]).get(content_hash)
+    if stored is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredFile(content_hash=content_hash, file_path=file_path, size=size, ref_count=1))
+            return
+        except IntegrityError:
+            # Registered by a concurrent upload of the same content
+            stored = lock_stored_files([content_hash])[content_hash]
+    if stored.ref_count <= 0:
+        stored.file_path, stored.size, stored.ref_count = file_path, size, 1
+    else:
+        stored.ref_count += 1
+
+def release_references(content_hashes):
+    """Count documents using files as deleted, in the caller's transaction.
+
+    `content_hashes` has one entry per deleted document, None for documents
+    stored before deduplication. Files no document uses anymore keep their
+    row with a zero count; returns their content hashes, to be passed to
+    `purge_stored_files` once the transaction commits.
+    """
+    counts = Counter(content_hash for content_hash in content_hashes if content_hash)
+    unused = []
+    for content_hash, stored in lock_stored_files(counts).items():
+        stored.ref_count -= counts[content_hash]
+        if stored.ref_count <= 0:
+            unused.append(content_hash)
+    return unused
+
+def purge_stored_files(content_hashes=None):
+    """Delete unused files from storage, all of them if no hashes are given.
+
+    Each file is deleted while its row is locked, and only if no upload
+    started using it again, so an upload racing the purge either waits and
+    stores the content anew or keeps the file. Returns the number of files
+    deleted; failures are logged and left for the next purge.
+    """
+    query = db.session.query(StoredFile.content_hash).filter(StoredFile.ref_count <= 0)
+    if content_hashes is not None:
+        if not content_hashes:
+            return 0
+        query = query.filter(StoredFile.content_hash.in_(content_hashes))
+    candidates = [content_hash for content_hash, in query]
+    db.session.commit()
+
+    purged = 0
+    for content_hash in candidates:
+        stored = lock_stored_files([content_hash]).get(content_hash)
+        if stored is None or stored.ref_count > 0:
+            db.session.rollback()
+            continue
+        try:
+            delete_file(stored.file_path)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Could not delete unused file {stored.file_path}: {e}")
+            continue
+        db.session.delete(stored)
+        db.session.commit()
+        purged += 1
+    return purged
+
+@celery.task
+def purge_stored_files_task(content_hashes=None):
+    """Delete unused files, see `purge_stored_files`"""
+    return purge_stored_files(content_hashes)
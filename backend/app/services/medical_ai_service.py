@@ -1,5 +1,4 @@
-from typing import Dict, Any, List
-from openai import AsyncOpenAI
+from typing import Dict, Any, List, Optional
 from flask import current_app
 import json
 import logging
@@ -9,27 +8,115 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from io import BytesIO
 from datetime import datetime
+from backend.app import db
+from backend.app.models import MedicalDocument, PatientSummary
+from backend.app.services.ai_client import create_ai_client
+from backend.app.services.summarizer import ChunkedSummarizer
+from backend.app.utils.ai import get_documents_text
 
 class MedicalAIService:
     def __init__(self):
         self.api_key = current_app.config['AI_API_KEY']
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.client = create_ai_client()
+        self.chunk_tokens = current_app.config['AI_CHUNK_TOKENS']
+        self.notes_tokens = current_app.config['AI_CHUNK_NOTES_TOKENS']
+        self.context_tokens = current_app.config['AI_CONTEXT_TOKENS']
+        self.max_concurrency = current_app.config['AI_MAX_CONCURRENT_REQUESTS']
 
-    async def process_medical_documents(self, patient_id: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def analyze_patient(self, patient_id, documents: List[MedicalDocument], full: bool = False) -> Dict[str, Any]:
+        """
+        Generate a patient's summary PDF, sending the model only the documents
+        the stored summary does not cover yet
+
+        Args:
+            patient_id: The unique identifier for the patient
+            documents: All MedicalDocument rows of the patient
+            full: Ignore the stored summary and rebuild it from every document
+
+        Returns:
+            Same as `process_medical_documents`, plus:
+            - processed_count: int (documents sent to the model on this run)
+        """
+        previous = None if full else PatientSummary.query.get(patient_id)
+        document_ids = {str(doc.id) for doc in documents}
+
+        # A removed document may still be described in the summary, start over
+        if previous is not None and not set(previous.document_ids) <= document_ids:
+            previous = None
+
+        covered = set(previous.document_ids) if previous is not None else set()
+        new_documents = [doc for doc in documents if str(doc.id) not in covered]
+
+        if previous is not None and not new_documents:
+            return {
+                "success": True,
+                "patient_id": str(patient_id),
+                "pdf_data": self.build_summary_pdf(str(patient_id), previous.summary_data, len(covered)),
+                "summary_data": previous.summary_data,
+                "document_count": len(covered),
+                "processed_count": 0
+            }
+
+        texts = get_documents_text(new_documents)
+        processed = [(doc, content) for doc, content in zip(new_documents, texts) if content is not None]
+        if not processed:
+            return {
+                "success": False,
+                "error": "Could not process any documents",
+                "patient_id": str(patient_id)
+            }
+
+        result = await self.process_medical_documents(
+            patient_id=str(patient_id),
+            documents=[
+                {
+                    'content': content,
+                    'date': doc.uploaded_at.isoformat(),
+                    'title': doc.title
+                }
+                for doc, content in processed
+            ],
+            previous_summary=previous.summary_data if previous is not None else None,
+            document_count=len(covered) + len(processed)
+        )
+        if not result['success']:
+            return result
+
+        summary = previous or PatientSummary.query.get(patient_id) or PatientSummary(patient_id=patient_id)
+        summary.summary_data = result['summary_data']
+        summary.document_ids = sorted(covered | {str(doc.id) for doc, content in processed})
+        db.session.add(summary)
+        db.session.commit()
+
+        result['processed_count'] = len(processed)
+        return result
+
+    async def process_medical_documents(
+        self,
+        patient_id: str,
+        documents: List[Dict[str, Any]],
+        previous_summary: Optional[Dict[str, Any]] = None,
+        document_count: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Process medical documents and generate a comprehensive summary PDF
-        
+
         Args:
             patient_id: The unique identifier for the patient
             documents: List of dictionaries containing:
                       - content: str (text content of the document)
                       - date: str (document date)
                       - title: str (document title/description)
-        
+            previous_summary: Structured summary to update with `documents`
+                      instead of starting from scratch
+            document_count: Total number of documents the summary is based
+                      on, defaults to len(documents)
+
         Returns:
             Dict containing:
             - success: bool
             - pdf_data: bytes (if successful)
+            - summary_data: dict (if successful)
             - error: str (if unsuccessful)
         """
         if not documents:
@@ -38,6 +125,9 @@ class MedicalAIService:
                 "error": f"No medical documents provided for patient ID: {patient_id}"
             }
 
+        if document_count is None:
+            document_count = len(documents)
+
         try:
             # Combine all documents with metadata
             combined_text = "\n\n".join([
@@ -48,6 +138,25 @@ class MedicalAIService:
                 for doc in documents
             ])
 
+            # Condense oversized input chunk by chunk instead of overflowing the context
+            summarizer = ChunkedSummarizer(
+                self.client,
+                model="gpt-4o-mini",
+                chunk_tokens=self.chunk_tokens,
+                notes_tokens=self.notes_tokens,
+                max_concurrency=self.max_concurrency
+            )
+            combined_text = await summarizer.condense(combined_text, self.context_tokens)
+
+            if previous_summary:
+                user_prompt = (
+                    f"Here is the existing medical summary for patient ID {patient_id}:\n\n"
+                    f"{json.dumps(previous_summary)}\n\n"
+                    f"Update it with these new medical documents and return the complete updated summary:\n\n{combined_text}"
+                )
+            else:
+                user_prompt = f"Please analyze these medical documents for patient ID {patient_id} and create a comprehensive summary:\n\n{combined_text}"
+
             # Generate comprehensive analysis using GPT-4
             response = await self.client.chat.completions.create(
                 model="gpt-4o",
@@ -98,7 +207,7 @@ class MedicalAIService:
                     },
                     {
                         "role": "user",
-                        "content": f"Please analyze these medical documents for patient ID {patient_id} and create a comprehensive summary:\n\n{combined_text}"
+                        "content": user_prompt
                     }
                 ],
                 temperature=0.3,
@@ -107,70 +216,13 @@ class MedicalAIService:
             )
 
             summary_data = json.loads(response.choices[0].message.content)
-            
-            # Generate PDF
-            pdf_buffer = BytesIO()
-            doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
-            styles = getSampleStyleSheet()
-            story = []
-
-            # Custom styles
-            header_style = ParagraphStyle(
-                'CustomHeader',
-                parent=styles['Heading1'],
-                textColor=colors.HexColor('#2c3e50'),
-                spaceAfter=20,
-                fontSize=14,
-                leading=16
-            )
-
-            subheader_style = ParagraphStyle(
-                'CustomSubHeader',
-                parent=styles['Heading2'],
-                textColor=colors.HexColor('#34495e'),
-                spaceAfter=12,
-                fontSize=12,
-                leading=14
-            )
-
-            # Add title and metadata
-            story.append(Paragraph(f"Comprehensive Medical Summary", header_style))
-            story.append(Paragraph(f"Patient ID: {patient_id}", subheader_style))
-            story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-            story.append(Paragraph(f"Based on {len(documents)} medical documents", styles['Normal']))
-            story.append(Spacer(1, 20))
-
-            # Add each section
-            for section, content in summary_data.items():
-                section_title = section.replace('_', ' ').title()
-                story.append(Paragraph(section_title, header_style))
-                
-                if isinstance(content, dict):
-                    for key, value in content.items():
-                        subsection_title = key.replace('_', ' ').title()
-                        story.append(Paragraph(subsection_title, subheader_style))
-                        if isinstance(value, list):
-                            for item in value:
-                                story.append(Paragraph(f"• {item}", styles['Normal']))
-                        else:
-                            story.append(Paragraph(str(value), styles['Normal']))
-                elif isinstance(content, list):
-                    for item in content:
-                        story.append(Paragraph(f"• {item}", styles['Normal']))
-                else:
-                    story.append(Paragraph(str(content), styles['Normal']))
-                
-                story.append(Spacer(1, 15))
-
-            doc.build(story)
-            pdf_data = pdf_buffer.getvalue()
 
             return {
                 "success": True,
                 "patient_id": patient_id,
-                "pdf_data": pdf_data,
+                "pdf_data": self.build_summary_pdf(patient_id, summary_data, document_count),
                 "summary_data": summary_data,
-                "document_count": len(documents)
+                "document_count": document_count
             }
 
         except Exception as e:
@@ -179,4 +231,62 @@ class MedicalAIService:
                 "success": False,
                 "error": f"Failed to process documents: {str(e)}",
                 "patient_id": patient_id
-            } 
\ No newline at end of file
+            }
+
+    def build_summary_pdf(self, patient_id: str, summary_data: Dict[str, Any], document_count: int) -> bytes:
+        """Render a structured summary as a PDF"""
+        pdf_buffer = BytesIO()
+        doc = SimpleDocTemplate(pdf_buffer, pagesize=letter)
+        styles = getSampleStyleSheet()
+        story = []
+
+        # Custom styles
+        header_style = ParagraphStyle(
+            'CustomHeader',
+            parent=styles['Heading1'],
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=20,
+            fontSize=14,
+            leading=16
+        )
+
+        subheader_style = ParagraphStyle(
+            'CustomSubHeader',
+            parent=styles['Heading2'],
+            textColor=colors.HexColor('#34495e'),
+            spaceAfter=12,
+            fontSize=12,
+            leading=14
+        )
+
+        # Add title and metadata
+        story.append(Paragraph(f"Comprehensive Medical Summary", header_style))
+        story.append(Paragraph(f"Patient ID: {patient_id}", subheader_style))
+        story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
+        story.append(Paragraph(f"Based on {document_count} medical documents", styles['Normal']))
+        story.append(Spacer(1, 20))
+
+        # Add each section
+        for section, content in summary_data.items():
+            section_title = section.replace('_', ' ').title()
+            story.append(Paragraph(section_title, header_style))
+
+            if isinstance(content, dict):
+                for key, value in content.items():
+                    subsection_title = key.replace('_', ' ').title()
+                    story.append(Paragraph(subsection_title, subheader_style))
+                    if isinstance(value, list):
+                        for item in value:
+                            story.append(Paragraph(f"• {item}", styles['Normal']))
+                    else:
+                        story.append(Paragraph(str(value), styles['Normal']))
+            elif isinstance(content, list):
+                for item in content:
+                    story.append(Paragraph(f"• {item}", styles['Normal']))
+            else:
+                story.append(Paragraph(str(content), styles['Normal']))
+
+            story.append(Spacer(1, 15))
+
+        doc.build(story)
+        return pdf_buffer.getvalue()
@@ -0,0 +1,63 @@
+from flask import current_app
+from sqlalchemy import select
+import logging
+from backend.app import celery, db
+from backend.app.constants import UsersRoles
+from backend.app.models import User, Patient, PatientSummary, MedicalDocument, DocumentText, AuditLog
+from backend.app.utils.storage import delete_files
+from backend.app.services.document_store import release_references, purge_stored_files_task
+
+def delete_patient_records(user_id):
+    """Delete a patient's user and everything that references it.
+
+    Each table is cleared with one set-based DELETE in a single transaction,
+    so no rows are loaded into the session however many audit logs or
+    documents the patient has. The stored document files are removed
+    afterwards by the `delete_stored_files` and `purge_stored_files_task`
+    tasks, unless documents of other patients share them.
+
+    Returns False if `user_id` is not the id of a patient user.
+    """
+    patient_id = db.session.query(Patient.id).join(User, User.id == Patient.user_id).filter(
+        Patient.user_id == user_id,
+        User.role == UsersRoles.PATIENT
+    ).scalar()
+    if patient_id is None:
+        return False
+
+    document_ids = select(MedicalDocument.id).where(MedicalDocument.patient_id == patient_id)
+    files = db.session.execute(
+        select(MedicalDocument.file_path, MedicalDocument.content_hash)
+        .where(MedicalDocument.patient_id == patient_id)
+    ).all()
+    # Deduplicated files are only deleted once no other document uses them
+    file_paths = [file_path for file_path, content_hash in files if content_hash is None]
+    unused = release_references([content_hash for _, content_hash in files])
+
+    for statement in (
+        AuditLog.__table__.delete().where(AuditLog.user_id == user_id),
+        DocumentText.__table__.delete().where(DocumentText.document_id.in_(document_ids)),
+        MedicalDocument.__table__.delete().where(MedicalDocument.patient_id == patient_id),
+        PatientSummary.__table__.delete().where(PatientSummary.patient_id == patient_id),
+        Patient.__table__.delete().where(Patient.id == patient_id),
+        User.__table__.delete().where(User.id == user_id)
+    ):
+        db.session.execute(statement)
+    db.session.commit()
+
+    # Bulk deletes bypass the ORM events the stats cache listens to
+    current_app.extensions['stats'].invalidate()
+    if file_paths:
+        delete_stored_files.delay(file_paths)
+    if unused:
+        purge_stored_files_task.delay(unused)
+    return True
+
+@celery.task(bind=True, max_retries=3, default_retry_delay=60)
+def delete_stored_files(self, file_paths):
+    """Delete files from storage in batches, retrying the ones that failed"""
+    failed = delete_files(file_paths)
+    if failed:
+        logging.warning(f"Could not delete {len(failed)} of {len(file_paths)} stored files")
+        raise self.retry(args=[failed])
+    return len(file_paths)
@@ -0,0 +1,182 @@
+from flask import current_app
+from datetime import datetime
+import csv
+import io
+import json
+import uuid
+from backend.app import celery, db
+from backend.app.constants import UsersRoles, UsersStatus
+from backend.app.models import User, Patient
+from backend.app.schemas import UserSchema, PatientSchema
+from backend.app.utils.audit import record_audit
+from backend.app.utils.passwords import hash_passwords
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+DEFAULT_DOB = '1990-01-01'
+
+users_import_schema = UserSchema(many=True)
+patients_import_schema = PatientSchema(many=True)
+
+
+def import_format(filename):
+    """Guess the import format from a file name, None if it is not supported"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return extension if extension in IMPORT_FORMATS else None
+
+def parse_rows(stream, format):
+    """Read rows from a binary CSV (with a header line) or NDJSON stream.
+
+    Lines that cannot be parsed are returned as None so their row number is
+    kept and reported as an error.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if format == 'csv':
+        return [dict(row) for row in csv.DictReader(text)]
+
+    rows = []
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        rows.append(row if isinstance(row, dict) else None)
+    return rows
+
+def split_row(row):
+    """Split an import row into the UserSchema and PatientSchema fields.
+
+    Rows may carry a single `name` like /api/auth/register accepts, and
+    patients without a password get their email, as on registration.
+    """
+    row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items()}
+    row = {key: value for key, value in row.items() if value not in (None, '')}
+    if 'name' in row and 'first_name' not in row:
+        first_name, *last_part = row['name'].split(' ')
+        row['first_name'] = first_name
+        row['last_name'] = ' '.join(last_part)
+
+    user = {
+        key: row[key]
+        for key in ('email', 'password', 'first_name', 'last_name', 'phone')
+        if key in row
+    }
+    user['role'] = UsersRoles.PATIENT
+    user.setdefault('password', user.get('email', ''))
+    return user, {'dob': row.get('dob', DEFAULT_DOB)}
+
+def validate_rows(rows):
+    """Validate every row with the user and patient schemas in one pass each.
+
+    Returns the valid (index, user, patient) entries and the per-row errors.
+    """
+    errors = {}
+    entries = []
+    for index, row in enumerate(rows):
+        if row is None:
+            errors[index] = {'row': ['Could not be parsed']}
+            continue
+        entries.append((index, *split_row(row)))
+
+    user_errors = users_import_schema.validate([user for _, user, _ in entries])
+    patient_errors = patients_import_schema.validate([patient for _, _, patient in entries])
+
+    valid = []
+    for position, (index, user, patient) in enumerate(entries):
+        row_errors = {**user_errors.get(position, {}), **patient_errors.get(position, {})}
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            valid.append((index, user, patient))
+    return valid, errors
+
+def import_patients(rows, chunk_size=None):
+    """Create patients from already parsed rows in bulk.
+
+    Duplicate emails are found with one query for the whole import,
+    passwords are hashed in parallel on the password hashing pool, and users
+    and patients are written with multi-row INSERTs, one transaction per
+    chunk of `chunk_size` rows. A chunk that fails to insert is rolled back
+    and reported without affecting the others.
+
+    Returns the number of patients created and the errors keyed by the
+    1-based row number (not counting a CSV header).
+    """
+    chunk_size = chunk_size or current_app.config['PATIENT_IMPORT_CHUNK_SIZE']
+    valid, errors = validate_rows(rows)
+
+    emails = [user['email'] for _, user, _ in valid]
+    registered = {
+        email for (email,) in
+        db.session.query(User.email).filter(User.email.in_(set(emails))).all()
+    } if emails else set()
+
+    seen = set()
+    new = []
+    for index, user, patient in valid:
+        if user['email'] in registered:
+            errors[index] = {'email': ['Email already registered']}
+        elif user['email'] in seen:
+            errors[index] = {'email': ['Duplicate email in import']}
+        else:
+            seen.add(user['email'])
+            new.append((index, user, patient))
+
+    password_hashes = hash_passwords([user['password'] for _, user, _ in new])
+
+    created = 0
+    for start in range(0, len(new), chunk_size):
+        chunk = new[start:start + chunk_size]
+        now = datetime.utcnow()
+        users = []
+        patients = []
+        for (_, user, patient), password_hash in zip(chunk, password_hashes[start:start + chunk_size]):
+            user_id = uuid.uuid4()
+            users.append({
+                'id': user_id,
+                'email': user['email'],
+                'password_hash': password_hash,
+                'role': UsersRoles.PATIENT,
+                'first_name': user['first_name'],
+                'last_name': user['last_name'],
+                'phone': user.get('phone'),
+                'status': UsersStatus.UNAPPROVED,
+                'created_at': now
+            })
+            patients.append({
+                'id': uuid.uuid4(),
+                'user_id': user_id,
+                'dob': datetime.strptime(patient['dob'], '%Y-%m-%d').date(),
+                'created_at': now
+            })
+
+        try:
+            db.session.execute(User.__table__.insert(), users)
+            db.session.execute(Patient.__table__.insert(), patients)
+            db.session.commit()
+            created += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Error importing patients: {e}")
+            for index, _, _ in chunk:
+                errors[index] = {'row': ['Could not be inserted']}
+
+    if created:
+        # Bulk inserts bypass the ORM events the stats cache listens to
+        current_app.extensions['stats'].invalidate()
+
+    return created, {index + 1: errors[index] for index in sorted(errors)}
+
+@celery.task
+def import_patients_task(rows, user_id):
+    """Import rows uploaded to /api/patients/import, hashing on the worker instead of the request"""
+    created, errors = import_patients(rows)
+    record_audit(user_id, 'import_patients', {'rows': len(rows), 'created': created})
+    return {
+        "created": created,
+        "failed": len(errors),
+        "errors": [{"row": row, "errors": row_errors} for row, row_errors in errors.items()]
+    }
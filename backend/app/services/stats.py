@@ -0,0 +1,194 @@
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from threading import Lock
+import copy
+import time
+from backend.app import celery, db
+from backend.app.models import User, Patient, MedicalDocument, DailyStat
+
+RECENT_DAYS = 30
+
+def compute_stats():
+    """Compute the admin dashboard stats in a single query.
+
+    Users are grouped by role, and the patient and document counts ride
+    along as scalar subqueries, so the database answers everything in one
+    round trip.
+    """
+    since = datetime.utcnow() - timedelta(days=RECENT_DAYS)
+    rows = db.session.execute(select(
+        User.role,
+        func.count(User.id),
+        func.count(User.id).filter(User.created_at >= since),
+        select(func.count(Patient.id)).scalar_subquery(),
+        select(func.count(MedicalDocument.id)).scalar_subquery(),
+        select(func.count(MedicalDocument.id)).where(MedicalDocument.uploaded_at >= since).scalar_subquery()
+    ).group_by(User.role)).all()
+
+    # Patients and documents cannot exist without users
+    patients, documents, new_documents = rows[0][3:] if rows else (0, 0, 0)
+    return {
+        "total_stats": {
+            "users": sum(row[1] for row in rows),
+            "patients": patients,
+            "documents": documents
+        },
+        "last_30_days": {
+            "new_users": sum(row[2] for row in rows),
+            "new_documents": new_documents
+        },
+        "role_distribution": {row[0]: row[1] for row in rows}
+    }
+
+class StatsCache:
+    """Caches the admin dashboard stats for STATS_CACHE_TTL seconds.
+
+    With STATS_INCREMENTAL enabled, users, patients and documents added or
+    deleted through the ORM in this process are applied to the cached
+    numbers as soon as their transaction commits, so the TTL only has to
+    cover changes made by other processes, bulk statements and rows ageing
+    out of the 30 day window.
+    """
+
+    def __init__(self, app):
+        self.ttl = app.config['STATS_CACHE_TTL']
+        self.incremental = app.config['STATS_INCREMENTAL']
+        self._stats = None
+        self._computed_at = 0
+        self._lock = Lock()
+
+    def get(self):
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._computed_at < self.ttl:
+                return copy.deepcopy(self._stats)
+
+        stats = compute_stats()
+        with self._lock:
+            self._stats = stats
+            self._computed_at = time.monotonic()
+        return copy.deepcopy(stats)
+
+    def invalidate(self):
+        with self._lock:
+            self._stats = None
+
+    def apply(self, changes):
+        """Apply committed (model, delta, role, recent) changes to the cached stats"""
+        with self._lock:
+            if self._stats is None:
+                return
+            totals = self._stats['total_stats']
+            recent = self._stats['last_30_days']
+            roles = self._stats['role_distribution']
+            for model, delta, role, is_recent in changes:
+                if model is User:
+                    totals['users'] += delta
+                    roles[role] = roles.get(role, 0) + delta
+                    if is_recent:
+                        recent['new_users'] += delta
+                elif model is Patient:
+                    totals['patients'] += delta
+                elif model is MedicalDocument:
+                    totals['documents'] += delta
+                    if is_recent:
+                        recent['new_documents'] += delta
+
+def get_admin_stats():
+    """Get the admin dashboard stats of the current app"""
+    return current_app.extensions['stats'].get()
+
+def stats_change(instance, delta):
+    since = datetime.utcnow() - timedelta(days=RECENT_DAYS)
+    if isinstance(instance, User):
+        return User, delta, instance.role, instance.created_at is None or instance.created_at >= since
+    if isinstance(instance, MedicalDocument):
+        return MedicalDocument, delta, None, instance.uploaded_at is None or instance.uploaded_at >= since
+    return Patient, delta, None, False
+
+def incremental_stats():
+    if not has_app_context():
+        return None
+    stats = current_app.extensions.get('stats')
+    return stats if stats is not None and stats.incremental else None
+
+@event.listens_for(Session, 'after_flush')
+def collect_stats_changes(session, flush_context):
+    if incremental_stats() is None:
+        return
+    tracked = (User, Patient, MedicalDocument)
+    changes = session.info.setdefault('stats_changes', [])
+    changes.extend(stats_change(instance, 1) for instance in session.new if isinstance(instance, tracked))
+    changes.extend(stats_change(instance, -1) for instance in session.deleted if isinstance(instance, tracked))
+
+@event.listens_for(Session, 'after_commit')
+def apply_stats_changes(session):
+    changes = session.info.pop('stats_changes', None)
+    stats = incremental_stats()
+    if changes and stats is not None:
+        stats.apply(changes)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_stats_changes(session):
+    session.info.pop('stats_changes', None)
+
+def as_date(value):
+    # SQLite returns DATE() as a string
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def count_per_day(column, start, end):
+    """Count rows per day of `column` between the `start` and `end` days, inclusive"""
+    day = func.date(column)
+    rows = db.session.query(day, func.count()).filter(
+        column >= datetime.combine(start, datetime.min.time()),
+        column < datetime.combine(end + timedelta(days=1), datetime.min.time())
+    ).group_by(day).all()
+    return {as_date(value): count for value, count in rows}
+
+def rollup_daily_stats(start, end):
+    """Recompute the `daily_stats` rows from `start` to `end`, inclusive.
+
+    Each run replaces the rows of its range, so it can be repeated safely and
+    the current day is simply refreshed until it is over.
+    """
+    new_users = count_per_day(User.created_at, start, end)
+    new_documents = count_per_day(MedicalDocument.uploaded_at, start, end)
+
+    day = start
+    while day <= end:
+        db.session.merge(DailyStat(
+            day=day,
+            new_users=new_users.get(day, 0),
+            new_documents=new_documents.get(day, 0)
+        ))
+        day += timedelta(days=1)
+    db.session.commit()
+    return (end - start).days + 1
+
+@celery.task
+def rollup_recent_daily_stats(days=2):
+    """Refresh the rollups of the last `days` days, scheduled by Celery beat"""
+    today = datetime.utcnow().date()
+    return rollup_daily_stats(today - timedelta(days=days - 1), today)
+
+def get_timeseries(start, end, interval='day'):
+    """Read new users and documents per day or week from the rollups only.
+
+    Weeks start on Monday, and days without a rollup row count as zero.
+    """
+    rows = {
+        row.day: row
+        for row in DailyStat.query.filter(DailyStat.day >= start, DailyStat.day <= end)
+    }
+
+    buckets = {}
+    day = start
+    while day <= end:
+        bucket = day - timedelta(days=day.weekday()) if interval == 'week' else day
+        totals = buckets.setdefault(bucket, {"date": bucket.isoformat(), "new_users": 0, "new_documents": 0})
+        if day in rows:
+            totals["new_users"] += rows[day].new_users
+            totals["new_documents"] += rows[day].new_documents
+        day += timedelta(days=1)
+    return list(buckets.values())
@@ -0,0 +1,61 @@
+from typing import Optional
+import asyncio
+import logging
+from backend.app.utils.chunking import CHARS_PER_TOKEN, estimate_tokens, split_into_chunks
+
+CHUNK_NOTES_PROMPT = (
+    "You are condensing one excerpt of a patient's medical records. "
+    "Rewrite it as concise notes, keeping every diagnosis, medication, dosage, "
+    "test result, value and date. Do not add anything that is not in the excerpt."
+)
+
+class ChunkedSummarizer:
+    """Map-reduce summarization for texts larger than the model context.
+
+    Text over the budget is split into chunks of `chunk_tokens`, each chunk
+    is condensed into notes concurrently (at most `max_concurrency` requests
+    in flight), and the joined notes are condensed again until they fit.
+    """
+
+    def __init__(self, client, model: str, chunk_tokens: int, notes_tokens: int, max_concurrency: int):
+        self.client = client
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.notes_tokens = notes_tokens
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(self, system_prompt: str, content: str, max_tokens: int, **kwargs) -> str:
+        async with self.semaphore:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": content}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.3,
+                **kwargs
+            )
+        return response.choices[0].message.content.strip()
+
+    async def condense(self, text: str, max_tokens: Optional[int] = None) -> str:
+        """Reduce text until it fits in `max_tokens` (defaults to one chunk)"""
+        max_tokens = max_tokens or self.chunk_tokens
+        while estimate_tokens(text) > max_tokens:
+            chunks = split_into_chunks(text, self.chunk_tokens)
+            notes = await asyncio.gather(*[
+                self.complete(CHUNK_NOTES_PROMPT, chunk, self.notes_tokens)
+                for chunk in chunks
+            ])
+            condensed = "\n\n".join(notes)
+
+            # Stop if the model is not shrinking the text any further
+            if estimate_tokens(condensed) >= estimate_tokens(text):
+                logging.warning("Chunk notes did not shrink the text, truncating to fit the budget")
+                return text[:max_tokens * CHARS_PER_TOKEN]
+            text = condensed
+        return text
+
+    async def summarize(self, text: str, system_prompt: str, max_tokens: int) -> str:
+        """Summarize a text of any length with a single final prompt"""
+        return await self.complete(system_prompt, await self.condense(text), max_tokens)
@@ -1,9 +1,19 @@
 from backend.app import celery, db
-from backend.app.models import MedicalDocument
-from backend.app.utils.storage import get_file_from_s3
-from openai import OpenAI
+from backend.app.models import MedicalDocument, DocumentText
+from backend.app.utils.storage import get_storage
+from backend.app.services.ai_client import create_ai_client
+from backend.app.services.summarizer import ChunkedSummarizer
 from flask import current_app
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError, wait
+from contextlib import closing
+from threading import Lock
+import asyncio
+import atexit
+import hashlib
 import logging
+import multiprocessing
+import time
+import uuid
 from pypdf import PdfReader
 import io
 
@@ -17,14 +27,17 @@ def generate_document_summary(document_id):
             logging.error(f"Document {document_id} not found")
             return
         
-        # Get file from S3
-        file_obj = get_file_from_s3(document.file_path)
-        
-        # Extract text based on file type
-        text = extract_text(file_obj, document.file_path)
-        
-        # Generate summary using OpenAI
-        summary = generate_summary_with_openai(text)
+        # Documents with the same content share their summary
+        summary = get_known_summaries([document]).get(document.content_hash)
+        if summary is None:
+            # Get stored text or extract it from the file
+            text = get_documents_text([document])[0]
+            if text is None:
+                logging.error(f"Could not extract text from document {document_id}")
+                return False
+            
+            # Generate summary using OpenAI
+            summary = generate_summary_with_openai(text)
         
         # Update document with summary
         document.summary = summary
@@ -35,47 +48,295 @@ def generate_document_summary(document_id):
         logging.error(f"Error generating summary for document {document_id}: {e}")
         return False
 
+@celery.task(bind=True)
+def generate_document_summaries(self, document_ids):
+    """Summarize many documents with one AI client and a single commit.
+
+    Texts are fetched and extracted in parallel, summaries are requested
+    concurrently, and progress is reported through the task state as
+    `PROGRESS` with `done`/`total` counts. Each distinct content is only
+    summarized once, and content summarized before is not sent to the AI
+    at all.
+    """
+    documents = MedicalDocument.query.filter(
+        MedicalDocument.id.in_([uuid.UUID(str(document_id)) for document_id in document_ids])
+    ).all()
+    total = len(documents)
+    failed = {
+        str(document_id): "Document not found"
+        for document_id in set(map(str, document_ids)) - {str(doc.id) for doc in documents}
+    }
+
+    known = get_known_summaries(documents)
+    pending = []
+    seen = set(known)
+    for document in documents:
+        if document.content_hash is None or document.content_hash not in seen:
+            pending.append(document)
+            seen.add(document.content_hash)
+
+    done = total - len(pending)
+    report_progress(self, done=done, total=total)
+    texts = get_documents_text(pending)
+    summarizer = create_summarizer()
+
+    async def summarize(document, text):
+        nonlocal done
+        if text is None:
+            raise ValueError("Could not extract text")
+        try:
+            return await summarizer.summarize(text, SUMMARY_PROMPT, max_tokens=500)
+        finally:
+            done += 1
+            report_progress(self, done=done, total=total)
+
+    async def summarize_all():
+        return await asyncio.gather(
+            *[summarize(doc, text) for doc, text in zip(pending, texts)],
+            return_exceptions=True
+        )
+
+    errors = {}
+    for document, summary in zip(pending, asyncio.run(summarize_all()) if pending else []):
+        if isinstance(summary, Exception):
+            logging.error(f"Error generating summary for document {document.id}: {summary}")
+            errors[document.id] = str(summary)
+            if document.content_hash is not None:
+                errors[document.content_hash] = str(summary)
+        else:
+            document.summary = summary
+            if document.content_hash is not None:
+                known[document.content_hash] = summary
+
+    summarized = []
+    for document in documents:
+        if document.id in errors:
+            failed[str(document.id)] = errors[document.id]
+        elif document.content_hash in known:
+            document.summary = known[document.content_hash]
+            summarized.append(str(document.id))
+        elif document.content_hash in errors:
+            failed[str(document.id)] = errors[document.content_hash]
+        else:
+            summarized.append(str(document.id))
+    db.session.commit()
+
+    return {
+        "total": len(document_ids),
+        "summarized": summarized,
+        "failed": failed
+    }
+
+def report_progress(task, **meta):
+    """Publish task progress, skipped when the task runs eagerly"""
+    if task.request.id and not task.request.is_eager:
+        task.update_state(state='PROGRESS', meta=meta)
+
 def extract_text(file_obj, file_path):
     """Extract text from various file types"""
+    return extract_text_from_bytes(file_obj.read(), file_path)
+
+def extract_text_from_bytes(data, file_path):
+    """Extract text from the raw bytes of a file"""
     if file_path.lower().endswith('.pdf'):
-        return extract_text_from_pdf(file_obj)
+        return extract_text_from_pdf(io.BytesIO(data))
     else:
         # For now, assume it's a text file
-        return file_obj.read().decode('utf-8')
+        return data.decode('utf-8')
 
 def extract_text_from_pdf(file_obj):
     """Extract text from PDF file"""
     try:
         pdf_reader = PdfReader(io.BytesIO(file_obj.read()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        # Form feeds mark page breaks so chunking can split on them
+        return "\f".join(page.extract_text() + "\n" for page in pdf_reader.pages)
     except Exception as e:
         logging.error(f"Error extracting text from PDF: {e}")
         raise
 
-def generate_summary_with_openai(text):
-    """Generate summary using OpenAI's GPT model"""
+_extract_pool = None
+_extract_pool_lock = Lock()
+
+def get_extract_pool():
+    """Get the shared process pool used for CPU-bound PDF parsing.
+
+    Returns None when DOCUMENT_EXTRACT_PROCESSES is 0, in which case text is
+    extracted on the fetching thread.
+    """
+    global _extract_pool
+    processes = current_app.config['DOCUMENT_EXTRACT_PROCESSES']
+    if not processes:
+        return None
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            # Spawn rather than fork, the web worker is multi-threaded
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(_extract_pool.shutdown, wait=False, cancel_futures=True)
+        return _extract_pool
+
+def recycle_extract_pool(pool):
+    """Replace a process pool with a stuck worker, terminating its processes.
+
+    A parse that has started cannot be cancelled, so without this a hung
+    pypdf call would hold one of the shared pool's workers forever. Requests
+    still using the old pool see their pending extractions fail.
+    """
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is pool:
+            _extract_pool = None
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+def _fetch_and_extract(storage, file_path, extract_pool, deadline):
+    with closing(storage.open(file_path)) as file_obj:
+        data = file_obj.read()
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    if extract_pool is None:
+        return extract_text_from_bytes(data, file_path), content_hash
+
+    future = extract_pool.submit(extract_text_from_bytes, data, file_path)
     try:
-        client = OpenAI(api_key=current_app.config['AI_API_KEY'])
-        
-        # Truncate text if too long (adjust max_tokens based on your needs)
-        max_chars = 3000
-        if len(text) > max_chars:
-            text = text[:max_chars] + "..."
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a medical document summarizer. Create a concise, professional summary of the following medical document."},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=500,
-            temperature=0.3
+        text = future.result(timeout=max(deadline - time.monotonic(), 0))
+    except TimeoutError:
+        if not future.cancel():
+            recycle_extract_pool(extract_pool)
+        raise
+    return text, content_hash
+
+def extract_documents_text(documents):
+    """Fetch and extract the text of many documents concurrently.
+
+    Downloads run on a bounded thread pool (DOCUMENT_FETCH_WORKERS) and PDF
+    parsing on a process pool (DOCUMENT_EXTRACT_PROCESSES). Fetching and
+    extracting all of them gets DOCUMENT_PROCESSING_TIMEOUT seconds; what is
+    not done by then is given up on. Threads cannot be stopped, so with
+    DOCUMENT_EXTRACT_PROCESSES=0 a late document finishes in the background
+    and is ignored, while a stuck extraction process is cancelled or its
+    pool recycled.
+
+    Returns `(text, content_hash)` pairs in the same order as `documents`,
+    with None for documents that failed or timed out.
+    """
+    if not documents:
+        return []
+
+    storage = get_storage()
+    extract_pool = get_extract_pool()
+    timeout = current_app.config['DOCUMENT_PROCESSING_TIMEOUT']
+    deadline = time.monotonic() + timeout
+    workers = min(current_app.config['DOCUMENT_FETCH_WORKERS'], len(documents))
+
+    fetch_pool = ThreadPoolExecutor(max_workers=workers)
+    futures = [
+        fetch_pool.submit(_fetch_and_extract, storage, doc.file_path, extract_pool, deadline)
+        for doc in documents
+    ]
+    done, _ = wait(futures, timeout=timeout)
+    fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for doc, future in zip(documents, futures):
+        if future not in done:
+            logging.error(f"Timed out extracting text from document {doc.id}")
+            results.append(None)
+            continue
+        try:
+            results.append(future.result())
+        except TimeoutError:
+            logging.error(f"Timed out extracting text from document {doc.id}")
+            results.append(None)
+        except Exception as e:
+            logging.error(f"Error reading document {doc.id}: {str(e)}")
+            results.append(None)
+    return results
+
+def get_documents_text(documents):
+    """Get the text of documents, extracting it only once per document.
+
+    Text already stored in `document_texts` is reused without touching
+    storage, also when it was extracted for another document with the same
+    content. The rest is fetched and extracted concurrently, once per
+    distinct content, then saved together with the SHA-256 of the file it
+    came from.
+    """
+    stored = {
+        row.document_id: row.text
+        for row in DocumentText.query.filter(
+            DocumentText.document_id.in_([doc.id for doc in documents])
         )
-        
-        return response.choices[0].message.content.strip()
+    } if documents else {}
+
+    missing = [doc for doc in documents if doc.id not in stored]
+    content_hashes = {doc.content_hash for doc in missing if doc.content_hash}
+    known = {
+        row.content_hash: row.text
+        for row in DocumentText.query.filter(DocumentText.content_hash.in_(content_hashes))
+    } if content_hashes else {}
+
+    to_extract = []
+    seen = set(known)
+    for doc in missing:
+        if doc.content_hash is None or doc.content_hash not in seen:
+            to_extract.append(doc)
+            seen.add(doc.content_hash)
+
+    for doc, result in zip(to_extract, extract_documents_text(to_extract)):
+        if result is None:
+            continue
+        text, content_hash = result
+        db.session.add(DocumentText(document_id=doc.id, content_hash=content_hash, text=text))
+        stored[doc.id] = text
+        known[content_hash] = text
+
+    for doc in missing:
+        if doc.id not in stored and doc.content_hash in known:
+            text = known[doc.content_hash]
+            db.session.add(DocumentText(document_id=doc.id, content_hash=doc.content_hash, text=text))
+            stored[doc.id] = text
+
+    if missing:
+        db.session.commit()
+
+    return [stored.get(doc.id) for doc in documents]
+
+def get_known_summaries(documents):
+    """Summaries of documents with the same content as `documents`, by content hash"""
+    content_hashes = {doc.content_hash for doc in documents if doc.content_hash}
+    if not content_hashes:
+        return {}
+    rows = db.session.query(MedicalDocument.content_hash, MedicalDocument.summary).filter(
+        MedicalDocument.content_hash.in_(content_hashes),
+        MedicalDocument.summary.isnot(None)
+    ).all()
+    return {content_hash: summary for content_hash, summary in rows}
+
+SUMMARY_PROMPT = "You are a medical document summarizer. Create a concise, professional summary of the following medical document."
+
+def create_summarizer(client=None):
+    """Create a chunked summarizer configured from the app settings"""
+    return ChunkedSummarizer(
+        client or create_ai_client(),
+        model="gpt-4o-mini",
+        chunk_tokens=current_app.config['AI_CHUNK_TOKENS'],
+        notes_tokens=current_app.config['AI_CHUNK_NOTES_TOKENS'],
+        max_concurrency=current_app.config['AI_MAX_CONCURRENT_REQUESTS']
+    )
+
+def generate_summary_with_openai(text):
+    """Generate summary using OpenAI's GPT model.
+
+    Documents longer than AI_CHUNK_TOKENS are condensed chunk by chunk first,
+    so nothing past the start of the document is dropped.
+    """
+    try:
+        return asyncio.run(create_summarizer().summarize(text, SUMMARY_PROMPT, max_tokens=500))
     except Exception as e:
         logging.error(f"Error generating summary with OpenAI: {e}")
-        raise 
\ No newline at end of file
+        raise
@@ -0,0 +1,192 @@
+from flask import current_app
+from sqlalchemy.exc import DataError, IntegrityError
+from datetime import datetime
+from threading import Event, Lock, Thread
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+import uuid
+
+
+class AuditSink:
+    """Buffers audit log entries in-process and bulk inserts them in batches.
+
+    In 'async' mode `record` only enqueues the entry. A background thread
+    writes the queue out with one multi-row INSERT whenever AUDIT_LOG_BATCH_SIZE
+    entries are waiting or AUDIT_LOG_FLUSH_INTERVAL seconds have passed, and
+    whatever is left is flushed when the process exits. Batches that fail
+    because the database is unreachable are retried with backoff and then
+    put back on the queue. In 'sync' mode, and
+    for entries recorded with `sync=True`, the entry is committed before
+    `record` returns.
+
+    Entries are written on their own connection, never through the request's
+    session, so recording one does not commit unrelated pending changes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.mode = app.config['AUDIT_LOG_MODE']
+        self.batch_size = app.config['AUDIT_LOG_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_LOG_FLUSH_INTERVAL']
+        self.queue = queue.Queue(maxsize=app.config['AUDIT_LOG_QUEUE_SIZE'])
+        self.write_retries = app.config['AUDIT_LOG_WRITE_RETRIES']
+        self.retry_backoff = app.config['AUDIT_LOG_RETRY_BACKOFF']
+        self._stopped = Event()
+        self._lock = Lock()
+        self._thread = None
+        self._pid = None
+
+    def record(self, user_id, action, details=None, sync=False):
+        entry = {
+            'id': uuid.uuid4(),
+            'user_id': user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id)),
+            'action': action,
+            'timestamp': datetime.utcnow(),
+            'details': details
+        }
+
+        if sync or self.mode == 'sync':
+            self.write([entry])
+            return
+
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # Never drop audit entries, slow this request down instead
+            logging.warning("Audit log queue is full, writing entry synchronously")
+            self.write([entry])
+
+    def write(self, entries):
+        """Insert entries in a single statement and transaction"""
+        from backend.app import db
+        from backend.app.models import AuditLog
+
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(AuditLog.__table__.insert(), entries)
+
+    def flush(self):
+        """Write every queued entry, returns the number of entries written.
+
+        Entries that cannot be written are dead-lettered, see `_write_batch`.
+        As this runs when the process exits, batches are not requeued.
+        """
+        written = 0
+        while True:
+            entries = self._drain(self.batch_size)
+            if not entries:
+                return written
+            written += self._write_batch(entries, requeue=False)
+
+    def shutdown(self):
+        """Stop the background thread and flush what is still queued"""
+        self._stopped.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _drain(self, limit):
+        entries = []
+        while len(entries) < limit:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+
+    def _write_batch(self, entries, requeue=True):
+        """Write entries, splitting the batch in halves when data is rejected.
+
+        A bad entry, such as one whose user was deleted in the meantime,
+        then only costs its own row: it is logged with its payload as a dead
+        letter and the rest of the batch is written. Any other failure, such
+        as a dropped connection, is not the entries' fault: the batch is
+        retried with exponential backoff, and then requeued, or dead-lettered
+        when `requeue` is false or the queue is full. Returns the number of
+        entries written.
+        """
+        for attempt in range(self.write_retries + 1):
+            try:
+                self.write(entries)
+                return len(entries)
+            except (IntegrityError, DataError) as e:
+                if len(entries) == 1:
+                    self._dead_letter(entries[0], e)
+                    return 0
+                middle = len(entries) // 2
+                return self._write_batch(entries[:middle], requeue) + self._write_batch(entries[middle:], requeue)
+            except Exception as e:
+                error = e
+                logging.warning(f"Writing {len(entries)} audit log entries failed (attempt {attempt + 1}): {e}")
+                # Stop waiting when shutting down, the final flush tries again
+                if attempt == self.write_retries or self._stopped.wait(self.retry_backoff * 2 ** attempt):
+                    break
+
+        for entry in entries:
+            if not requeue:
+                self._dead_letter(entry, error)
+                continue
+            try:
+                self.queue.put_nowait(entry)
+            except queue.Full:
+                requeue = False
+                self._dead_letter(entry, error)
+        return 0
+
+    def _dead_letter(self, entry, error):
+        logging.error(f"Dropping audit log entry that could not be written ({error}): "
+                      f"{json.dumps(entry, default=str)}")
+
+    def _ensure_worker(self):
+        # Started lazily so forked server workers each get their own thread
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stopped.clear()
+            self._thread = Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                entries = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # Give the batch up to one interval to fill up
+            deadline = time.monotonic() + self.flush_interval
+            while len(entries) < self.batch_size and not self._stopped.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entries.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(entries)
+
+
+class Audit:
+    """Flask extension holding the app's audit log sink"""
+
+    def __init__(self, app=None):
+        self.sink = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.sink = AuditSink(app)
+        app.extensions['audit'] = self.sink
+
+
+def record_audit(user_id, action, details=None, sync=False):
+    """Record an audit log entry outside of the request's transaction"""
+    current_app.extensions['audit'].record(user_id, action, details, sync=sync)
@@ -0,0 +1,102 @@
+from flask import current_app
+from sqlalchemy import text
+from datetime import date
+import gzip
+import json
+import re
+import tempfile
+from backend.app import celery, db
+from backend.app.schemas import audit_log_schema
+from backend.app.utils.storage import upload_file
+
+PARTITION_NAME = re.compile(r'^audit_logs_(\d{4})_(\d{2})$')
+
+ARCHIVE_BATCH_SIZE = 1000
+
+def add_months(month, count):
+    """First day of the month `count` months after `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f"audit_logs_{month:%Y_%m}"
+
+def list_partitions():
+    """Return {first day of month: table name} for the attached monthly partitions"""
+    names = db.session.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'audit_logs'
+    """)).scalars()
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+def create_partitions(months_ahead):
+    """Create the missing partitions from this month to `months_ahead` months ahead"""
+    this_month = date.today().replace(day=1)
+    existing = list_partitions()
+    created = []
+
+    for offset in range(months_ahead + 1):
+        month = add_months(this_month, offset)
+        if month in existing:
+            continue
+        db.session.execute(text(
+            f"CREATE TABLE {partition_name(month)} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+        created.append(partition_name(month))
+
+    db.session.commit()
+    return created
+
+@celery.task
+def create_partitions_task(months_ahead=3):
+    """Scheduled by Celery beat, so entries never pile up in the default partition"""
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    return create_partitions(months_ahead)
+
+def archive_partition(name):
+    """Write a partition to a gzipped NDJSON file in storage, then drop it.
+
+    Rows are read from a server-side cursor and compressed into a temporary
+    file, so memory use does not depend on the size of the partition. The
+    partition is only detached and dropped once the upload has succeeded.
+    """
+    key = f"{current_app.config['AUDIT_LOG_ARCHIVE_PREFIX']}{name}.ndjson.gz"
+
+    with tempfile.TemporaryFile() as archive:
+        with gzip.GzipFile(fileobj=archive, mode='wb') as compressed:
+            rows = db.session.execute(
+                text(f"SELECT id, user_id, action, timestamp, details FROM {name} ORDER BY timestamp, id"),
+                execution_options={'stream_results': True, 'yield_per': ARCHIVE_BATCH_SIZE}
+            )
+            for row in rows:
+                compressed.write((json.dumps(audit_log_schema.dump(row)) + '\n').encode('utf-8'))
+        archive.seek(0)
+        upload_file(archive, key)
+
+    db.session.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+    db.session.execute(text(f"DROP TABLE {name}"))
+    db.session.commit()
+    return key
+
+def archive_partitions(retention_months):
+    """Archive every partition that ends more than `retention_months` months ago.
+
+    Returns a list of (partition name, storage key) pairs.
+    """
+    cutoff = add_months(date.today().replace(day=1), -retention_months)
+    return [
+        (name, archive_partition(name))
+        for month, name in sorted(list_partitions().items())
+        if month < cutoff
+    ]
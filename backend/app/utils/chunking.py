@@ -0,0 +1,45 @@
+# Rough average for English text with GPT tokenizers, good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Preferred split points, from pages down to single words
+SEPARATORS = ["\f", "\n\n", "\n", " "]
+
+def estimate_tokens(text):
+    """Estimate the number of model tokens in a text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def split_into_chunks(text, max_tokens):
+    """Split text into chunks of at most `max_tokens` estimated tokens.
+
+    Text is cut at page breaks first, then paragraphs, lines and words, and
+    neighbouring pieces are packed back together while they fit the budget.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return _pack(_split(text, max_chars, SEPARATORS), max_chars)
+
+def _split(text, max_chars, separators):
+    if len(text) <= max_chars:
+        return [text]
+    if not separators:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    pieces = []
+    for part in text.split(separators[0]):
+        pieces.extend(_split(part, max_chars, separators[1:]))
+    return pieces
+
+def _pack(pieces, max_chars):
+    chunks = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current}\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
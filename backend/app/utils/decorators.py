@@ -1,37 +1,48 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+from flask import current_app, g, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from backend.app import db
+from backend.app.constants import UsersRoles
 from backend.app.models import User
+import uuid
 
-def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'Admin':
-            return jsonify({"msg": "Admin access required"}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+def get_current_user_id():
+    """Id of the user the current token was issued to"""
+    return uuid.UUID(get_jwt_identity())
 
-def patient_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'Patient':
-            return jsonify({"msg": "Patient access required"}), 403
-        return f(*args, **kwargs)
-    return decorated_function
+def load_current_user():
+    """The current token's User, queried at most once per request"""
+    if 'current_user' not in g:
+        g.current_user = db.session.get(User, get_current_user_id())
+    return g.current_user
 
-def staff_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-        
-        if not user or user.role != 'Staff':
-            return jsonify({"msg": "Staff access required"}), 403
-        return f(*args, **kwargs)
-    return decorated_function 
\ No newline at end of file
+def get_current_role():
+    """Role of the current user, lowercased.
+
+    Read from the token's `role` claim when JWT_ROLE_CLAIMS is enabled, so
+    role checks cost no query. Tokens without the claim fall back to the
+    user's row. A changed role takes effect when the token is refreshed.
+    """
+    role = get_jwt().get('role') if current_app.config['JWT_ROLE_CLAIMS'] else None
+    if role is None:
+        user = load_current_user()
+        role = user.role if user else None
+    return role.lower() if role else None
+
+def token_claims(user):
+    """Additional claims to embed in the tokens issued to `user`"""
+    return {'role': user.role} if current_app.config['JWT_ROLE_CLAIMS'] else {}
+
+def role_required(role, message):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if get_current_role() != role:
+                return jsonify({"msg": message}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+admin_required = role_required(UsersRoles.ADMIN, "Admin access required")
+patient_required = role_required(UsersRoles.PATIENT, "Patient access required")
+staff_required = role_required(UsersRoles.STAFF, "Staff access required")
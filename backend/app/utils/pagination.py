@@ -0,0 +1,97 @@
+from flask import current_app, request
+from sqlalchemy import and_, or_
+from werkzeug.exceptions import BadRequest
+from datetime import datetime
+import base64
+import json
+import uuid
+
+
+def encode_cursor(sort_value, id):
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = json.dumps({'sort': sort_value.isoformat(), 'id': str(id)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by `encode_cursor` into (sort_value, id)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['sort']), uuid.UUID(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise BadRequest('Invalid cursor')
+
+def encode_offset_cursor(offset):
+    """Encode the position of the next page of ranked results as an opaque cursor"""
+    return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode('utf-8')).decode('ascii')
+
+def decode_offset_cursor(cursor):
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))['offset']
+    except (ValueError, KeyError, TypeError):
+        raise BadRequest('Invalid cursor')
+    if not isinstance(offset, int) or offset < 0:
+        raise BadRequest('Invalid cursor')
+    return offset
+
+def get_page_size():
+    """Read the `limit` query parameter, capped at MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', current_app.config['DEFAULT_PAGE_SIZE'], type=int)
+    if limit < 1:
+        raise BadRequest('limit must be a positive integer')
+    return min(limit, current_app.config['MAX_PAGE_SIZE'])
+
+def keyset_paginate(query, model, sort_column=None):
+    """Return one page of `query`, newest first, and the pagination headers.
+
+    Rows are ordered by (`sort_column`, id), `sort_column` defaulting to
+    `model.created_at`, so pages stay stable while rows are inserted, and the
+    next page is fetched with a WHERE on the last row's sort key instead of
+    an OFFSET the database would have to scan through. The total count costs
+    an extra COUNT query and is only computed when the client asks for it
+    with `include_total=true`.
+    """
+    if sort_column is None:
+        sort_column = model.created_at
+    limit = get_page_size()
+    headers = {}
+
+    if request.args.get('include_total', '').lower() == 'true':
+        headers['X-Total-Count'] = str(query.order_by(None).count())
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        sort_value, id = decode_cursor(cursor)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, model.id < id)
+        ))
+
+    rows = query.order_by(sort_column.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_cursor(getattr(rows[-1], sort_column.key), rows[-1].id)
+
+    return rows, headers
+
+def offset_paginate(query):
+    """Return one page of an already ordered `query`, and the pagination headers.
+
+    For orderings without a stable sort key to continue from, such as search
+    ranks, the cursor holds the offset of the next page. Headers are the same
+    as `keyset_paginate`'s.
+    """
+    limit = get_page_size()
+    headers = {}
+
+    if request.args.get('include_total', '').lower() == 'true':
+        headers['X-Total-Count'] = str(query.order_by(None).count())
+
+    cursor = request.args.get('cursor')
+    offset = decode_offset_cursor(cursor) if cursor else 0
+
+    rows = query.offset(offset).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_offset_cursor(offset + limit)
+
+    return rows, headers
@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app, has_app_context
+from threading import BoundedSemaphore
+import bcrypt
+
+DEFAULT_LOG_ROUNDS = 12
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when every hashing slot stays taken for PASSWORD_HASH_TIMEOUT seconds"""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded pool of PASSWORD_HASH_WORKERS threads.
+
+    bcrypt releases the GIL, so hashes run in parallel, but each one burns a
+    core for the configured cost. Capping the threads (and the number of
+    requests allowed to wait for one) keeps a login storm from taking every
+    core away from the other endpoints; requests beyond the cap fail fast
+    with `PasswordHasherBusy` instead of piling up, as do requests whose hash
+    is not done within PASSWORD_HASH_TIMEOUT seconds.
+
+    Bulk hashing for seeding and imports runs on a separate pool of
+    PASSWORD_HASH_BULK_WORKERS threads, so a large import takes at most
+    those cores and never makes logins wait for a slot or a thread.
+    """
+
+    def __init__(self, app):
+        self.log_rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.timeout = app.config['PASSWORD_HASH_TIMEOUT']
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config['PASSWORD_HASH_WORKERS'],
+            thread_name_prefix='password-hasher'
+        )
+        self.slots = BoundedSemaphore(app.config['PASSWORD_HASH_MAX_PENDING'])
+        self.bulk_executor = ThreadPoolExecutor(
+            max_workers=app.config['PASSWORD_HASH_BULK_WORKERS'],
+            thread_name_prefix='password-hasher-bulk'
+        )
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        # cancel() cannot stop a hash that already started, so the slot is
+        # only given back once the hash is done, even if we stop waiting
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy()
+
+    def hash(self, password):
+        return self._run(hash_password_now, password, self.log_rounds)
+
+    def check(self, password, password_hash):
+        return self._run(check_password_now, password, password_hash)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords in parallel, for seeding and imports"""
+        return list(self.bulk_executor.map(hash_password_now, passwords, [self.log_rounds] * len(passwords)))
+
+    def needs_rehash(self, password_hash):
+        """Whether a hash was made with a different cost than configured"""
+        return get_log_rounds(password_hash) != self.log_rounds
+
+
+def hash_password_now(password, log_rounds=DEFAULT_LOG_ROUNDS):
+    salt = bcrypt.gensalt(rounds=log_rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def check_password_now(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def get_log_rounds(password_hash):
+    # bcrypt hashes look like $2b$<rounds>$<salt and hash>
+    return int(password_hash.split('$')[2])
+
+def init_password_hasher(app):
+    app.extensions['password_hasher'] = PasswordHasher(app)
+
+def get_password_hasher():
+    """The app's hasher, or None outside of an app context"""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('password_hasher')
+
+def hash_password(password):
+    hasher = get_password_hasher()
+    return hasher.hash(password) if hasher else hash_password_now(password)
+
+def check_password(password, password_hash):
+    hasher = get_password_hasher()
+    return hasher.check(password, password_hash) if hasher else check_password_now(password, password_hash)
+
+def hash_passwords(passwords):
+    hasher = get_password_hasher()
+    if hasher is None:
+        return [hash_password_now(password) for password in passwords]
+    return hasher.hash_many(passwords)
+
+def needs_rehash(password_hash):
+    hasher = get_password_hasher()
+    return hasher is not None and hasher.needs_rehash(password_hash)
@@ -0,0 +1,43 @@
+from sqlalchemy import func, literal_column, or_, column, text
+from backend.app import db
+from backend.app.models import User
+
+SEARCH_COLUMNS = ('first_name', 'last_name', 'email')
+
+# Trigram indexes can only narrow down terms of at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+def escape_like(term):
+    """Escape LIKE wildcards so user input only matches literally"""
+    return term.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def ilike_filter(term):
+    pattern = f"%{escape_like(term)}%"
+    return or_(*(getattr(User, name).ilike(pattern, escape='!') for name in SEARCH_COLUMNS))
+
+def search_users(query, term):
+    """Users of `query` matching `term`, ordered best match first.
+
+    PostgreSQL answers the substring ILIKE from the pg_trgm GIN indexes on
+    the search columns and ranks matches by trigram similarity. SQLite looks
+    the term up in the `users_fts` FTS5 table and ranks by bm25. Terms too
+    short for trigrams, and other databases, fall back to a plain ILIKE.
+    Every ordering ends on the id, so the results can be paged with
+    `offset_paginate`.
+    """
+    term = term.strip()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        rank = func.greatest(*(func.similarity(getattr(User, name), term) for name in SEARCH_COLUMNS))
+        return query.filter(ilike_filter(term)).order_by(rank.desc(), User.id)
+
+    if dialect == 'sqlite' and len(term) >= MIN_TRIGRAM_LENGTH:
+        phrase = '"' + term.replace('"', '""') + '"'
+        matches = text(
+            "SELECT rowid, bm25(users_fts) AS rank FROM users_fts WHERE users_fts MATCH :phrase"
+        ).bindparams(phrase=phrase).columns(column('rowid'), column('rank')).subquery('matches')
+        return query.join(matches, literal_column('users.rowid') == matches.c.rowid) \
+            .order_by(matches.c.rank, User.id)
+
+    return query.filter(ilike_filter(term)).order_by(User.last_name, User.first_name, User.id)
@@ -1,23 +1,23 @@
+import abc
 import boto3
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
-from flask import current_app
+from flask import current_app, send_file, url_for
+from itsdangerous import URLSafeTimedSerializer, SignatureExpired
+from datetime import datetime, timedelta, timezone
 import logging
+import mmap
+import os
+import shutil
+from backend.app.utils.url_cache import PresignedUrlCache, RedisPresignedUrlCache
 
-def get_s3_client():
-    """Get configured S3 client"""
-    return boto3.client(
-        's3',
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY'],
-        region_name=current_app.config['AWS_REGION']
-    )
-
-def upload_file_to_s3(file_obj, filename):
-    """Upload a file to S3"""
-    s3_client = get_s3_client()
-    bucket_name = current_app.config['AWS_BUCKET_NAME']
-    
-    # Determine content type based on file extension
+# S3 rejects multipart parts smaller than 5MB (except the last one)
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+# DeleteObjects accepts at most 1000 keys per request
+MAX_DELETE_KEYS = 1000
+
+def get_content_type(filename):
+    """Determine content type based on file extension"""
     content_type = 'application/octet-stream'  # default binary
     if filename.lower().endswith('.pdf'):
         content_type = 'application/pdf'
@@ -25,78 +25,376 @@ def upload_file_to_s3(file_obj, filename):
         content_type = 'text/plain'
     elif filename.lower().endswith('.docx'):
         content_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    
-    try:
-        extra_args = {
-            'ContentType': content_type,
-            'ACL': 'private'
-        }
-        
-        # If file_obj has content_type, use that instead
-        if hasattr(file_obj, 'content_type'):
-            extra_args['ContentType'] = file_obj.content_type
-        
-        s3_client.upload_fileobj(
-            file_obj,
-            bucket_name,
-            filename,
-            ExtraArgs=extra_args
+    return content_type
+
+class StorageBackend(abc.ABC):
+    """Interface every document storage backend implements.
+
+    Files are addressed by the `file_path` stored on `MedicalDocument`, whose
+    scheme (`s3://bucket/key`, `local://key`) depends on the backend that
+    wrote it. Bare keys are accepted too. Every method but `delete_many` is
+    abstract, so a backend missing one fails when it is instantiated.
+    """
+
+    @abc.abstractmethod
+    def key(self, file_path):
+        """Extract the object key from a stored file path"""
+
+    @abc.abstractmethod
+    def upload(self, file_obj, filename, content_type=None):
+        """Store a file object and return its file path"""
+
+    @abc.abstractmethod
+    def upload_stream(self, chunks, filename, content_type=None):
+        """Store an iterable of byte chunks and return its file path"""
+
+    @abc.abstractmethod
+    def delete(self, file_path):
+        """Delete a stored file"""
+
+    def delete_many(self, file_paths):
+        """Delete several files, returns the file paths that could not be deleted"""
+        failed = []
+        for file_path in file_paths:
+            try:
+                self.delete(file_path)
+            except Exception:
+                failed.append(file_path)
+        return failed
+
+    @abc.abstractmethod
+    def open(self, file_path):
+        """Return a readable file object for a stored file"""
+
+    @abc.abstractmethod
+    def read_range(self, file_path, start, length):
+        """Return `length` bytes of a stored file starting at `start`"""
+
+    @abc.abstractmethod
+    def url(self, file_path, expiration=3600):
+        """Return a URL the client can download the file from"""
+
+class S3StorageBackend(StorageBackend):
+    """Stores documents in an S3 bucket.
+
+    boto3 clients are thread-safe, so a single client (and its HTTP connection
+    pool) is built in `create_app` and shared by every request and worker
+    thread instead of resolving credentials and endpoints on each call.
+    """
+
+    def __init__(self, app):
+        boto_config = BotoConfig(
+            max_pool_connections=app.config['S3_MAX_POOL_CONNECTIONS'],
+            tcp_keepalive=app.config['S3_TCP_KEEPALIVE'],
+            connect_timeout=app.config['S3_CONNECT_TIMEOUT'],
+            read_timeout=app.config['S3_READ_TIMEOUT'],
+            retries={
+                'max_attempts': app.config['S3_MAX_RETRIES'],
+                'mode': app.config['S3_RETRY_MODE']
+            }
         )
-        return f"s3://{bucket_name}/{filename}"
-    except ClientError as e:
-        logging.error(f"Error uploading file to S3: {e}")
-        raise
-
-def delete_file_from_s3(file_path):
-    """Delete a file from S3"""
-    s3_client = get_s3_client()
-    bucket_name = current_app.config['AWS_BUCKET_NAME']
-    
-    # Extract key from s3://bucket/key format
-    key = file_path.replace(f"s3://{bucket_name}/", "")
-    
-    try:
-        s3_client.delete_object(
-            Bucket=bucket_name,
-            Key=key
+        session = boto3.session.Session(
+            aws_access_key_id=app.config['AWS_ACCESS_KEY_ID'],
+            aws_secret_access_key=app.config['AWS_SECRET_ACCESS_KEY'],
+            region_name=app.config['AWS_REGION']
         )
-    except ClientError as e:
-        logging.error(f"Error deleting file from S3: {e}")
-        raise
-
-def get_file_from_s3(file_path):
-    """Get a file from S3"""
-    s3_client = get_s3_client()
-    bucket_name = current_app.config['AWS_BUCKET_NAME']
-    
-    # Extract key from s3://bucket/key format
-    key = file_path.replace(f"s3://{bucket_name}/", "")
-    
-    try:
-        response = s3_client.get_object(
-            Bucket=bucket_name,
-            Key=key
+        self.client = session.client('s3', config=boto_config)
+        self.bucket_name = app.config['AWS_BUCKET_NAME']
+        self.part_size = max(app.config['UPLOAD_PART_SIZE'], MIN_MULTIPART_PART_SIZE)
+
+        if app.config['PRESIGNED_URL_CACHE_REDIS_URL']:
+            import redis
+            self.url_cache = RedisPresignedUrlCache(
+                redis.Redis.from_url(app.config['PRESIGNED_URL_CACHE_REDIS_URL']),
+                min_remaining=app.config['PRESIGNED_URL_MIN_REMAINING']
+            )
+        else:
+            self.url_cache = PresignedUrlCache(
+                max_size=app.config['PRESIGNED_URL_CACHE_SIZE'],
+                min_remaining=app.config['PRESIGNED_URL_MIN_REMAINING']
+            )
+
+    def key(self, file_path):
+        # Extract key from s3://bucket/key format
+        return file_path.replace(f"s3://{self.bucket_name}/", "")
+
+    def upload(self, file_obj, filename, content_type=None):
+        try:
+            extra_args = {
+                'ContentType': content_type or get_content_type(filename),
+                'ACL': 'private'
+            }
+
+            # If file_obj has content_type, use that instead
+            if hasattr(file_obj, 'content_type'):
+                extra_args['ContentType'] = file_obj.content_type
+
+            self.client.upload_fileobj(
+                file_obj,
+                self.bucket_name,
+                filename,
+                ExtraArgs=extra_args
+            )
+            return f"s3://{self.bucket_name}/{filename}"
+        except ClientError as e:
+            logging.error(f"Error uploading file to S3: {e}")
+            raise
+
+    def upload_stream(self, chunks, filename, content_type=None):
+        """Upload chunks as an S3 multipart upload.
+
+        Only a single part is buffered at a time, so memory use per upload is
+        bounded by UPLOAD_PART_SIZE no matter how large the file is.
+        """
+        upload = self.client.create_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=filename,
+            ContentType=content_type or get_content_type(filename),
+            ACL='private'
         )
-        return response['Body']
-    except ClientError as e:
-        logging.error(f"Error getting file from S3: {e}")
-        raise
-
-def generate_presigned_url(file_path, expiration=3600):
-    """Generate a presigned URL for a file in S3"""
-    s3_client = get_s3_client()
-    bucket_name = current_app.config['AWS_BUCKET_NAME']
-
-    # Extract key from s3://bucket/key format
-    key = file_path.replace(f"s3://{bucket_name}/", "")
-
-    try:
-        response = s3_client.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': bucket_name, 'Key': key},
-            ExpiresIn=expiration
+        upload_id = upload['UploadId']
+        parts = []
+        buffer = bytearray()
+
+        def upload_part(body):
+            response = self.client.upload_part(
+                Bucket=self.bucket_name,
+                Key=filename,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=body
+            )
+            parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= self.part_size:
+                    upload_part(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]
+
+            if buffer or not parts:
+                upload_part(bytes(buffer))
+
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=filename,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return f"s3://{self.bucket_name}/{filename}"
+        except Exception as e:
+            logging.error(f"Error streaming file to S3: {e}")
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=filename,
+                UploadId=upload_id
+            )
+            raise
+
+    def delete(self, file_path):
+        key = self.key(file_path)
+        try:
+            self.client.delete_object(
+                Bucket=self.bucket_name,
+                Key=key
+            )
+            self.url_cache.invalidate(key)
+        except ClientError as e:
+            logging.error(f"Error deleting file from S3: {e}")
+            raise
+
+    def delete_many(self, file_paths):
+        """Delete files with one DeleteObjects request per 1000 keys"""
+        paths = {self.key(file_path): file_path for file_path in file_paths}
+        keys = list(paths)
+        failed = []
+        for start in range(0, len(keys), MAX_DELETE_KEYS):
+            batch = keys[start:start + MAX_DELETE_KEYS]
+            try:
+                response = self.client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            except ClientError as e:
+                logging.error(f"Error deleting {len(batch)} files from S3: {e}")
+                failed.extend(paths[key] for key in batch)
+                continue
+
+            # Quiet mode only reports the keys that failed
+            errors = {error['Key'] for error in response.get('Errors', [])}
+            for error in response.get('Errors', []):
+                logging.error(f"Error deleting {error['Key']} from S3: {error.get('Message')}")
+            failed.extend(paths[key] for key in batch if key in errors)
+            self.url_cache.invalidate_many([key for key in batch if key not in errors])
+        return failed
+
+    def open(self, file_path):
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=self.key(file_path)
+            )
+            return response['Body']
+        except ClientError as e:
+            logging.error(f"Error getting file from S3: {e}")
+            raise
+
+    def read_range(self, file_path, start, length):
+        try:
+            response = self.client.get_object(
+                Bucket=self.bucket_name,
+                Key=self.key(file_path),
+                Range=f"bytes={start}-{start + length - 1}"
+            )
+            return response['Body'].read()
+        except ClientError as e:
+            logging.error(f"Error getting file range from S3: {e}")
+            raise
+
+    def url(self, file_path, expiration=3600):
+        """Generate a presigned URL, re-using a cached one when possible"""
+        key = self.key(file_path)
+        cached_url = self.url_cache.get(key, expiration)
+        if cached_url is not None:
+            return cached_url
+
+        try:
+            response = self.client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self.bucket_name, 'Key': key},
+                ExpiresIn=expiration
+            )
+            self.url_cache.set(key, expiration, response)
+            return response
+        except ClientError as e:
+            logging.error(f"Error generating presigned URL: {e}")
+            raise
+
+class LocalStorageBackend(StorageBackend):
+    """Stores documents on the local filesystem under LOCAL_STORAGE_ROOT.
+
+    Download links point at the `documents.get_stored_file` route and carry a
+    signed, expiring token, mirroring S3 presigned URLs. That route answers
+    with `send_file`, so the WSGI server can use sendfile and serve range
+    requests straight from disk.
+    """
+
+    def __init__(self, app):
+        self.root = os.path.abspath(app.config['LOCAL_STORAGE_ROOT'])
+        self.chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+        self.serializer = URLSafeTimedSerializer(app.config['SECRET_KEY'], salt='local-storage')
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, file_path):
+        return file_path.replace("local://", "")
+
+    def path(self, file_path):
+        """Absolute path of a stored file, refusing keys that escape the root"""
+        path = os.path.abspath(os.path.join(self.root, self.key(file_path)))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Invalid storage key: {file_path}")
+        return path
+
+    def upload(self, file_obj, filename, content_type=None):
+        path = self.path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(file_obj, destination, self.chunk_size)
+        return f"local://{filename}"
+
+    def upload_stream(self, chunks, filename, content_type=None):
+        path = self.path(filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            with open(path, 'wb') as destination:
+                for chunk in chunks:
+                    destination.write(chunk)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return f"local://{filename}"
+
+    def delete(self, file_path):
+        try:
+            os.remove(self.path(file_path))
+        except FileNotFoundError:
+            logging.warning(f"File {file_path} already removed from local storage")
+
+    def open(self, file_path):
+        return open(self.path(file_path), 'rb')
+
+    def read_range(self, file_path, start, length):
+        with open(self.path(file_path), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start:start + length]
+
+    def url(self, file_path, expiration=3600):
+        token = self.serializer.dumps({'key': self.key(file_path), 'exp': expiration})
+        return url_for('documents.get_stored_file', token=token, _external=True)
+
+    def send(self, token):
+        """Serve a file for a signed download token, supporting range requests"""
+        payload, signed_at = self.serializer.loads(token, return_timestamp=True)
+        if datetime.now(timezone.utc) - signed_at > timedelta(seconds=payload['exp']):
+            raise SignatureExpired('Download link expired')
+
+        key = payload['key']
+        return send_file(
+            self.path(key),
+            mimetype=get_content_type(key),
+            conditional=True,
+            download_name=os.path.basename(key)
         )
-        return response
-    except ClientError as e:
-        logging.error(f"Error generating presigned URL: {e}")
-        raise
\ No newline at end of file
+
+class Storage:
+    """Flask extension holding the app's storage backend.
+
+    The backend is chosen by STORAGE_BACKEND ('s3' or 'local') and built once
+    in `create_app`.
+    """
+
+    backends = {
+        's3': S3StorageBackend,
+        'local': LocalStorageBackend
+    }
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = self.backends[app.config['STORAGE_BACKEND']](app)
+        app.extensions['storage'] = self
+
+def get_storage():
+    """Get the app's storage backend"""
+    return current_app.extensions['storage'].backend
+
+def upload_file(file_obj, filename):
+    """Upload a file to storage"""
+    return get_storage().upload(file_obj, filename)
+
+def stream_file(chunks, filename, content_type=None):
+    """Upload an iterable of byte chunks to storage"""
+    return get_storage().upload_stream(chunks, filename, content_type)
+
+def delete_file(file_path):
+    """Delete a file from storage"""
+    get_storage().delete(file_path)
+
+def delete_files(file_paths):
+    """Delete several files from storage, returns the ones that could not be deleted"""
+    return get_storage().delete_many(file_paths)
+
+def get_file(file_path):
+    """Get a file from storage"""
+    return get_storage().open(file_path)
+
+def generate_file_url(file_path, expiration=3600):
+    """Generate a temporary download URL for a file in storage"""
+    return get_storage().url(file_path, expiration)
@@ -0,0 +1,89 @@
+from werkzeug.exceptions import BadRequest
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+
+# Plain form fields (user_id, title, ...) are tiny, anything bigger is rejected
+MAX_FORM_FIELD_SIZE = 64 * 1024
+
+
+class StreamingUpload:
+    """A multipart request body parsed incrementally from the WSGI input stream.
+
+    Form fields that precede the file part are available in `fields` as soon
+    as the upload is opened. The file content itself is exposed through
+    `chunks()`, which yields the bytes as they arrive without ever holding
+    more than one read chunk in memory.
+    """
+
+    def __init__(self, stream, content_type_header, file_field='file', chunk_size=64 * 1024):
+        mimetype, options = parse_options_header(content_type_header)
+        boundary = options.get('boundary')
+        if mimetype != 'multipart/form-data' or not boundary:
+            raise BadRequest('Expected a multipart/form-data body')
+
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.file_field = file_field
+        self.fields = {}
+        self.filename = None
+        self.content_type = None
+        self._decoder = MultipartDecoder(boundary.encode(), max_form_memory_size=MAX_FORM_FIELD_SIZE)
+        self._events = self._iter_events()
+        self._open()
+
+    def _iter_events(self):
+        """Feed the decoder from the input stream and yield parsed events"""
+        while True:
+            try:
+                event = self._decoder.next_event()
+            except ValueError as e:
+                raise BadRequest(f'Malformed multipart body: {e}')
+            if isinstance(event, NeedData):
+                data = self.stream.read(self.chunk_size)
+                self._decoder.receive_data(data or None)
+                continue
+            if isinstance(event, Epilogue):
+                return
+            yield event
+
+    def _read_field(self, name):
+        value = bytearray()
+        for event in self._events:
+            value += event.data
+            if not event.more_data:
+                break
+        self.fields[name] = value.decode('utf-8')
+
+    def _skip_part(self):
+        for event in self._events:
+            if not event.more_data:
+                break
+
+    def _open(self):
+        """Consume the body up to the start of the file part"""
+        for event in self._events:
+            if isinstance(event, Field):
+                self._read_field(event.name)
+            elif isinstance(event, File):
+                if event.name == self.file_field:
+                    self.filename = event.filename
+                    self.content_type = event.headers.get('Content-Type')
+                    return
+                self._skip_part()
+        raise BadRequest('No file provided')
+
+    def chunks(self):
+        """Yield the file content, then parse any fields that follow it"""
+        for event in self._events:
+            if not isinstance(event, Data):
+                break
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                break
+
+        for event in self._events:
+            if isinstance(event, Field):
+                self._read_field(event.name)
+            elif isinstance(event, File):
+                self._skip_part()
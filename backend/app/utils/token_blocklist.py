@@ -0,0 +1,150 @@
+from flask import current_app
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+import hashlib
+import math
+import time
+from backend.app import celery, db
+from backend.app.models import TokenBlocklist
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    `might_contain` never returns False for an added item, and returns True
+    for an item that was not added with roughly `error_rate` probability
+    while fewer than `capacity` items have been added.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def might_contain(self, item):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+
+class TokenBlocklistStore:
+    """Answers "is this token revoked?" without a database query per request.
+
+    Revoked token ids live in `token_blocklist` and, for fast lookups, in
+    one of two places:
+
+    - 'memory': a per-process dict of jti -> expiry behind a Bloom filter, so
+      the usual case of a token that was never revoked costs a few hash
+      operations. Revocations made by other processes are picked up by
+      loading new `token_blocklist` rows every JWT_BLOCKLIST_SYNC_INTERVAL
+      seconds.
+    - 'redis': keys shared by every process that expire together with the
+      token, so revocations are visible everywhere immediately.
+
+    Entries are dropped once the token they revoke has expired, since an
+    expired token is rejected anyway.
+    """
+
+    def __init__(self, app):
+        self.backend = app.config['JWT_BLOCKLIST_BACKEND']
+        self.sync_interval = app.config['JWT_BLOCKLIST_SYNC_INTERVAL']
+        self.capacity = app.config['JWT_BLOCKLIST_BLOOM_CAPACITY']
+        self.prefix = 'revoked-token:'
+        self._lock = Lock()
+        self._reset()
+
+        self.redis = None
+        if self.backend == 'redis':
+            import redis
+            self.redis = redis.Redis.from_url(app.config['JWT_BLOCKLIST_REDIS_URL'])
+
+    def _reset(self):
+        self._revoked = {}
+        self._bloom = BloomFilter(self.capacity)
+        self._synced_at = None
+        self._next_sync = 0
+
+    def revoke(self, jti, expires_at):
+        """Record a revocation committed to `token_blocklist` by this process"""
+        if self.redis is not None:
+            ttl = int((expires_at - datetime.utcnow()).total_seconds())
+            if ttl > 0:
+                self.redis.setex(self.prefix + jti, ttl, 1)
+            return
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def is_revoked(self, jti):
+        if self.redis is not None:
+            return bool(self.redis.exists(self.prefix + jti))
+
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        if not self._bloom.might_contain(jti):
+            return False
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def sync(self):
+        """Load revocations recorded since the last sync and drop expired ones"""
+        now = datetime.utcnow()
+        query = TokenBlocklist.query.with_entities(TokenBlocklist.jti, TokenBlocklist.expires_at) \
+            .filter(TokenBlocklist.expires_at > now)
+        if self._synced_at is not None:
+            # Overlap a little so rows committed during the last sync are not missed
+            query = query.filter(TokenBlocklist.created_at >= self._synced_at - timedelta(seconds=60))
+        rows = query.all()
+
+        with self._lock:
+            expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+            if expired or len(self._revoked) + len(rows) > self.capacity:
+                for jti in expired:
+                    del self._revoked[jti]
+                self._rebuild_bloom()
+            for jti, expires_at in rows:
+                self._add(jti, expires_at)
+            self._synced_at = now
+            self._next_sync = time.monotonic() + self.sync_interval
+
+    def _add(self, jti, expires_at):
+        self._revoked[jti] = expires_at
+        self._bloom.add(jti)
+
+    def _rebuild_bloom(self):
+        # Bloom filters cannot forget items, so rebuild from the live entries
+        self._bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2))
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+
+def init_token_blocklist(app):
+    app.extensions['token_blocklist'] = TokenBlocklistStore(app)
+
+def get_token_blocklist():
+    return current_app.extensions['token_blocklist']
+
+def revoke_token(jwt_payload):
+    """Persist the revocation of a decoded token and publish it to the store"""
+    expires_at = datetime.fromtimestamp(jwt_payload['exp'], timezone.utc).replace(tzinfo=None)
+    db.session.add(TokenBlocklist(jti=jwt_payload['jti'], created_at=datetime.utcnow(), expires_at=expires_at))
+    db.session.commit()
+    get_token_blocklist().revoke(jwt_payload['jti'], expires_at)
+
+def purge_expired_tokens():
+    """Delete `token_blocklist` rows of tokens that have expired"""
+    deleted = TokenBlocklist.query.filter(TokenBlocklist.expires_at <= datetime.utcnow()) \
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+@celery.task
+def purge_expired_tokens_task():
+    """Scheduled by Celery beat"""
+    return purge_expired_tokens()
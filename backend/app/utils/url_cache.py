@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class PresignedUrlCache:
+    """In-process LRU cache of presigned URLs.
+
+    A cached URL is handed out again only while at least `min_remaining`
+    seconds of its lifetime are left, so clients always get a link that stays
+    valid long enough to be used.
+    """
+
+    def __init__(self, max_size=1024, min_remaining=300):
+        self.max_size = max_size
+        self.min_remaining = min_remaining
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, expiration):
+        with self._lock:
+            entry = self._entries.get((key, expiration))
+            if entry is not None:
+                url, expires_at = entry
+                if expires_at - time.time() >= self.min_remaining:
+                    self._entries.move_to_end((key, expiration))
+                    self.hits += 1
+                    return url
+                del self._entries[(key, expiration)]
+            self.misses += 1
+            return None
+
+    def set(self, key, expiration, url):
+        with self._lock:
+            self._entries[(key, expiration)] = (url, time.time() + expiration)
+            self._entries.move_to_end((key, expiration))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self.invalidate_many([key])
+
+    def invalidate_many(self, keys):
+        keys = set(keys)
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] in keys]:
+                del self._entries[cache_key]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries)
+        }
+
+
+class RedisPresignedUrlCache:
+    """Presigned URL cache shared between workers through Redis.
+
+    The URLs of an object are kept in one Redis hash per object key, one
+    field per expiration, so invalidating an object is a single DEL instead
+    of a scan over the keyspace. Each field stores when its URL expires and,
+    as in the in-process cache, a URL is handed out again only while at
+    least `min_remaining` seconds of it are left. The hash itself expires
+    with the last URL written to it. Hit/miss counters are kept per process.
+    """
+
+    def __init__(self, redis_client, min_remaining=300, prefix='presigned-urls:'):
+        self.redis = redis_client
+        self.min_remaining = min_remaining
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_key(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key, expiration):
+        entry = self.redis.hget(self._cache_key(key), expiration)
+        if entry is not None:
+            expires_at, url = entry.decode('utf-8').split(' ', 1)
+            if float(expires_at) - time.time() >= self.min_remaining:
+                self.hits += 1
+                return url
+        self.misses += 1
+        return None
+
+    def set(self, key, expiration, url):
+        ttl = expiration - self.min_remaining
+        if ttl > 0:
+            cache_key = self._cache_key(key)
+            pipeline = self.redis.pipeline()
+            pipeline.hset(cache_key, expiration, f"{time.time() + expiration} {url}")
+            pipeline.expire(cache_key, ttl)
+            pipeline.execute()
+
+    def invalidate(self, key):
+        self.invalidate_many([key])
+
+    def invalidate_many(self, keys):
+        cache_keys = [self._cache_key(key) for key in keys]
+        if cache_keys:
+            self.redis.delete(*cache_keys)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -0,0 +1,30 @@
+"""Celery entry point, run from the repository root:
+
+    celery -A backend.celery_worker.celery worker --loglevel=info
+    celery -A backend.celery_worker.celery beat --loglevel=info
+
+Creating the app hands its config to Celery, CELERYBEAT_SCHEDULE included,
+and every task runs inside an app context, so tasks use the database and
+the app's extensions the way requests do.
+"""
+from backend.app import celery, create_app
+
+app = create_app()
+
+
+class ContextTask(celery.Task):
+    def __call__(self, *args, **kwargs):
+        with app.app_context():
+            return super().__call__(*args, **kwargs)
+
+
+celery.Task = ContextTask
+
+# Register the tasks of every module the worker and beat schedule refer to
+import backend.app.services.stats  # noqa: E402,F401
+import backend.app.services.patient_deletion  # noqa: E402,F401
+import backend.app.services.document_store  # noqa: E402,F401
+import backend.app.services.patient_import  # noqa: E402,F401
+import backend.app.utils.token_blocklist  # noqa: E402,F401
+import backend.app.utils.ai  # noqa: E402,F401
+import backend.app.utils.audit_partitions  # noqa: E402,F401
@@ -24,19 +24,125 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(
         seconds=int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 604800))
     )
+    # Embed the user's role in access tokens so role checks need no query
+    JWT_ROLE_CLAIMS = os.environ.get('JWT_ROLE_CLAIMS', 'true').lower() == 'true'
+    # Revoked tokens are looked up in memory ('memory') or in Redis ('redis')
+    JWT_BLOCKLIST_BACKEND = os.environ.get('JWT_BLOCKLIST_BACKEND', 'memory')
+    JWT_BLOCKLIST_REDIS_URL = os.environ.get('JWT_BLOCKLIST_REDIS_URL', 'redis://localhost:6379/1')
+    # 'memory' loads revocations made by other processes at this interval
+    JWT_BLOCKLIST_SYNC_INTERVAL = int(os.environ.get('JWT_BLOCKLIST_SYNC_INTERVAL', 5))
+    JWT_BLOCKLIST_BLOOM_CAPACITY = int(os.environ.get('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000))
+
+    # Passwords: bcrypt cost, existing hashes are upgraded on the next login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Hashing runs on this many threads, requests waiting beyond
+    # PASSWORD_HASH_MAX_PENDING for PASSWORD_HASH_TIMEOUT seconds get a 503
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+    # Seeding and imports hash on their own threads so logins never queue behind them
+    PASSWORD_HASH_BULK_WORKERS = int(os.environ.get('PASSWORD_HASH_BULK_WORKERS', 1))
     
+    # Document storage: 's3' or 'local'
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 's3')
+    LOCAL_STORAGE_ROOT = os.environ.get('LOCAL_STORAGE_ROOT') or os.path.join(basedir, 'storage')
+
     # AWS S3
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
     AWS_BUCKET_NAME = os.environ.get('AWS_BUCKET_NAME')
     AWS_REGION = os.environ.get('AWS_REGION')
+    # Shared S3 client connection pool
+    S3_MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 50))
+    S3_TCP_KEEPALIVE = os.environ.get('S3_TCP_KEEPALIVE', 'true').lower() == 'true'
+    S3_CONNECT_TIMEOUT = int(os.environ.get('S3_CONNECT_TIMEOUT', 5))
+    S3_READ_TIMEOUT = int(os.environ.get('S3_READ_TIMEOUT', 60))
+    S3_MAX_RETRIES = int(os.environ.get('S3_MAX_RETRIES', 3))
+    S3_RETRY_MODE = os.environ.get('S3_RETRY_MODE', 'standard')
+    # Presigned URLs are re-used while at least PRESIGNED_URL_MIN_REMAINING seconds are left
+    PRESIGNED_URL_CACHE_SIZE = int(os.environ.get('PRESIGNED_URL_CACHE_SIZE', 1024))
+    PRESIGNED_URL_MIN_REMAINING = int(os.environ.get('PRESIGNED_URL_MIN_REMAINING', 900))
+    PRESIGNED_URL_CACHE_REDIS_URL = os.environ.get('PRESIGNED_URL_CACHE_REDIS_URL')
+    
+    # Celery
+    BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+    CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+    # Server-sent task events poll the result backend at this interval
+    TASK_EVENTS_POLL_INTERVAL = float(os.environ.get('TASK_EVENTS_POLL_INTERVAL', 1))
+    # Each open stream holds a worker, clients reconnect with Last-Event-ID after this
+    TASK_EVENTS_TIMEOUT = int(os.environ.get('TASK_EVENTS_TIMEOUT', 25))
+    # Periodic tasks, run with `celery -A backend.celery_worker.celery beat`
+    CELERYBEAT_SCHEDULE = {
+        'rollup-daily-stats': {
+            'task': 'backend.app.services.stats.rollup_recent_daily_stats',
+            'schedule': timedelta(minutes=int(os.environ.get('STATS_ROLLUP_INTERVAL_MINUTES', 15)))
+        },
+        'purge-expired-tokens': {
+            'task': 'backend.app.utils.token_blocklist.purge_expired_tokens_task',
+            'schedule': timedelta(hours=1)
+        },
+        # Files left behind when purging right after a delete failed
+        'purge-stored-files': {
+            'task': 'backend.app.services.document_store.purge_stored_files_task',
+            'schedule': timedelta(hours=1)
+        },
+        'create-audit-log-partitions': {
+            'task': 'backend.app.utils.audit_partitions.create_partitions_task',
+            'schedule': timedelta(days=1)
+        }
+    }
     
     # AI Service
     AI_API_KEY = os.environ.get('AI_API_KEY')
+    # 'openai', or 'fake' for an offline echo client
+    AI_CLIENT = os.environ.get('AI_CLIENT', 'openai')
+    # Texts over a budget are split into chunks and summarized map-reduce style
+    AI_CHUNK_TOKENS = int(os.environ.get('AI_CHUNK_TOKENS', 3000))
+    AI_CHUNK_NOTES_TOKENS = int(os.environ.get('AI_CHUNK_NOTES_TOKENS', 500))
+    AI_CONTEXT_TOKENS = int(os.environ.get('AI_CONTEXT_TOKENS', 60000))
+    AI_MAX_CONCURRENT_REQUESTS = int(os.environ.get('AI_MAX_CONCURRENT_REQUESTS', 5))
+    # Concurrency for fetching and extracting text before document analysis
+    DOCUMENT_FETCH_WORKERS = int(os.environ.get('DOCUMENT_FETCH_WORKERS', 8))
+    DOCUMENT_EXTRACT_PROCESSES = int(os.environ.get('DOCUMENT_EXTRACT_PROCESSES', 2))
+    DOCUMENT_PROCESSING_TIMEOUT = int(os.environ.get('DOCUMENT_PROCESSING_TIMEOUT', 60))
     
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.doc', '.docx']
+    # Stream uploads from the request body straight into an S3 multipart upload
+    UPLOAD_STREAMING = os.environ.get('UPLOAD_STREAMING', 'false').lower() == 'true'
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 64 * 1024))
+    UPLOAD_PART_SIZE = int(os.environ.get('UPLOAD_PART_SIZE', 8 * 1024 * 1024))
+    # Batch upload and delete endpoints
+    DOCUMENT_BATCH_MAX_FILES = int(os.environ.get('DOCUMENT_BATCH_MAX_FILES', 50))
+    DOCUMENT_UPLOAD_WORKERS = int(os.environ.get('DOCUMENT_UPLOAD_WORKERS', 8))
+    
+    # Audit log
+    # 'async' batches entries in a background thread, 'sync' commits each one before responding
+    AUDIT_LOG_MODE = os.environ.get('AUDIT_LOG_MODE', 'async')
+    AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 500))
+    AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2))
+    AUDIT_LOG_QUEUE_SIZE = int(os.environ.get('AUDIT_LOG_QUEUE_SIZE', 10000))
+    # Batches failing for reasons other than bad data, such as a lost connection
+    AUDIT_LOG_WRITE_RETRIES = int(os.environ.get('AUDIT_LOG_WRITE_RETRIES', 4))
+    AUDIT_LOG_RETRY_BACKOFF = float(os.environ.get('AUDIT_LOG_RETRY_BACKOFF', 0.5))
+    # audit_logs is partitioned by month, older partitions are archived to storage
+    AUDIT_LOG_HOT_DAYS = int(os.environ.get('AUDIT_LOG_HOT_DAYS', 30))
+    AUDIT_LOG_RETENTION_MONTHS = int(os.environ.get('AUDIT_LOG_RETENTION_MONTHS', 12))
+    AUDIT_LOG_ARCHIVE_PREFIX = os.environ.get('AUDIT_LOG_ARCHIVE_PREFIX', 'audit-log-archive/')
+    
+    # Admin stats
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 60))
+    # Apply this process's ORM inserts and deletes to the cached stats on commit
+    STATS_INCREMENTAL = os.environ.get('STATS_INCREMENTAL', 'true').lower() == 'true'
+    STATS_TIMESERIES_MAX_DAYS = int(os.environ.get('STATS_TIMESERIES_MAX_DAYS', 731))
+    
+    # Pagination
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+    
+    # Bulk patient import, rows inserted per transaction
+    PATIENT_IMPORT_CHUNK_SIZE = int(os.environ.get('PATIENT_IMPORT_CHUNK_SIZE', 500))
     
     # Security
     CORS_HEADERS = 'Content-Type'
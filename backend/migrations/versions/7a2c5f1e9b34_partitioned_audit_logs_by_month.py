@@ -0,0 +1,104 @@
+"""partitioned audit logs by month
+
+Revision ID: 7a2c5f1e9b34
+Revises: e1f86a3b5d90
+Create Date: 2025-04-11 11:42:26.730418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2c5f1e9b34'
+down_revision = 'e1f86a3b5d90'
+branch_labels = None
+depends_on = None
+
+INDEXES = """
+CREATE INDEX ix_audit_logs_timestamp_id ON audit_logs (timestamp, id);
+CREATE INDEX ix_audit_logs_user_id_timestamp ON audit_logs (user_id, timestamp);
+CREATE INDEX ix_audit_logs_action_trgm ON audit_logs USING gin (action gin_trgm_ops);
+"""
+
+DROP_INDEXES = """
+DROP INDEX ix_audit_logs_timestamp_id;
+DROP INDEX ix_audit_logs_user_id_timestamp;
+DROP INDEX ix_audit_logs_action_trgm;
+"""
+
+
+def upgrade():
+    # Partitioned tables need the partition key in the primary key, so the
+    # table is rebuilt as `PARTITION BY RANGE (timestamp)` and the rows copied
+    op.execute(DROP_INDEXES)
+    # The timestamp became part of the primary key, entries written while it
+    # was nullable are dated like the oldest entry so they need no partition
+    # of their own
+    op.execute("""
+        UPDATE audit_logs SET timestamp = (SELECT COALESCE(min(timestamp), now()) FROM audit_logs)
+        WHERE timestamp IS NULL
+    """)
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey')
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL,
+            user_id UUID NOT NULL REFERENCES users (id),
+            action VARCHAR(200) NOT NULL,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            details JSON,
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute('CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT')
+
+    # One partition per month from the oldest entry to three months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(timestamp) FROM audit_logs_unpartitioned), now())),
+                    date_trunc('month', now()) + interval '3 months',
+                    interval '1 month'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                    'audit_logs_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+                );
+            END LOOP;
+        END $$
+    """)
+
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, timestamp, details)
+        SELECT id, user_id, action, timestamp, details FROM audit_logs_unpartitioned
+    """)
+    op.execute('DROP TABLE audit_logs_unpartitioned')
+    op.execute(INDEXES)
+
+
+def downgrade():
+    op.execute(DROP_INDEXES)
+    op.execute('ALTER TABLE audit_logs RENAME TO audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    op.create_table('audit_logs',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('action', sa.String(length=200), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('details', postgresql.JSON(astext_type=sa.Text()), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, timestamp, details)
+        SELECT id, user_id, action, timestamp, details FROM audit_logs_partitioned
+    """)
+    op.execute('DROP TABLE audit_logs_partitioned CASCADE')
+    op.execute(INDEXES)
@@ -0,0 +1,31 @@
+"""made users created_at not null
+
+Revision ID: d5a8c3e1f742
+Revises: 4c8e2b6d9f17
+Create Date: 2025-04-22 09:47:12.118403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a8c3e1f742'
+down_revision = '4c8e2b6d9f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination skips rows without created_at, list them as the oldest
+    op.execute("UPDATE users SET created_at = '1970-01-01 00:00:00' WHERE created_at IS NULL")
+    op.alter_column('users', 'created_at',
+               existing_type=postgresql.TIMESTAMP(),
+               nullable=False)
+
+
+def downgrade():
+    op.alter_column('users', 'created_at',
+               existing_type=postgresql.TIMESTAMP(),
+               nullable=True)
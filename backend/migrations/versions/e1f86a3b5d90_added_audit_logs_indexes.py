@@ -0,0 +1,32 @@
+"""added audit logs indexes
+
+Revision ID: e1f86a3b5d90
+Revises: c47d2e9b8a61
+Create Date: 2025-04-09 16:33:07.914205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f86a3b5d90'
+down_revision = 'c47d2e9b8a61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm is installed by c47d2e9b8a61
+    op.create_index('ix_audit_logs_timestamp_id', 'audit_logs', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_audit_logs_user_id_timestamp', 'audit_logs', ['user_id', 'timestamp'], unique=False)
+    op.create_index(
+        'ix_audit_logs_action_trgm', 'audit_logs', ['action'], unique=False,
+        postgresql_using='gin', postgresql_ops={'action': 'gin_trgm_ops'}
+    )
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_action_trgm', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_user_id_timestamp', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_timestamp_id', table_name='audit_logs')
@@ -1,10 +1,17 @@
 import pytest
+import boto3
+from moto import mock_aws
 from backend.app import create_app, db
 from backend.app.models import User, Patient, MedicalDocument
+from backend.app.utils.storage import LocalStorageBackend
 from config import Config
 import os
 import tempfile
 import uuid
+from datetime import date
+from flask_jwt_extended import create_access_token
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from contextlib import contextmanager
 
 class TestConfig(Config):
     TESTING = True
@@ -13,7 +20,14 @@ class TestConfig(Config):
     JWT_SECRET_KEY = 'test-jwt-secret'
     UPLOAD_FOLDER = tempfile.mkdtemp()
     S3_BUCKET = 'test-bucket'
+    AWS_ACCESS_KEY_ID = 'testing'
+    AWS_SECRET_ACCESS_KEY = 'testing'
+    AWS_BUCKET_NAME = 'test-bucket'
+    AWS_REGION = 'us-east-1'
     AI_API_KEY = 'test-api-key'
+    DOCUMENT_EXTRACT_PROCESSES = 0
+    AUDIT_LOG_MODE = 'sync'
+    BCRYPT_LOG_ROUNDS = 4
 
 @pytest.fixture
 def app():
@@ -27,6 +41,15 @@ def app():
         db.session.remove()
         db.drop_all()
 
+@pytest.fixture
+def s3_bucket():
+    """Mock S3 with an empty test bucket"""
+    with mock_aws():
+        boto3.client('s3', region_name=TestConfig.AWS_REGION).create_bucket(
+            Bucket=TestConfig.AWS_BUCKET_NAME
+        )
+        yield TestConfig.AWS_BUCKET_NAME
+
 @pytest.fixture
 def client(app):
     """Create a test client"""
@@ -93,4 +116,90 @@ def test_document(app, test_patient):
         )
         db.session.add(document)
         db.session.commit()
-        return document 
\ No newline at end of file
+        return document 
+
+@pytest.fixture
+def local_storage(app, tmp_path):
+    """Switch the app to the local filesystem storage backend"""
+    app.config['LOCAL_STORAGE_ROOT'] = str(tmp_path)
+    app.extensions['storage'].backend = LocalStorageBackend(app)
+    return app.extensions['storage'].backend
+
+
+@pytest.fixture
+def patient_user(app):
+    """Create a patient user together with its patient profile"""
+    user = User(
+        email='patient@example.com',
+        password='patientpass123',
+        role='patient',
+        first_name='Test',
+        last_name='Patient',
+        phone=None,
+        status='Approved'
+    )
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(Patient(user_id=user.id, dob=date(1990, 1, 1)))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def staff_headers(app):
+    """Create authentication headers for a staff user"""
+    staff = User(
+        email='staff@example.com',
+        password='staffpass123',
+        role='staff',
+        first_name='Test',
+        last_name='Staff',
+        phone=None,
+        status='Approved'
+    )
+    db.session.add(staff)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(staff.id))}'}
+
+@pytest.fixture
+def admin_user(app):
+    """Create an admin user"""
+    admin = User(
+        email='admin-user@example.com',
+        password='adminpass123',
+        role='admin',
+        first_name='Test',
+        last_name='Admin',
+        phone=None,
+        status='Approved'
+    )
+    db.session.add(admin)
+    db.session.commit()
+    return admin
+
+@pytest.fixture
+def admin_user_headers(client, admin_user):
+    """Log the admin user in and return headers with its access token"""
+    response = client.post('/api/auth/login', json={
+        'email': 'admin-user@example.com',
+        'password': 'adminpass123'
+    })
+    return {'Authorization': f"Bearer {response.json['access_token']}"}
+
+@pytest.fixture
+def query_budget(app):
+    """Fail if the code in the returned context manager runs more than `budget` queries.
+
+    Counts what SQLALCHEMY_RECORD_QUERIES records in the test's app context,
+    which requests made with the test client share.
+    """
+    @contextmanager
+    def assert_max_queries(budget):
+        start = len(get_recorded_queries())
+        yield
+        queries = get_recorded_queries()[start:]
+        assert len(queries) <= budget, (
+            f"{len(queries)} queries exceed the budget of {budget}:\n" +
+            "\n".join(query.statement for query in queries)
+        )
+    return assert_max_queries
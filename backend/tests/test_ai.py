@@ -0,0 +1,136 @@
+import hashlib
+import io
+import os
+import time
+from types import SimpleNamespace
+from backend.app import db
+from backend.app.models import MedicalDocument, DocumentText
+from backend.app.utils import ai
+from backend.app.utils.ai import extract_documents_text, get_documents_text, generate_document_summaries
+from backend.app.utils.storage import upload_file
+
+SAMPLE_PDF = os.path.join(
+    os.path.dirname(__file__), '..', 'app', 'sample_data', 'medical_documents', 'blood_test_report.pdf'
+)
+
+def make_document(file_path):
+    return SimpleNamespace(id=file_path, file_path=file_path)
+
+def test_extract_documents_text_keeps_order(app, local_storage):
+    """Test that texts come back in document order with failures as None"""
+    with open(SAMPLE_PDF, 'rb') as f:
+        pdf_path = upload_file(f, 'report.pdf')
+    notes_path = upload_file(io.BytesIO(b'Follow-up in two weeks'), 'notes.txt')
+    documents = [make_document(pdf_path), make_document('local://missing.pdf'), make_document(notes_path)]
+
+    texts = extract_documents_text(documents)
+
+    assert len(texts) == 3
+    assert 'Blood' in texts[0][0]
+    assert texts[1] is None
+    assert texts[2] == ('Follow-up in two weeks', hashlib.sha256(b'Follow-up in two weeks').hexdigest())
+
+def test_extract_documents_text_runs_concurrently(app, local_storage, monkeypatch):
+    """Test that slow fetches overlap instead of running serially"""
+    app.config['DOCUMENT_FETCH_WORKERS'] = 4
+    documents = [make_document(upload_file(io.BytesIO(b'text'), f'{i}.txt')) for i in range(4)]
+    original_open = local_storage.open
+
+    def slow_open(file_path):
+        time.sleep(0.2)
+        return original_open(file_path)
+    monkeypatch.setattr(local_storage, 'open', slow_open)
+
+    started = time.monotonic()
+    texts = extract_documents_text(documents)
+
+    assert [text for text, content_hash in texts] == ['text'] * 4
+    assert time.monotonic() - started < 0.6
+
+def test_extract_documents_text_times_out(app, local_storage, monkeypatch):
+    """Test that a document exceeding its timeout is skipped"""
+    app.config['DOCUMENT_PROCESSING_TIMEOUT'] = 0
+    documents = [make_document(upload_file(io.BytesIO(b'text'), 'slow.txt'))]
+
+    class SlowPool:
+        def submit(self, fn, *args):
+            from concurrent.futures import Future
+            return Future()
+    monkeypatch.setattr(ai, 'get_extract_pool', lambda: SlowPool())
+
+    assert extract_documents_text(documents) == [None]
+
+def slow_extract(data, file_path):
+    """Stands in for a pypdf parse that hangs"""
+    time.sleep(30)
+
+def test_extract_documents_text_times_out_in_threads(app, local_storage, monkeypatch):
+    """Test that the timeout applies without extraction processes too"""
+    app.config['DOCUMENT_PROCESSING_TIMEOUT'] = 0.2
+    documents = [make_document(upload_file(io.BytesIO(b'text'), 'slow.txt'))]
+    monkeypatch.setattr(ai, 'extract_text_from_bytes', slow_extract)
+
+    started = time.monotonic()
+    assert extract_documents_text(documents) == [None]
+    assert time.monotonic() - started < 1
+
+def test_stuck_extraction_process_is_replaced(app, local_storage, monkeypatch):
+    """Test that a worker stuck past the timeout is terminated and its pool replaced"""
+    app.config.update(DOCUMENT_EXTRACT_PROCESSES=1, DOCUMENT_PROCESSING_TIMEOUT=5)
+    notes = make_document(upload_file(io.BytesIO(b'Follow-up in two weeks'), 'notes.txt'))
+    pool = ai.get_extract_pool()
+    try:
+        # Start the worker process before the clock runs
+        assert extract_documents_text([notes])[0][0] == 'Follow-up in two weeks'
+        processes = list(pool._processes.values())
+        app.config['DOCUMENT_PROCESSING_TIMEOUT'] = 0.5
+        monkeypatch.setattr(ai, 'extract_text_from_bytes', slow_extract)
+
+        assert extract_documents_text([notes]) == [None]
+
+        for process in processes:
+            process.join(timeout=5)
+            assert not process.is_alive()
+        assert ai._extract_pool is None
+    finally:
+        ai.recycle_extract_pool(ai._extract_pool or pool)
+
+def test_get_documents_text_extracts_once(app, local_storage, patient_user, monkeypatch):
+    """Test that extracted text is stored and reused without storage reads"""
+    document = MedicalDocument(
+        patient_id=patient_user.patient.id,
+        title='Notes',
+        file_path=upload_file(io.BytesIO(b'Blood pressure normal'), 'notes.txt')
+    )
+    db.session.add(document)
+    db.session.commit()
+
+    assert get_documents_text([document]) == ['Blood pressure normal']
+    assert DocumentText.query.get(document.id).content_hash == hashlib.sha256(b'Blood pressure normal').hexdigest()
+
+    def fail_open(file_path):
+        raise AssertionError('storage should not be read again')
+    monkeypatch.setattr(local_storage, 'open', fail_open)
+
+    assert get_documents_text([document]) == ['Blood pressure normal']
+
+def test_generate_document_summaries_batch(app, local_storage, patient_user):
+    """Test that a batch task summarizes every document and reports failures"""
+    app.config['AI_CLIENT'] = 'fake'
+    documents = [
+        MedicalDocument(
+            patient_id=patient_user.patient.id,
+            title=f'Report {i}',
+            file_path=upload_file(io.BytesIO(f'Result {i}'.encode()), f'{i}.txt')
+        )
+        for i in range(3)
+    ]
+    documents.append(MedicalDocument(patient_id=patient_user.patient.id, title='Lost', file_path='local://lost.txt'))
+    db.session.add_all(documents)
+    db.session.commit()
+
+    result = generate_document_summaries.apply(args=[[str(doc.id) for doc in documents]]).get()
+
+    assert sorted(result['summarized']) == sorted(str(doc.id) for doc in documents[:3])
+    assert list(result['failed']) == [str(documents[3].id)]
+    assert [MedicalDocument.query.get(doc.id).summary for doc in documents] == ['Result 0', 'Result 1', 'Result 2', None]
@@ -0,0 +1,116 @@
+import logging
+import os
+import time
+import uuid
+import pytest
+from sqlalchemy.exc import OperationalError
+from backend.app.models import AuditLog
+from backend.app.utils.audit import AuditSink, record_audit
+
+def test_connection_errors_requeue_the_batch(app, patient_user, async_sink, monkeypatch):
+    """Test that a batch failing on a lost connection is retried, then requeued whole"""
+    async_sink.write_retries, async_sink.retry_backoff = 2, 0
+    for i in range(3):
+        record_audit(patient_user.id, f"entry {i}")
+    attempts = []
+    def unreachable(entries):
+        attempts.append(len(entries))
+        raise OperationalError('INSERT', {}, Exception('server closed the connection unexpectedly'))
+    monkeypatch.setattr(async_sink, 'write', unreachable)
+    errors = []
+    monkeypatch.setattr(logging, 'error', errors.append)
+
+    assert async_sink._write_batch(async_sink._drain(3)) == 0
+
+    assert attempts == [3, 3, 3]
+    assert errors == []
+    assert [entry['action'] for entry in async_sink.queue.queue] == ["entry 0", "entry 1", "entry 2"]
+
+    monkeypatch.undo()
+    assert async_sink.flush() == 3
+    assert AuditLog.query.count() == 3
+
+@pytest.fixture
+def async_sink(app):
+    """Async audit sink that only flushes when told to"""
+    app.config.update(AUDIT_LOG_MODE='async', AUDIT_LOG_BATCH_SIZE=3, AUDIT_LOG_FLUSH_INTERVAL=60)
+    sink = AuditSink(app)
+    sink._pid = os.getpid()  # pretend the writer thread is running
+    app.extensions['audit'] = sink
+    return sink
+
+def test_sync_mode_writes_immediately(app, patient_user):
+    """Test that entries are committed before record returns"""
+    record_audit(patient_user.id, "Retrieved user profile", {"user_id": str(patient_user.id)})
+
+    log = AuditLog.query.one()
+    assert log.action == "Retrieved user profile"
+    assert log.details == {"user_id": str(patient_user.id)}
+
+def test_async_entries_are_batched_until_flush(app, patient_user, async_sink):
+    """Test that queued entries are written in batches on flush"""
+    writes = []
+    write = async_sink.write
+    async_sink.write = lambda entries: writes.append(len(entries)) or write(entries)
+
+    for i in range(7):
+        record_audit(str(patient_user.id), f"action {i}")
+    assert AuditLog.query.count() == 0
+
+    assert async_sink.flush() == 7
+    assert writes == [3, 3, 1]
+    assert AuditLog.query.count() == 7
+
+def test_sync_entries_bypass_the_queue(app, patient_user, async_sink):
+    """Test per-entry synchronous durability in async mode"""
+    record_audit(patient_user.id, "queued")
+    record_audit(patient_user.id, "durable", sync=True)
+
+    assert [log.action for log in AuditLog.query.all()] == ["durable"]
+
+def test_full_queue_writes_synchronously(app, patient_user):
+    """Test that entries are never dropped when the queue is full"""
+    app.config.update(AUDIT_LOG_MODE='async', AUDIT_LOG_QUEUE_SIZE=1)
+    sink = AuditSink(app)
+    sink._pid = os.getpid()  # pretend the writer thread is running
+
+    sink.record(patient_user.id, "queued")
+    sink.record(patient_user.id, "overflow")
+
+    assert [log.action for log in AuditLog.query.all()] == ["overflow"]
+
+def test_background_thread_flushes_and_shutdown_drains(app, patient_user):
+    """Test the writer thread and the flush on shutdown"""
+    app.config.update(AUDIT_LOG_MODE='async', AUDIT_LOG_BATCH_SIZE=2, AUDIT_LOG_FLUSH_INTERVAL=0.05)
+    sink = AuditSink(app)
+
+    sink.record(patient_user.id, "first")
+    sink.record(patient_user.id, "second")
+    deadline = time.monotonic() + 5
+    while AuditLog.query.count() < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert AuditLog.query.count() == 2
+
+    sink.record(patient_user.id, "third")
+    sink.shutdown()
+    assert not sink._thread.is_alive()
+    assert sink.queue.empty()
+    assert AuditLog.query.count() == 3
+
+def test_failed_batch_only_loses_bad_entry(app, patient_user, async_sink, monkeypatch):
+    """Test that an entry failing the batch insert is dead-lettered alone"""
+    for i in range(2):
+        record_audit(patient_user.id, f"before {i}")
+    # An entry the database rejects, queued between valid ones
+    async_sink.queue.put_nowait({**async_sink.queue.queue[0], 'id': uuid.uuid4(), 'action': None})
+    record_audit(patient_user.id, "after")
+
+    errors = []
+    monkeypatch.setattr(logging, 'error', errors.append)
+
+    assert async_sink.flush() == 3
+
+    assert sorted(log.action for log in AuditLog.query.all()) == ["after", "before 0", "before 1"]
+    dead_letters = [error for error in errors if error.startswith('Dropping audit log entry')]
+    assert len(dead_letters) == 1
+    assert str(patient_user.id) in dead_letters[0] and '"action": null' in dead_letters[0]
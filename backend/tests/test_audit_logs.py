@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from werkzeug.exceptions import BadRequest
+from backend.app import db
+from backend.app.api.admin import filter_logs, export_logs_csv, export_logs_ndjson, LOG_EXPORT_COLUMNS
+from backend.app.models import AuditLog
+from backend.app.utils.pagination import keyset_paginate
+
+@pytest.fixture
+def logs(app, patient_user):
+    start = datetime(2025, 3, 1)
+    entries = [
+        AuditLog(
+            user_id=patient_user.id,
+            action='view_document' if i % 2 else 'upload_document',
+            timestamp=start + timedelta(hours=i // 2),
+            details={'n': i}
+        )
+        for i in range(9)
+    ]
+    db.session.add_all(entries)
+    db.session.commit()
+    return entries
+
+def test_search_pages_by_timestamp(app, logs):
+    """Test that keyset pages walk the logs newest first without gaps"""
+    seen = []
+    cursor = None
+    while True:
+        query_string = {'limit': 4, 'action': 'document'}
+        if cursor:
+            query_string['cursor'] = cursor
+        with app.test_request_context('/api/admin/logs/search', query_string=query_string):
+            page, headers = keyset_paginate(filter_logs(AuditLog.query), AuditLog, AuditLog.timestamp)
+        seen.extend(log.details['n'] for log in page)
+        cursor = headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    expected = sorted(logs, key=lambda log: (log.timestamp, log.id.hex), reverse=True)
+    assert seen == [log.details['n'] for log in expected]
+
+def test_filter_logs(app, logs, patient_user):
+    """Test user, action and date filters"""
+    query_string = {
+        'user_id': str(patient_user.id),
+        'action': 'view',
+        'start_date': '2025-03-01 01:00:00'
+    }
+    with app.test_request_context('/api/admin/logs/search', query_string=query_string):
+        matches = filter_logs(AuditLog.query).all()
+
+    assert sorted(log.details['n'] for log in matches) == [3, 5, 7]
+
+def test_filter_logs_escapes_wildcards(app, logs):
+    """Test that LIKE wildcards in the action filter match literally"""
+    with app.test_request_context('/api/admin/logs/search?action=view%25doc'):
+        assert filter_logs(AuditLog.query).all() == []
+
+def test_filter_logs_rejects_invalid_user_id(app):
+    """Test that a malformed user id is a bad request"""
+    with app.test_request_context('/api/admin/logs/search?user_id=nope'):
+        with pytest.raises(BadRequest):
+            filter_logs(AuditLog.query)
+
+def test_export_formats(app, logs):
+    """Test that exports serialize every row"""
+    rows = db.session.query(*(getattr(AuditLog, column) for column in LOG_EXPORT_COLUMNS)) \
+        .order_by(AuditLog.timestamp, AuditLog.id).all()
+
+    ndjson = [json.loads(line) for line in ''.join(export_logs_ndjson(rows)).splitlines()]
+    assert len(ndjson) == 9
+    assert set(ndjson[0]) == set(LOG_EXPORT_COLUMNS)
+
+    exported = list(csv.DictReader(io.StringIO(''.join(export_logs_csv(rows)))))
+    assert [json.loads(row['details']) for row in exported] == [entry['details'] for entry in ndjson]
+
+def test_export_endpoint(client, logs, admin_user_headers):
+    """Test streaming a filtered CSV export"""
+    response = client.get('/api/admin/logs/export?format=csv&action=view', headers=admin_user_headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert len(list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))) == 4
+    assert client.get('/api/admin/logs/export?format=xml', headers=admin_user_headers).status_code == 400
@@ -0,0 +1,17 @@
+from datetime import date
+from backend.app.utils.audit_partitions import add_months, partition_name
+
+def test_add_months():
+    """Test month arithmetic across year boundaries"""
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2025, 1, 1), -13) == date(2023, 12, 1)
+    assert partition_name(date(2025, 4, 1)) == 'audit_logs_2025_04'
+
+def test_audit_log_commands_require_postgresql(app):
+    """Test that partition commands refuse to run on other databases"""
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['audit-logs', 'archive'])
+
+    assert result.exit_code != 0
+    assert 'only partitioned on PostgreSQL' in result.output
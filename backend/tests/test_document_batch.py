@@ -0,0 +1,79 @@
+import io
+import os
+import uuid
+from datetime import date
+from flask_jwt_extended import create_access_token
+from backend.app import db
+from backend.app.models import User, Patient, MedicalDocument, AuditLog
+from backend.app.utils.storage import upload_file
+from backend.app.services.patient_deletion import delete_stored_files
+
+def make_document(patient, name):
+    document = MedicalDocument(patient_id=patient.id, title=name, file_path=upload_file(io.BytesIO(b'x'), name))
+    db.session.add(document)
+    db.session.commit()
+    return document
+
+def test_upload_documents(app, client, staff_headers, patient_user, local_storage):
+    """Test that valid files are stored and recorded, and the rest reported"""
+    response = client.post('/api/documents/upload/batch', data={
+        'user_id': str(patient_user.id),
+        'file': [
+            (io.BytesIO(b'first'), 'first.pdf'),
+            (io.BytesIO(b'notes'), 'notes.txt'),
+            (io.BytesIO(b'second'), 'second.docx')
+        ]
+    }, headers=staff_headers)
+
+    assert response.status_code == 207
+    assert response.json['created'] == 2
+    assert [result['status'] for result in response.json['results']] == ['created', 'error', 'created']
+
+    documents = MedicalDocument.query.order_by(MedicalDocument.title).all()
+    assert [document.title for document in documents] == ['first.pdf', 'second.docx']
+    with open(local_storage.path(documents[0].file_path), 'rb') as f:
+        assert f.read() == b'first'
+    assert AuditLog.query.filter_by(action='Uploaded medical document').count() == 2
+
+def test_upload_documents_unknown_patient(client, staff_headers, local_storage):
+    response = client.post('/api/documents/upload/batch', data={
+        'user_id': str(uuid.uuid4()),
+        'file': [(io.BytesIO(b'x'), 'a.pdf')]
+    }, headers=staff_headers)
+    assert response.status_code == 404
+
+def test_delete_documents(app, client, patient_user, local_storage, monkeypatch):
+    """Test that patients can only delete their own documents"""
+    queued = []
+    monkeypatch.setattr(delete_stored_files, 'delay', queued.append)
+    other = User(email='other@example.com', password='otherpass123', role='patient',
+                 first_name='Other', last_name='Patient', phone=None, status='Approved')
+    db.session.add(other)
+    db.session.flush()
+    db.session.add(Patient(user_id=other.id, dob=date(1990, 1, 1)))
+    db.session.commit()
+
+    own = make_document(Patient.query.filter_by(user_id=patient_user.id).one(), 'own.pdf')
+    foreign = make_document(Patient.query.filter_by(user_id=other.id).one(), 'foreign.pdf')
+    own_id, own_path, foreign_id = str(own.id), own.file_path, str(foreign.id)
+    missing_id = str(uuid.uuid4())
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(patient_user.id))}'}
+
+    response = client.post('/api/documents/batch-delete', json={
+        'document_ids': [own_id, foreign_id, missing_id, 'not-a-uuid']
+    }, headers=headers)
+
+    assert response.status_code == 207
+    assert response.json['deleted'] == 1
+    assert [result['status'] for result in response.json['results']] == ['deleted', 'error', 'not_found', 'not_found']
+    assert [str(document.id) for document in MedicalDocument.query.all()] == [foreign_id]
+    assert AuditLog.query.filter_by(action='Deleted medical document').count() == 1
+
+    # Files are deleted once the rows are gone
+    assert queued == [[own_path]]
+    assert delete_stored_files.apply(args=queued).get() == 1
+    assert not os.path.exists(local_storage.path(own_path))
+
+def test_delete_documents_requires_ids(client, staff_headers):
+    response = client.post('/api/documents/batch-delete', json={}, headers=staff_headers)
+    assert response.status_code == 400
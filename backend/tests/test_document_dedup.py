@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+import pytest
+from backend.app import db
+from backend.app.models import MedicalDocument, DocumentText, StoredFile
+from backend.app.utils import ai
+from backend.app.utils.ai import get_documents_text, generate_document_summaries
+from backend.app.services.document_store import store_stream, add_reference, purge_stored_files, purge_stored_files_task
+
+REPORT = b'%PDF-1.4 lab report'
+REPORT_HASH = hashlib.sha256(REPORT).hexdigest()
+
+@pytest.fixture
+def purges(monkeypatch):
+    """Content hashes handed to the purge task, run them with `purge_stored_files`"""
+    queued = []
+    monkeypatch.setattr(purge_stored_files_task, 'delay', queued.append)
+    return queued
+
+def upload(client, headers, user, content, name):
+    return client.post('/api/documents/upload', data={
+        'user_id': str(user.id),
+        'file': (io.BytesIO(content), name)
+    }, headers=headers)
+
+def test_duplicate_uploads_share_one_file(app, client, staff_headers, patient_user, local_storage, purges):
+    """Test that identical uploads are stored once and deleted with the last document"""
+    first = upload(client, staff_headers, patient_user, REPORT, 'report.pdf')
+    second = upload(client, staff_headers, patient_user, REPORT, 'fax.pdf')
+    assert first.status_code == second.status_code == 201
+
+    documents = MedicalDocument.query.all()
+    assert {document.content_hash for document in documents} == {REPORT_HASH}
+    file_path = documents[0].file_path
+    assert file_path == f'local://sha256/{REPORT_HASH[:2]}/{REPORT_HASH}.pdf'
+    assert documents[1].file_path == file_path
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 2
+
+    assert client.delete(f'/api/documents/{documents[0].id}', headers=staff_headers).status_code == 200
+    assert purges == []
+    assert os.path.exists(local_storage.path(file_path))
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 1
+
+    assert client.delete(f'/api/documents/{documents[1].id}', headers=staff_headers).status_code == 200
+    assert purges == [[REPORT_HASH]]
+    assert purge_stored_files(purges[0]) == 1
+    assert not os.path.exists(local_storage.path(file_path))
+    assert db.session.get(StoredFile, REPORT_HASH) is None
+
+def test_upload_racing_delete_keeps_file(app, client, staff_headers, patient_user, local_storage, purges):
+    """Test that a re-upload between a delete's commit and its purge keeps the file"""
+    assert upload(client, staff_headers, patient_user, REPORT, 'report.pdf').status_code == 201
+    document = MedicalDocument.query.one()
+    file_path = document.file_path
+
+    assert client.delete(f'/api/documents/{document.id}', headers=staff_headers).status_code == 200
+    assert purges == [[REPORT_HASH]]
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 0
+
+    # The same content comes in again before the delete gets to purge it
+    assert upload(client, staff_headers, patient_user, REPORT, 'again.pdf').status_code == 201
+    assert purge_stored_files(purges[0]) == 0
+
+    assert MedicalDocument.query.one().file_path == file_path
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 1
+    assert os.path.exists(local_storage.path(file_path))
+
+def test_upload_after_purge_stores_file_again(app, client, staff_headers, patient_user, local_storage, purges):
+    assert upload(client, staff_headers, patient_user, REPORT, 'report.pdf').status_code == 201
+    document = MedicalDocument.query.one()
+    file_path = document.file_path
+    assert client.delete(f'/api/documents/{document.id}', headers=staff_headers).status_code == 200
+    purge_stored_files(purges[0])
+    assert not os.path.exists(local_storage.path(file_path))
+
+    assert upload(client, staff_headers, patient_user, REPORT, 'again.pdf').status_code == 201
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 1
+    assert os.path.exists(local_storage.path(file_path))
+
+def test_batch_upload_stores_each_content_once(app, client, staff_headers, patient_user, local_storage, monkeypatch):
+    uploaded = []
+    upload_to_disk = local_storage.upload
+    monkeypatch.setattr(local_storage, 'upload', lambda file_obj, key: uploaded.append(key) or upload_to_disk(file_obj, key))
+
+    response = client.post('/api/documents/upload/batch', data={
+        'user_id': str(patient_user.id),
+        'file': [(io.BytesIO(REPORT), 'a.pdf'), (io.BytesIO(REPORT), 'b.pdf'), (io.BytesIO(b'other'), 'c.pdf')]
+    }, headers=staff_headers)
+
+    assert response.status_code == 201
+    assert len(uploaded) == 2
+    assert db.session.get(StoredFile, REPORT_HASH).ref_count == 2
+
+def test_streamed_duplicate_is_dropped(app, patient_user, local_storage):
+    """Test that a streamed upload of stored content keeps the stored file"""
+    file_path, content_hash, size = store_stream(iter([REPORT[:5], REPORT[5:]]), 'report.pdf')
+    add_reference(content_hash, file_path, size)
+    db.session.commit()
+
+    duplicate_path, duplicate_hash, _ = store_stream(iter([REPORT]), 'again.pdf')
+
+    assert (duplicate_path, duplicate_hash) == (file_path, REPORT_HASH)
+    assert sorted(os.listdir(local_storage.root)) == [os.path.basename(local_storage.path(file_path))]
+
+def make_duplicates(patient_user, count):
+    documents = [
+        MedicalDocument(
+            patient_id=patient_user.patient.id, title=f'Copy {i}',
+            file_path='local://shared.txt', content_hash=REPORT_HASH
+        )
+        for i in range(count)
+    ]
+    db.session.add_all(documents)
+    db.session.commit()
+    return documents
+
+def test_text_is_extracted_once_per_content(app, patient_user, monkeypatch):
+    """Test that duplicates reuse text extracted for another document"""
+    documents = make_duplicates(patient_user, 3)
+    db.session.add(DocumentText(document_id=documents[0].id, content_hash=REPORT_HASH, text='Lab report'))
+    db.session.commit()
+
+    def fail_extract(documents):
+        assert documents == []
+        return []
+    monkeypatch.setattr(ai, 'extract_documents_text', fail_extract)
+
+    assert get_documents_text(documents[1:]) == ['Lab report', 'Lab report']
+    assert DocumentText.query.count() == 3
+
+def test_summaries_are_reused_for_duplicates(app, patient_user, monkeypatch):
+    """Test that content summarized before is not sent to the AI again"""
+    app.config['AI_CLIENT'] = 'fake'
+    documents = make_duplicates(patient_user, 3)
+    documents[0].summary = 'Known summary'
+    db.session.commit()
+    monkeypatch.setattr(ai, 'get_documents_text', lambda documents: [None] * len(documents))
+
+    result = generate_document_summaries.apply(args=[[str(doc.id) for doc in documents[1:]]]).get()
+
+    assert result['failed'] == {}
+    assert [MedicalDocument.query.get(doc.id).summary for doc in documents] == ['Known summary'] * 3
@@ -0,0 +1,79 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+from backend.app import db
+from backend.app.models import MedicalDocument, PatientSummary
+from backend.app.services.medical_ai_service import MedicalAIService
+from backend.app.utils.storage import upload_file
+
+class RecordingCompletions:
+    """Stands in for the OpenAI chat completions API and records prompts"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def create(self, messages, **kwargs):
+        self.prompts.append(messages[-1]['content'])
+        content = json.dumps({"patient_overview": f"summary #{len(self.prompts)}"})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def make_service():
+    service = MedicalAIService()
+    completions = RecordingCompletions()
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service, completions
+
+def add_document(patient, title, content):
+    document = MedicalDocument(
+        patient_id=patient.id,
+        title=title,
+        file_path=upload_file(io.BytesIO(content.encode()), f'{title}.txt')
+    )
+    db.session.add(document)
+    db.session.commit()
+    return document
+
+def test_analyze_patient_only_sends_new_documents(app, local_storage, patient_user):
+    """Test that a second run feeds only new documents plus the prior summary"""
+    patient = patient_user.patient
+    first = add_document(patient, 'bloodwork', 'Hemoglobin 13.5')
+    service, completions = make_service()
+
+    result = asyncio.run(service.analyze_patient(patient.id, [first]))
+    assert result['success'] and result['processed_count'] == 1
+
+    second = add_document(patient, 'xray', 'Chest clear')
+    result = asyncio.run(service.analyze_patient(patient.id, [first, second]))
+
+    assert result['processed_count'] == 1
+    assert result['document_count'] == 2
+    assert 'Chest clear' in completions.prompts[1]
+    assert 'Hemoglobin' not in completions.prompts[1]
+    assert 'summary #1' in completions.prompts[1]
+    assert set(PatientSummary.query.get(patient.id).document_ids) == {str(first.id), str(second.id)}
+
+def test_analyze_patient_reuses_summary_without_new_documents(app, local_storage, patient_user):
+    """Test that an unchanged patient is rendered without calling the model"""
+    patient = patient_user.patient
+    document = add_document(patient, 'bloodwork', 'Hemoglobin 13.5')
+    service, completions = make_service()
+
+    asyncio.run(service.analyze_patient(patient.id, [document]))
+    result = asyncio.run(service.analyze_patient(patient.id, [document]))
+
+    assert result['success'] and result['processed_count'] == 0
+    assert result['pdf_data'].startswith(b'%PDF')
+    assert len(completions.prompts) == 1
+
+def test_analyze_patient_full_regeneration(app, local_storage, patient_user):
+    """Test that full=True sends every document again"""
+    patient = patient_user.patient
+    document = add_document(patient, 'bloodwork', 'Hemoglobin 13.5')
+    service, completions = make_service()
+
+    asyncio.run(service.analyze_patient(patient.id, [document]))
+    result = asyncio.run(service.analyze_patient(patient.id, [document], full=True))
+
+    assert result['processed_count'] == 1
+    assert 'existing medical summary' not in completions.prompts[1]
@@ -0,0 +1,83 @@
+import pytest
+from datetime import datetime, timedelta
+from backend.app import db
+from backend.app.models import User
+
+@pytest.fixture
+def patients(app):
+    """Create patients sharing created_at timestamps in pairs"""
+    start = datetime(2025, 1, 1)
+    users = []
+    for i in range(7):
+        user = User(
+            email=f'patient{i}@example.com',
+            password='testpass123',
+            role='patient',
+            first_name='Patient',
+            last_name=str(i),
+            phone=None,
+            status='Approved'
+        )
+        user.created_at = start + timedelta(days=i // 2)
+        users.append(user)
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+def test_patients_pages_cover_every_row_once(client, patients, staff_headers):
+    """Test walking the patient list with cursors"""
+    seen = []
+    cursor = None
+    while True:
+        response = client.get('/api/patients', headers=staff_headers, query_string={'limit': 3, 'cursor': cursor} if cursor else {'limit': 3})
+        assert response.status_code == 200
+        assert len(response.json) <= 3
+        seen.extend(user['email'] for user in response.json)
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    expected = sorted(patients, key=lambda user: (user.created_at, user.id.hex), reverse=True)
+    assert seen == [user.email for user in expected]
+
+def test_patients_total_count_on_request(client, patients, staff_headers):
+    """Test that the total is only counted when asked for"""
+    response = client.get('/api/patients?limit=2', headers=staff_headers)
+    assert 'X-Total-Count' not in response.headers
+
+    response = client.get('/api/patients?limit=2&include_total=true', headers=staff_headers)
+    assert response.headers['X-Total-Count'] == '7'
+    assert len(response.json) == 2
+
+def test_page_size_is_capped(app, client, patients, staff_headers):
+    """Test that limit cannot exceed MAX_PAGE_SIZE"""
+    app.config['MAX_PAGE_SIZE'] = 4
+
+    response = client.get('/api/patients?limit=1000', headers=staff_headers)
+
+    assert len(response.json) == 4
+    assert 'X-Next-Cursor' in response.headers
+
+def test_invalid_cursor(client, staff_headers):
+    """Test that a malformed cursor is rejected"""
+    response = client.get('/api/admins/all?cursor=not-a-cursor', headers=staff_headers)
+
+    assert response.status_code == 400
+
+def test_lists_default_to_one_page(app, client, patients, staff_headers):
+    """Test that clients sending no limit still get a bounded page"""
+    app.config['DEFAULT_PAGE_SIZE'] = 2
+
+    response = client.get('/api/patients', headers=staff_headers)
+
+    assert len(response.json) == 2
+    assert 'X-Next-Cursor' in response.headers
+
+def test_patients_filtered_by_status(client, patients, staff_headers):
+    patients[0].status = 'Unapproved'
+    db.session.commit()
+
+    response = client.get('/api/patients?status=Unapproved&include_total=true', headers=staff_headers)
+
+    assert [user['email'] for user in response.json] == ['patient0@example.com']
+    assert response.headers['X-Total-Count'] == '1'
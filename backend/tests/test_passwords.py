@@ -0,0 +1,101 @@
+from threading import BoundedSemaphore, Event
+import pytest
+from backend.app import db
+from backend.app.utils.passwords import (
+    PasswordHasherBusy, get_log_rounds, hash_password_now, hash_passwords
+)
+
+def test_hashes_use_configured_cost(app, admin_user):
+    """Test that passwords are hashed with BCRYPT_LOG_ROUNDS"""
+    assert get_log_rounds(admin_user.password_hash) == 4
+    assert admin_user.check_password('adminpass123')
+    assert not admin_user.check_password('wrong')
+
+def test_login_rehashes_on_cost_change(app, client, admin_user):
+    """Test that a hash with an outdated cost is replaced on login"""
+    admin_user.password_hash = hash_password_now('adminpass123', log_rounds=5)
+    db.session.commit()
+
+    response = client.post('/api/auth/login', json={
+        'email': 'admin-user@example.com',
+        'password': 'adminpass123'
+    })
+    assert response.status_code == 200
+
+    db.session.refresh(admin_user)
+    assert get_log_rounds(admin_user.password_hash) == 4
+    assert admin_user.check_password('adminpass123')
+
+def test_failed_login_keeps_hash(app, client, admin_user):
+    """Test that a wrong password never triggers a rehash"""
+    old_hash = hash_password_now('adminpass123', log_rounds=5)
+    admin_user.password_hash = old_hash
+    db.session.commit()
+
+    response = client.post('/api/auth/login', json={
+        'email': 'admin-user@example.com',
+        'password': 'wrong-password'
+    })
+    assert response.status_code == 401
+    db.session.refresh(admin_user)
+    assert admin_user.password_hash == old_hash
+
+def test_hash_passwords_in_parallel(app):
+    """Test that batches are hashed on the pool with the configured cost"""
+    hashes = hash_passwords([f'password-{i}' for i in range(8)])
+
+    assert len(set(hashes)) == 8
+    assert all(get_log_rounds(password_hash) == 4 for password_hash in hashes)
+
+def test_busy_hasher_returns_503(app, client, admin_user):
+    """Test that logins beyond the pending limit are turned away"""
+    hasher = app.extensions['password_hasher']
+    hasher.timeout = 0.01
+    taken = 0
+    while hasher.slots.acquire(blocking=False):
+        taken += 1
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('password')
+
+        response = client.post('/api/auth/login', json={
+            'email': 'admin-user@example.com',
+            'password': 'adminpass123'
+        })
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        for _ in range(taken):
+            hasher.slots.release()
+
+def test_bulk_hashing_leaves_logins_alone(app, client, admin_user):
+    """Test that logins are served while every bulk hashing thread is busy"""
+    hasher = app.extensions['password_hasher']
+    release = Event()
+    busy = [hasher.bulk_executor.submit(release.wait) for _ in range(app.config['PASSWORD_HASH_BULK_WORKERS'])]
+    try:
+        response = client.post('/api/auth/login', json={
+            'email': 'admin-user@example.com',
+            'password': 'adminpass123'
+        })
+        assert response.status_code == 200
+    finally:
+        release.set()
+    assert all(future.result() for future in busy)
+
+def test_slow_hash_times_out(app):
+    """Test that waiting for a hash is bounded by PASSWORD_HASH_TIMEOUT"""
+    hasher = app.extensions['password_hasher']
+    hasher.timeout = 0.01
+    hasher.slots = BoundedSemaphore(1)
+    release = Event()
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher._run(release.wait)
+        # The hash still runs, so its slot is still taken
+        assert not hasher.slots.acquire(blocking=False)
+    finally:
+        release.set()
+    # The slot is given back once the hash is done
+    assert hasher.slots.acquire(timeout=5)
+    hasher.slots.release()
@@ -0,0 +1,73 @@
+import io
+import os
+import boto3
+from flask import current_app
+from backend.app import db
+from backend.app.models import User, Patient, PatientSummary, MedicalDocument, DocumentText, AuditLog
+from backend.app.services.patient_deletion import delete_stored_files
+from backend.app.utils.storage import upload_file, delete_files
+
+def test_delete_patient_removes_related_rows(app, client, admin_user_headers, patient_user, monkeypatch):
+    """Test that the patient and everything referencing it is deleted"""
+    queued = []
+    monkeypatch.setattr(delete_stored_files, 'delay', queued.append)
+    patient = Patient.query.filter_by(user_id=patient_user.id).one()
+    for i in range(3):
+        document = MedicalDocument(patient_id=patient.id, title=f'Doc {i}', file_path=f'local://doc-{i}.pdf')
+        document.extracted_text = DocumentText(content_hash='0' * 64, text='text')
+        db.session.add(document)
+        db.session.add(AuditLog(user_id=patient_user.id, action='view_document'))
+    db.session.add(PatientSummary(patient_id=patient.id, summary_data={}, document_ids=[]))
+    db.session.commit()
+    user_id = patient_user.id
+    db.session.expunge_all()
+
+    response = client.delete(f'/api/patients/{user_id}', headers=admin_user_headers)
+
+    assert response.status_code == 200
+    assert User.query.filter_by(id=user_id).first() is None
+    for model in (Patient, PatientSummary, MedicalDocument, DocumentText, AuditLog):
+        assert model.query.count() == 0
+    assert sorted(queued[0]) == [f'local://doc-{i}.pdf' for i in range(3)]
+
+def test_delete_missing_patient(client, admin_user_headers):
+    response = client.delete('/api/patients/00000000-0000-0000-0000-000000000000', headers=admin_user_headers)
+    assert response.status_code == 404
+
+def test_delete_patient_refuses_other_users(client, admin_user, admin_user_headers):
+    """Test that only patients can be deleted through the patients endpoint"""
+    response = client.delete(f'/api/patients/{admin_user.id}', headers=admin_user_headers)
+
+    assert response.status_code == 404
+    assert db.session.get(User, admin_user.id) is not None
+
+def test_delete_patient_requires_admin(client, staff_headers, patient_user):
+    response = client.delete(f'/api/patients/{patient_user.id}', headers=staff_headers)
+
+    assert response.status_code == 403
+    assert db.session.get(User, patient_user.id) is not None
+
+def test_delete_files_from_s3_in_batches(app, s3_bucket, monkeypatch):
+    """Test that S3 files are removed with DeleteObjects, 1000 keys per call"""
+    storage = app.extensions['storage'].backend
+    file_paths = [upload_file(io.BytesIO(b'x'), f'doc-{i}.pdf') for i in range(3)]
+    monkeypatch.setattr('backend.app.utils.storage.MAX_DELETE_KEYS', 2)
+    calls = []
+    delete_objects = storage.client.delete_objects
+    def record(**kwargs):
+        calls.append(len(kwargs['Delete']['Objects']))
+        return delete_objects(**kwargs)
+    monkeypatch.setattr(storage.client, 'delete_objects', record)
+
+    assert delete_files(file_paths) == []
+
+    assert calls == [2, 1]
+    s3 = boto3.client('s3', region_name=current_app.config['AWS_REGION'])
+    assert s3.list_objects_v2(Bucket=s3_bucket).get('KeyCount') == 0
+
+def test_delete_stored_files_task(app, local_storage):
+    """Test that the task deletes local files"""
+    file_path = upload_file(io.BytesIO(b'x'), 'doc.pdf')
+
+    assert delete_stored_files.apply(args=[[file_path]]).get() == 1
+    assert not os.path.exists(local_storage.path(file_path))
@@ -0,0 +1,98 @@
+import io
+import json
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import event
+from backend.app import celery, db
+from backend.app.models import User, Patient, AuditLog
+from backend.app.services.patient_import import import_patients_task
+
+CSV_IMPORT = (
+    "email,name,phone,dob\n"
+    "ann@example.com,Ann Smith,555-0100,1980-02-03\n"
+    "not-an-email,Bob Jones,,\n"
+    "admin-user@example.com,Already There,,\n"
+    "cy@example.com,Cy Young,,2999-01-01\n"
+    "dee@example.com,Dee Lee,,\n"
+    "dee@example.com,Dee Again,,\n"
+)
+
+@pytest.fixture
+def statements(app):
+    """Collect the SQL statements run against the test database"""
+    executed = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_import_csv(app, client, admin_user, admin_user_headers, statements, monkeypatch):
+    """Test that valid rows are created and the others reported by row"""
+    queued = []
+    monkeypatch.setattr(import_patients_task, 'apply_async', lambda args, task_id: queued.append(args) or SimpleNamespace(id=task_id))
+    response = client.post(
+        '/api/patients/import',
+        data={'file': (io.BytesIO(CSV_IMPORT.encode('utf-8')), 'patients.csv')},
+        headers=admin_user_headers
+    )
+
+    assert response.status_code == 202
+    assert response.json['rows'] == 6
+    # Nothing is hashed or written until the task runs
+    assert User.query.filter_by(email='ann@example.com').count() == 0
+
+    statements.clear()
+    report = import_patients_task.apply(args=queued[0]).get()
+    monkeypatch.setattr(celery, 'AsyncResult', lambda task_id: SimpleNamespace(id=task_id, state='SUCCESS', result=report))
+    status = client.get(f"/api/documents/tasks/{response.json['task_id']}", headers=admin_user_headers).json
+    assert status['result']['created'] == 2
+    errors = {error['row']: error['errors'] for error in status['result']['errors']}
+    assert set(errors) == {2, 3, 4, 6}
+    assert 'email' in errors[2]
+    assert errors[3] == {'email': ['Email already registered']}
+    assert 'dob' in errors[4]
+    assert errors[6] == {'email': ['Duplicate email in import']}
+    assert AuditLog.query.filter_by(user_id=admin_user.id, action='import_patients').count() == 1
+
+    ann = User.query.filter_by(email='ann@example.com').one()
+    assert (ann.first_name, ann.last_name, ann.role) == ('Ann', 'Smith', 'patient')
+    assert ann.check_password('ann@example.com')
+    assert str(Patient.query.filter_by(user_id=ann.id).one().dob) == '1980-02-03'
+
+    # One duplicate lookup and one insert per table, whatever the row count
+    inserts = [sql for sql in statements if sql.lstrip().upper().startswith('INSERT INTO USERS ')]
+    assert len(inserts) == 1
+    assert sum(sql.upper().startswith('SELECT USERS.EMAIL') for sql in statements) == 1
+
+def test_import_ndjson_in_chunks(app):
+    """Test that the CLI inserts NDJSON rows in chunks"""
+    rows = [
+        {'email': f'patient{i}@example.com', 'first_name': 'Patient', 'last_name': str(i)}
+        for i in range(5)
+    ]
+    path = app.config['UPLOAD_FOLDER'] + '/patients.ndjson'
+    with open(path, 'w') as f:
+        f.write('\n'.join(json.dumps(row) for row in rows) + '\nnot json\n')
+
+    result = app.test_cli_runner().invoke(args=['import-patients', path, '--chunk-size', '2'])
+
+    assert 'Imported 5 of 6 patients' in result.output
+    assert "Row 6: {'row': ['Could not be parsed']}" in result.output
+    assert Patient.query.count() == 5
+
+def test_import_requires_admin(client, staff_headers):
+    response = client.post(
+        '/api/patients/import',
+        data={'file': (io.BytesIO(b''), 'patients.csv')},
+        headers=staff_headers
+    )
+    assert response.status_code == 403
+
+def test_import_rejects_unknown_format(client, admin_user_headers):
+    response = client.post(
+        '/api/patients/import',
+        data={'file': (io.BytesIO(b''), 'patients.xlsx')},
+        headers=admin_user_headers
+    )
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+import pytest
+from types import SimpleNamespace
+from flask_jwt_extended import create_access_token
+from backend.app import db
+from backend.app.models import MedicalDocument
+from backend.app.api import documents
+from backend.app.utils.decorators import token_claims
+
+@pytest.fixture
+def patient_headers(app, patient_user):
+    """Headers with the role claim login adds, so role checks need no query"""
+    token = create_access_token(identity=str(patient_user.id), additional_claims=token_claims(patient_user))
+    # Load the token blocklist now so its periodic sync does not count against budgets
+    app.extensions['token_blocklist'].sync()
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def patient_documents(patient_user):
+    docs = [
+        MedicalDocument(patient_id=patient_user.patient.id, title=f'Report {i}', file_path=f'local://{i}.pdf')
+        for i in range(10)
+    ]
+    db.session.add_all(docs)
+    db.session.commit()
+    ids = [doc.id for doc in docs]
+    # Make requests load everything from the database, like real ones
+    db.session.expire_all()
+    return ids
+
+def test_get_document_budget(client, patient_headers, patient_documents, local_storage, query_budget):
+    # Document and patient, audit entry
+    with query_budget(2):
+        response = client.get(f'/api/documents/{patient_documents[0]}', headers=patient_headers)
+    assert response.status_code == 200
+
+def test_summarize_document_budget(client, patient_headers, patient_documents, query_budget, monkeypatch):
+    monkeypatch.setattr(documents.generate_document_summary, 'apply_async', lambda args, task_id: SimpleNamespace(id=task_id))
+    with query_budget(1):
+        response = client.post(f'/api/documents/{patient_documents[0]}/summarize', headers=patient_headers)
+    assert response.status_code == 202
+
+def test_delete_document_budget(client, patient_headers, patient_documents, local_storage, query_budget):
+    # Document and patient, extracted text cascade, document and audit rows
+    with query_budget(4):
+        response = client.delete(f'/api/documents/{patient_documents[0]}', headers=patient_headers)
+    assert response.status_code == 200
+
+def test_patient_documents_budget(client, patient_user, patient_headers, patient_documents, query_budget):
+    """Test that listing documents costs the same however many there are"""
+    url = f'/api/documents/patients/{patient_user.id}/documents'
+    # Patient with its documents, audit entry
+    with query_budget(2):
+        response = client.get(url, headers=patient_headers)
+    assert response.status_code == 200
+    assert len(response.json) == 10
+
+def test_query_budget_reports_excess(app, query_budget):
+    with pytest.raises(AssertionError, match='2 queries exceed the budget of 1'):
+        with query_budget(1):
+            db.session.execute(db.select(MedicalDocument)).all()
+            db.session.execute(db.select(MedicalDocument)).all()
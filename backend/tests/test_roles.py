@@ -0,0 +1,60 @@
+import pytest
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from sqlalchemy import event
+from backend.app import db
+
+@pytest.fixture
+def statements(app):
+    """Collect the SQL statements run against the test database"""
+    executed = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def users_queries(statements):
+    return [statement for statement in statements if 'FROM users' in statement]
+
+def test_login_embeds_role_claim(client, admin_user, admin_user_headers):
+    """Test that access tokens carry the user's role"""
+    token = admin_user_headers['Authorization'].split()[1]
+
+    assert decode_token(token)['role'] == 'admin'
+
+def test_role_check_from_claims_needs_no_user_query(client, admin_user_headers, statements):
+    """Test that admin routes do not load the user"""
+    response = client.get('/api/admin/logs', headers=admin_user_headers)
+
+    assert response.status_code == 200
+    assert users_queries(statements) == []
+
+def test_role_check_without_claim_loads_user_once(client, admin_user, statements):
+    """Test the fallback for tokens issued without a role claim"""
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin_user.id))}'}
+
+    response = client.get('/api/admin/logs', headers=headers)
+
+    assert response.status_code == 200
+    assert len(users_queries(statements)) == 1
+
+def test_roles_are_enforced(client, staff_headers, patient_user):
+    """Test that other roles are rejected by role decorators"""
+    assert client.get('/api/admin/stats', headers=staff_headers).status_code == 403
+
+    patient_token = create_access_token(identity=str(patient_user.id), additional_claims={'role': 'Patient'})
+    response = client.get('/api/admin/stats', headers={'Authorization': f'Bearer {patient_token}'})
+    assert response.status_code == 403
+
+def test_refresh_reloads_role(client, patient_user, statements):
+    """Test that refreshed access tokens carry the current role"""
+    patient_user.role = 'staff'
+    db.session.commit()
+    statements.clear()
+    token = create_refresh_token(identity=str(patient_user.id))
+
+    response = client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    assert decode_token(response.json['access_token'])['role'] == 'staff'
+    assert len(users_queries(statements)) == 1
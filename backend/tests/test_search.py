@@ -0,0 +1,82 @@
+import pytest
+from backend.app import db
+from backend.app.models import User
+
+def make_user(first_name, last_name, email, role='patient'):
+    return User(
+        email=email,
+        password='testpass123',
+        role=role,
+        first_name=first_name,
+        last_name=last_name,
+        phone=None,
+        status='Approved'
+    )
+
+@pytest.fixture
+def patients(app):
+    users = [
+        make_user('Anna', 'Smith', 'anna@example.com'),
+        make_user('Johanna', 'Brown', 'jo@example.com'),
+        make_user('Mark', 'Annable', 'mark@example.com'),
+        make_user('Peter', 'Jones', 'peter@clinic.org'),
+        make_user('Annette', 'Admin', 'annette@example.com', role='admin')
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+def test_search_matches_substrings(client, patients, staff_headers):
+    """Test that search finds the term anywhere in names and emails"""
+    response = client.get('/api/patients?search=anna', headers=staff_headers)
+
+    assert response.status_code == 200
+    assert {user['email'] for user in response.json} == {
+        'anna@example.com', 'jo@example.com', 'mark@example.com'
+    }
+
+def test_search_is_scoped_to_role(client, patients, staff_headers):
+    """Test that admin search only returns admins"""
+    response = client.get('/api/admins/all?search=Anne', headers=staff_headers)
+
+    assert [user['email'] for user in response.json] == ['annette@example.com']
+
+def test_search_follows_updates_and_deletes(client, patients, staff_headers):
+    """Test that the search index tracks changed rows"""
+    patients[3].email = 'peter@hospital.org'
+    db.session.delete(patients[0])
+    db.session.commit()
+
+    assert client.get('/api/patients?search=clinic', headers=staff_headers).json == []
+    assert len(client.get('/api/patients?search=hospital', headers=staff_headers).json) == 1
+    assert 'anna@example.com' not in {
+        user['email'] for user in client.get('/api/patients?search=anna', headers=staff_headers).json
+    }
+
+def test_short_search_terms(client, patients, staff_headers):
+    """Test terms shorter than a trigram and LIKE wildcards"""
+    response = client.get('/api/patients?search=Jo', headers=staff_headers)
+    assert {user['email'] for user in response.json} == {'jo@example.com', 'peter@clinic.org'}
+
+    response = client.get('/api/patients?search=%25', headers=staff_headers)
+    assert response.json == []
+
+def test_search_respects_limit(client, patients, staff_headers):
+    """Test that ranked results are capped at the page size"""
+    response = client.get('/api/patients?search=example&limit=2', headers=staff_headers)
+
+    assert len(response.json) == 2
+
+def test_search_pages_reach_every_match(client, patients, staff_headers):
+    """Test that matches past the first page are reachable with the cursor"""
+    response = client.get('/api/patients?search=example&limit=2&include_total=true', headers=staff_headers)
+    assert response.headers['X-Total-Count'] == '3'
+    seen = [user['email'] for user in response.json]
+
+    response = client.get('/api/patients', query_string={
+        'search': 'example', 'limit': 2, 'cursor': response.headers['X-Next-Cursor']
+    }, headers=staff_headers)
+    seen += [user['email'] for user in response.json]
+
+    assert 'X-Next-Cursor' not in response.headers
+    assert sorted(seen) == ['anna@example.com', 'jo@example.com', 'mark@example.com']
@@ -0,0 +1,143 @@
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from backend.app import db
+from backend.app.models import User, Patient, MedicalDocument, DailyStat
+from backend.app.services.stats import get_admin_stats, get_timeseries, rollup_daily_stats, rollup_recent_daily_stats
+
+@pytest.fixture
+def statements(app):
+    """Collect the SQL statements run against the test database"""
+    executed = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+def make_user(email, role, created_at=None):
+    user = User(
+        email=email,
+        password='testpass123',
+        role=role,
+        first_name='Test',
+        last_name='User',
+        phone=None,
+        status='Approved'
+    )
+    user.created_at = created_at
+    return user
+
+@pytest.fixture
+def population(app):
+    old = datetime.utcnow() - timedelta(days=90)
+    admin = make_user('admin@example.com', 'admin', old)
+    patient_user = make_user('patient@example.com', 'patient')
+    db.session.add_all([admin, patient_user])
+    db.session.flush()
+    patient = Patient(user_id=patient_user.id, dob=date(1990, 1, 1))
+    db.session.add(patient)
+    db.session.flush()
+    db.session.add_all([
+        MedicalDocument(patient_id=patient.id, title='Old', file_path='local://old.pdf', uploaded_at=old),
+        MedicalDocument(patient_id=patient.id, title='New', file_path='local://new.pdf')
+    ])
+    db.session.commit()
+    return patient
+
+def test_stats_in_one_query(app, population, statements):
+    """Test that the stats are computed with a single aggregate query"""
+    stats = get_admin_stats()
+
+    assert len(statements) == 1
+    assert stats == {
+        "total_stats": {"users": 2, "patients": 1, "documents": 2},
+        "last_30_days": {"new_users": 1, "new_documents": 1},
+        "role_distribution": {"admin": 1, "patient": 1}
+    }
+
+def test_empty_database(app):
+    """Test stats without any rows"""
+    assert get_admin_stats()['total_stats'] == {"users": 0, "patients": 0, "documents": 0}
+
+def test_stats_are_cached(app, population, statements):
+    """Test that repeated calls within the TTL do not query"""
+    get_admin_stats()
+    get_admin_stats()['total_stats']['users'] = 100
+
+    assert get_admin_stats()['total_stats']['users'] == 2
+    assert len(statements) == 1
+
+def test_incremental_updates(app, population, statements):
+    """Test that committed ORM changes are applied to the cached stats"""
+    get_admin_stats()
+
+    db.session.add(make_user('staff@example.com', 'staff'))
+    db.session.add(MedicalDocument(patient_id=population.id, title='Newer', file_path='local://newer.pdf'))
+    db.session.commit()
+    db.session.delete(MedicalDocument.query.filter_by(title='Old').one())
+    db.session.commit()
+    db.session.add(make_user('rolled-back@example.com', 'staff'))
+    db.session.flush()
+    db.session.rollback()
+
+    statements.clear()
+    stats = get_admin_stats()
+    assert statements == []
+    assert stats == {
+        "total_stats": {"users": 3, "patients": 1, "documents": 2},
+        "last_30_days": {"new_users": 2, "new_documents": 2},
+        "role_distribution": {"admin": 1, "patient": 1, "staff": 1}
+    }
+
+def test_incremental_updates_disabled(app, population):
+    """Test that changes wait for the TTL when incremental updates are off"""
+    app.extensions['stats'].incremental = False
+    get_admin_stats()
+
+    db.session.add(make_user('staff@example.com', 'staff'))
+    db.session.commit()
+
+    assert get_admin_stats()['total_stats']['users'] == 2
+    app.extensions['stats'].invalidate()
+    assert get_admin_stats()['total_stats']['users'] == 3
+
+def test_rollup_and_timeseries(app, population):
+    """Test that rollups count rows per day and series read them back"""
+    today = datetime.utcnow().date()
+    old = today - timedelta(days=90)
+    rollup_daily_stats(old, today)
+
+    assert DailyStat.query.count() == 91
+    assert db.session.get(DailyStat, old).new_users == 1
+    assert db.session.get(DailyStat, old).new_documents == 1
+
+    # Re-running a range replaces it instead of double counting
+    rollup_recent_daily_stats.apply(args=[2]).get()
+    assert db.session.get(DailyStat, today).new_users == 1
+
+    series = get_timeseries(today - timedelta(days=13), today, 'week')
+    assert sum(point['new_documents'] for point in series) == 1
+    assert all(date.fromisoformat(point['date']).weekday() == 0 for point in series)
+    assert get_timeseries(old, old) == [{"date": old.isoformat(), "new_users": 1, "new_documents": 1}]
+
+def test_backfill_command(app, population):
+    """Test backfilling rollups from the first user onwards"""
+    result = app.test_cli_runner().invoke(args=['stats', 'backfill'])
+
+    assert result.exit_code == 0, result.output
+    assert DailyStat.query.count() == 91
+    assert sum(row.new_users for row in DailyStat.query) == 2
+
+def test_timeseries_endpoint(client, population, admin_user_headers):
+    """Test the timeseries endpoint and its validation"""
+    today = datetime.utcnow().date()
+    rollup_daily_stats(today - timedelta(days=6), today)
+
+    response = client.get(f'/api/admin/stats/timeseries?start={today - timedelta(days=6)}&end={today}', headers=admin_user_headers)
+    assert response.status_code == 200
+    assert len(response.json['series']) == 7
+    assert response.json['series'][-1]['new_documents'] == 1
+
+    assert client.get('/api/admin/stats/timeseries?interval=month', headers=admin_user_headers).status_code == 400
+    assert client.get('/api/admin/stats/timeseries?start=2020-01-01&end=2025-01-01', headers=admin_user_headers).status_code == 400
@@ -0,0 +1,161 @@
+import io
+import boto3
+import pytest
+from flask import current_app
+from werkzeug.exceptions import BadRequest
+from backend.app.utils.storage import (
+    StorageBackend, get_storage, stream_file, upload_file, generate_file_url, MIN_MULTIPART_PART_SIZE
+)
+from backend.app.models import MedicalDocument
+from backend.app.utils.streaming import StreamingUpload
+
+
+def multipart_body(boundary, fields, file_field, filename, content):
+    """Build a multipart/form-data body with the fields before the file"""
+    body = b''
+    for name, value in fields.items():
+        body += (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+        ).encode()
+    body += (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'
+    ).encode()
+    return body + content + f'\r\n--{boundary}--\r\n'.encode()
+
+def test_stream_file_to_s3_uploads_in_parts(app, s3_bucket):
+    """Test that streamed chunks are reassembled into one S3 object"""
+    get_storage().part_size = MIN_MULTIPART_PART_SIZE
+    content = b'x' * (MIN_MULTIPART_PART_SIZE * 2 + 123)
+    chunks = (content[i:i + 65536] for i in range(0, len(content), 65536))
+
+    file_path = stream_file(chunks, 'streamed.pdf')
+
+    assert file_path == f's3://{s3_bucket}/streamed.pdf'
+    s3 = boto3.client('s3', region_name=current_app.config['AWS_REGION'])
+    # Multipart ETags carry the number of parts as a suffix
+    assert s3.head_object(Bucket=s3_bucket, Key='streamed.pdf')['ETag'].endswith('-3"')
+    assert s3.get_object(Bucket=s3_bucket, Key='streamed.pdf')['Body'].read() == content
+
+def test_stream_file_to_s3_aborts_on_error(app, s3_bucket):
+    """Test that a failing source stream leaves no partial upload behind"""
+    def broken_chunks():
+        yield b'partial'
+        raise IOError('client disconnected')
+
+    try:
+        stream_file(broken_chunks(), 'broken.pdf')
+    except IOError:
+        pass
+
+    s3 = boto3.client('s3', region_name=current_app.config['AWS_REGION'])
+    assert s3.list_multipart_uploads(Bucket=s3_bucket).get('Uploads', []) == []
+    assert s3.list_objects_v2(Bucket=s3_bucket)['KeyCount'] == 0
+
+def test_streaming_upload_parses_fields_and_chunks():
+    """Test that the file part is yielded in bounded chunks"""
+    content = b'%PDF-1.4 ' + b'a' * 10000
+    body = multipart_body(
+        'testboundary', {'user_id': 'abc', 'title': 'Scan'}, 'file', 'scan.pdf', content
+    )
+
+    upload = StreamingUpload(
+        io.BytesIO(body), 'multipart/form-data; boundary=testboundary', chunk_size=1024
+    )
+    assert upload.fields == {'user_id': 'abc', 'title': 'Scan'}
+    assert upload.filename == 'scan.pdf'
+    assert upload.content_type == 'application/pdf'
+
+    chunks = list(upload.chunks())
+    assert b''.join(chunks) == content
+    assert max(len(chunk) for chunk in chunks) <= 1024
+
+def test_streaming_upload_without_file():
+    """Test that a body without a file part is rejected"""
+    body = b'--testboundary\r\nContent-Disposition: form-data; name="title"\r\n\r\nScan\r\n--testboundary--\r\n'
+
+    with pytest.raises(BadRequest):
+        StreamingUpload(io.BytesIO(body), 'multipart/form-data; boundary=testboundary')
+
+def test_s3_client_is_shared(app):
+    """Test that the S3 client is built once per app and reused"""
+    client = get_storage().client
+
+    assert client is get_storage().client
+    assert client.meta.config.max_pool_connections == app.config['S3_MAX_POOL_CONNECTIONS']
+
+def test_local_storage_round_trip(local_storage):
+    """Test storing, reading and deleting a file on disk"""
+    file_path = upload_file(io.BytesIO(b'0123456789'), 'report.pdf')
+
+    assert file_path == 'local://report.pdf'
+    with local_storage.open(file_path) as f:
+        assert f.read() == b'0123456789'
+    assert local_storage.read_range(file_path, 2, 3) == b'234'
+
+    local_storage.delete(file_path)
+    with pytest.raises(FileNotFoundError):
+        local_storage.open(file_path)
+
+def test_local_storage_rejects_escaping_keys(local_storage):
+    """Test that keys cannot point outside the storage root"""
+    with pytest.raises(ValueError):
+        local_storage.open('local://../secrets.txt')
+
+def test_local_storage_serves_range_requests(app, client, local_storage):
+    """Test that signed download links serve partial content"""
+    with app.test_request_context():
+        file_path = upload_file(io.BytesIO(b'0123456789'), 'report.pdf')
+        link = generate_file_url(file_path)
+
+    response = client.get(link, headers={'Range': 'bytes=2-4'})
+    assert response.status_code == 206
+    assert response.data == b'234'
+
+    response = client.get(link.replace('/files/', '/files/x'))
+    assert response.status_code == 403
+
+@pytest.fixture
+def streaming_uploads(app, local_storage):
+    app.config['UPLOAD_STREAMING'] = True
+    return local_storage
+
+def post_stream(client, headers, body):
+    return client.post('/api/documents/upload', data=body, headers={
+        **headers, 'Content-Type': 'multipart/form-data; boundary=testboundary'
+    })
+
+def test_streaming_upload_endpoint(client, staff_headers, patient_user, streaming_uploads):
+    """Test that a streamed upload is stored and recorded"""
+    content = b'%PDF-1.4 ' + b'a' * 10000
+    body = multipart_body('testboundary', {'user_id': str(patient_user.id), 'title': 'Scan'}, 'file', 'scan.pdf', content)
+
+    response = post_stream(client, staff_headers, body)
+
+    assert response.status_code == 201
+    document = MedicalDocument.query.one()
+    assert document.title == 'Scan'
+    with open(streaming_uploads.path(document.file_path), 'rb') as f:
+        assert f.read() == content
+
+def test_streaming_upload_endpoint_rejects_truncated_body(client, staff_headers, patient_user, streaming_uploads):
+    """Test that a body cut off inside the file part is a 400, not a storage error"""
+    body = multipart_body('testboundary', {'user_id': str(patient_user.id)}, 'file', 'scan.pdf', b'%PDF-1.4 scan')
+
+    response = post_stream(client, staff_headers, body[:-20])
+
+    assert response.status_code == 400
+    assert 'error' not in response.json
+    assert MedicalDocument.query.count() == 0
+
+def test_incomplete_backend_cannot_be_created():
+    """Test that a backend missing part of the interface fails up front"""
+    class UploadOnlyBackend(StorageBackend):
+        def upload(self, file_obj, filename, content_type=None):
+            return filename
+
+    with pytest.raises(TypeError):
+        UploadOnlyBackend()
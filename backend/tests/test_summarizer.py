@@ -0,0 +1,64 @@
+import asyncio
+import time
+from backend.app.services.ai_client import FakeAsyncOpenAI, create_ai_client
+from backend.app.services.summarizer import ChunkedSummarizer
+from backend.app.utils.ai import generate_summary_with_openai
+from backend.app.utils.chunking import estimate_tokens, split_into_chunks
+
+def make_record(facts):
+    """A long medical record with one marker fact per page"""
+    return "\f".join(
+        f"Page {i}\n\nFINDING-{i}\n" + "Routine observation, nothing of note. " * 40
+        for i in range(facts)
+    )
+
+def test_split_into_chunks_respects_budget():
+    """Test that every chunk fits the token budget and no text is lost"""
+    text = make_record(20)
+
+    chunks = split_into_chunks(text, 200)
+
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert all(f"FINDING-{i}" in "".join(chunks) for i in range(20))
+
+def test_split_into_chunks_prefers_page_breaks():
+    """Test that short pages are packed whole into chunks"""
+    chunks = split_into_chunks("first page\fsecond page\fthird page", 5)
+
+    assert chunks == ["first page", "second page", "third page"]
+
+def test_condense_keeps_every_chunk():
+    """Test map-reduce completeness where truncation would drop most findings"""
+    client = FakeAsyncOpenAI()
+    summarizer = ChunkedSummarizer(client, "gpt-4o-mini", chunk_tokens=400, notes_tokens=40, max_concurrency=4)
+    text = make_record(30)
+
+    condensed = asyncio.run(summarizer.condense(text, 2000))
+
+    assert estimate_tokens(condensed) <= 2000
+    found = sum(f"FINDING-{i}\n" in condensed for i in range(30))
+    assert found == 30
+    assert "FINDING-29" not in text[:3000]
+
+def test_condense_runs_chunks_concurrently():
+    """Test that chunk requests overlap up to the concurrency limit"""
+    client = FakeAsyncOpenAI(latency=0.05)
+    summarizer = ChunkedSummarizer(client, "gpt-4o-mini", chunk_tokens=400, notes_tokens=40, max_concurrency=4)
+
+    started = time.monotonic()
+    asyncio.run(summarizer.condense(make_record(16), 2000))
+
+    assert client.max_in_flight == 4
+    assert time.monotonic() - started < 0.05 * client.calls
+
+def test_generate_summary_uses_fake_client(app):
+    """Test the celery summary path end to end without network"""
+    app.config['AI_CLIENT'] = 'fake'
+    app.config['AI_CHUNK_TOKENS'] = 400
+    app.config['AI_CHUNK_NOTES_TOKENS'] = 10
+
+    assert isinstance(create_ai_client(), FakeAsyncOpenAI)
+    summary = generate_summary_with_openai(make_record(40))
+
+    assert summary.startswith("Page 0")
+    assert estimate_tokens(summary) <= 500
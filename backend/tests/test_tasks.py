@@ -0,0 +1,135 @@
+import json
+import pytest
+from types import SimpleNamespace
+from flask_jwt_extended import create_access_token
+from backend.app import celery, db
+from backend.app.api import documents
+from backend.app.api.documents import new_task_id
+from backend.app.models import User, MedicalDocument
+
+class FakeResults:
+    """Replays a sequence of task states per task id"""
+
+    def __init__(self, states):
+        self.states = states
+
+    def __call__(self, task_id):
+        state, info = self.states[task_id].pop(0) if len(self.states[task_id]) > 1 else self.states[task_id][0]
+        return SimpleNamespace(id=task_id, state=state, info=info, result=info)
+
+@pytest.fixture
+def staff_task_ids(staff_headers):
+    """Task ids started by the staff user of `staff_headers`"""
+    staff = User.query.filter_by(email='staff@example.com').one()
+    return [new_task_id(staff.id) for _ in range(2)]
+
+def parse_fields(body):
+    """Fields of each SSE message in a stream"""
+    return [
+        dict(line.split(': ', 1) for line in block.split('\n'))
+        for block in body.strip().split('\n\n')
+    ]
+
+def parse_events(body):
+    return [
+        (fields['event'], json.loads(fields['data']))
+        for fields in parse_fields(body) if 'event' in fields
+    ]
+
+def test_get_task_status(app, client, staff_headers, staff_task_ids, monkeypatch):
+    """Test polling a running task"""
+    task_id = staff_task_ids[0]
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({task_id: [('PROGRESS', {'done': 1, 'total': 4})]}))
+
+    response = client.get(f'/api/documents/tasks/{task_id}', headers=staff_headers)
+
+    assert response.status_code == 200
+    assert response.json['state'] == 'PROGRESS'
+    assert response.json['progress'] == {'done': 1, 'total': 4}
+
+def test_task_events_stream(app, client, staff_headers, staff_task_ids, monkeypatch):
+    """Test that progress changes and completion are streamed"""
+    app.config['TASK_EVENTS_POLL_INTERVAL'] = 0
+    task_id = staff_task_ids[0]
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({task_id: [
+        ('PENDING', None),
+        ('PROGRESS', {'done': 1, 'total': 2}),
+        ('PROGRESS', {'done': 1, 'total': 2}),
+        ('SUCCESS', {'summarized': ['d1', 'd2'], 'failed': {}})
+    ]}))
+
+    response = client.get(f'/api/documents/tasks/{task_id}/events', headers=staff_headers)
+
+    assert response.mimetype == 'text/event-stream'
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, data in events] == ['progress', 'progress', 'completed']
+    assert events[-1][1]['result']['summarized'] == ['d1', 'd2']
+
+def test_tasks_events_stream_times_out(app, client, staff_headers, staff_task_ids, monkeypatch):
+    """Test that the stream ends when tasks do not finish in time"""
+    app.config['TASK_EVENTS_POLL_INTERVAL'] = 0
+    app.config['TASK_EVENTS_TIMEOUT'] = 0.05
+    a, b = staff_task_ids
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({a: [('FAILURE', 'boom')], b: [('STARTED', None)]}))
+
+    response = client.get('/api/documents/tasks/events', query_string={'task_id': [a, b]}, headers=staff_headers)
+
+    events = parse_events(response.get_data(as_text=True))
+    assert ('failed', {'task_id': a, 'state': 'FAILURE', 'progress': None, 'result': None, 'error': 'boom'}) in events
+    assert events[-1] == ('timeout', {'task_ids': [b]})
+
+def test_tasks_of_other_users_are_not_found(app, client, staff_headers, staff_task_ids, patient_user, monkeypatch):
+    """Test that a task can only be read by the user who started it"""
+    task_id = new_task_id(patient_user.id)
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({task_id: [('SUCCESS', {'summarized': ['d1']})]}))
+
+    assert client.get(f'/api/documents/tasks/{task_id}', headers=staff_headers).status_code == 404
+    assert client.get(f'/api/documents/tasks/{task_id}/events', headers=staff_headers).status_code == 404
+    response = client.get('/api/documents/tasks/events', query_string={
+        'task_id': [staff_task_ids[0], task_id]
+    }, headers=staff_headers)
+    assert response.status_code == 404
+    assert client.get('/api/documents/tasks/abc', headers=staff_headers).status_code == 404
+
+def test_summarize_task_belongs_to_requester(app, client, patient_user, monkeypatch):
+    """Test that the task id handed out can be polled by whoever asked for it"""
+    document = MedicalDocument(patient_id=patient_user.patient.id, title='Report', file_path='local://report.pdf')
+    db.session.add(document)
+    db.session.commit()
+    monkeypatch.setattr(documents.generate_document_summary, 'apply_async', lambda args, task_id: SimpleNamespace(id=task_id))
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(patient_user.id))}'}
+
+    task_id = client.post(f'/api/documents/{document.id}/summarize', headers=headers).json['task_id']
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({task_id: [('PENDING', None)]}))
+
+    response = client.get(f'/api/documents/tasks/{task_id}', headers=headers)
+    assert response.status_code == 200
+    assert response.json['state'] == 'PENDING'
+
+def test_task_events_resume_from_last_event_id(app, client, staff_headers, staff_task_ids, monkeypatch):
+    """Test that a reconnecting client only gets what changed since its last event"""
+    app.config.update(TASK_EVENTS_POLL_INTERVAL=0, TASK_EVENTS_TIMEOUT=0.05)
+    a, b = staff_task_ids
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({
+        a: [('SUCCESS', {'summarized': ['d1']})],
+        b: [('PROGRESS', {'done': 1, 'total': 2})]
+    }))
+    url = '/api/documents/tasks/events'
+    query = {'task_id': [a, b]}
+
+    fields = parse_fields(client.get(url, query_string=query, headers=staff_headers).get_data(as_text=True))
+    assert fields[0] == {'retry': '0'}
+    assert [message.get('event') for message in fields[1:]] == ['completed', 'progress', 'timeout']
+    last_event_id = fields[-2]['id']
+
+    response = client.get(url, query_string=query, headers={**staff_headers, 'Last-Event-ID': last_event_id})
+    assert parse_events(response.get_data(as_text=True)) == [('timeout', {'task_ids': [b]})]
+
+    monkeypatch.setattr(celery, 'AsyncResult', FakeResults({b: [('SUCCESS', {'summarized': ['d2']})]}))
+    response = client.get(url, query_string=query, headers={**staff_headers, 'Last-Event-ID': last_event_id})
+    fields = parse_fields(response.get_data(as_text=True))
+    assert [message.get('event') for message in fields[1:]] == ['completed']
+
+    # Everything was reported, EventSource stops reconnecting on a 204
+    response = client.get(url, query_string=query, headers={**staff_headers, 'Last-Event-ID': fields[-1]['id']})
+    assert response.status_code == 204
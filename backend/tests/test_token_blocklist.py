@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token, decode_token
+from backend.app import db
+from backend.app.models import TokenBlocklist
+from backend.app.utils.token_blocklist import BloomFilter, TokenBlocklistStore, purge_expired_tokens
+
+@pytest.fixture
+def token(patient_user):
+    return create_access_token(identity=str(patient_user.id))
+
+def test_bloom_filter():
+    """Test that added items are always found and false positives are rare"""
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'added-{i}')
+
+    assert all(bloom.might_contain(f'added-{i}') for i in range(1000))
+    assert sum(bloom.might_contain(f'other-{i}') for i in range(10000)) < 300
+
+def test_logout_revokes_token(app, client, token):
+    """Test that a token stops working after logout"""
+    headers = {'Authorization': f'Bearer {token}'}
+
+    assert client.post('/api/auth/logout', headers=headers).status_code == 200
+
+    response = client.post('/api/auth/logout', headers=headers)
+    assert response.status_code == 401
+    assert response.json['msg'] == 'Token has been revoked'
+    row = TokenBlocklist.query.one()
+    assert row.expires_at == datetime.utcfromtimestamp(decode_token(token)['exp'])
+
+def test_revocations_from_other_processes_are_synced(app, client, token):
+    """Test that a store picks up revocations it did not record itself"""
+    other_process = TokenBlocklistStore(app)
+    jti = decode_token(token)['jti']
+    assert not other_process.is_revoked(jti)
+
+    client.post('/api/auth/logout', headers={'Authorization': f'Bearer {token}'})
+    assert not other_process.is_revoked(jti)
+
+    other_process.sync()
+    assert other_process.is_revoked(jti)
+
+def test_expired_entries_are_dropped_and_purged(app):
+    """Test that expired revocations are forgotten and deleted"""
+    now = datetime.utcnow()
+    db.session.add_all([
+        TokenBlocklist(jti='expired', created_at=now - timedelta(hours=3), expires_at=now - timedelta(hours=1)),
+        TokenBlocklist(jti='live', created_at=now, expires_at=now + timedelta(hours=1))
+    ])
+    db.session.commit()
+    store = TokenBlocklistStore(app)
+    store.revoke('expired', now - timedelta(hours=1))
+
+    assert not store.is_revoked('expired')
+    assert store.is_revoked('live')
+
+    assert purge_expired_tokens() == 1
+    assert [row.jti for row in TokenBlocklist.query.all()] == ['live']
@@ -0,0 +1,106 @@
+import time
+from backend.app.utils.storage import generate_file_url
+from backend.app.utils.url_cache import PresignedUrlCache, RedisPresignedUrlCache
+
+def test_cache_hit_and_miss():
+    """Test that a stored URL is returned and counted"""
+    cache = PresignedUrlCache(max_size=10, min_remaining=60)
+
+    assert cache.get('report.pdf', 3600) is None
+    cache.set('report.pdf', 3600, 'https://signed/report.pdf')
+
+    assert cache.get('report.pdf', 3600) == 'https://signed/report.pdf'
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+def test_cache_skips_urls_close_to_expiry(monkeypatch):
+    """Test that URLs without a safe remaining lifetime are evicted"""
+    cache = PresignedUrlCache(max_size=10, min_remaining=600)
+    cache.set('report.pdf', 3600, 'https://signed/report.pdf')
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 3100)
+
+    assert cache.get('report.pdf', 3600) is None
+    assert cache.stats()["size"] == 0
+
+def test_cache_evicts_least_recently_used():
+    """Test the LRU bound"""
+    cache = PresignedUrlCache(max_size=2, min_remaining=60)
+    cache.set('a', 3600, 'url-a')
+    cache.set('b', 3600, 'url-b')
+    cache.get('a', 3600)
+    cache.set('c', 3600, 'url-c')
+
+    assert cache.get('b', 3600) is None
+    assert cache.get('a', 3600) == 'url-a'
+    assert cache.get('c', 3600) == 'url-c'
+
+def test_generate_presigned_url_is_cached(app, s3_bucket):
+    """Test that repeated link requests re-use the signed URL"""
+    first = generate_file_url('patient-treatment-agreement.pdf')
+    second = generate_file_url('patient-treatment-agreement.pdf')
+
+    assert first == second
+    assert app.extensions['storage'].backend.url_cache.stats()["hits"] == 1
+
+class FakeRedis:
+    """The few hash commands the Redis cache uses, without a server"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def hget(self, name, field):
+        value = self.hashes.get(name, {}).get(str(field))
+        return value.encode('utf-8') if value is not None else None
+
+    def hset(self, name, field, value):
+        self.hashes.setdefault(name, {})[str(field)] = value
+
+    def expire(self, name, ttl):
+        self.ttls[name] = ttl
+
+    def delete(self, *names):
+        for name in names:
+            self.hashes.pop(name, None)
+            self.ttls.pop(name, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+def test_redis_cache_invalidates_every_expiration_of_a_key():
+    """Test that invalidation deletes the object's hash without scanning keys"""
+    redis = FakeRedis()
+    cache = RedisPresignedUrlCache(redis, min_remaining=60)
+    cache.set('report.pdf', 3600, 'https://signed/report.pdf?1h')
+    cache.set('report.pdf', 600, 'https://signed/report.pdf?10m')
+    cache.set('scan.pdf', 3600, 'https://signed/scan.pdf')
+
+    assert cache.get('report.pdf', 600) == 'https://signed/report.pdf?10m'
+    assert redis.ttls['presigned-urls:report.pdf'] == 540
+
+    cache.invalidate_many(['report.pdf'])
+
+    assert cache.get('report.pdf', 3600) is None
+    assert cache.get('report.pdf', 600) is None
+    assert cache.get('scan.pdf', 3600) == 'https://signed/scan.pdf'
+
+def test_redis_cache_skips_urls_close_to_expiry(monkeypatch):
+    cache = RedisPresignedUrlCache(FakeRedis(), min_remaining=600)
+    cache.set('report.pdf', 3600, 'https://signed/report.pdf')
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 3100)
+
+    assert cache.get('report.pdf', 3600) is None
@@ -105,9 +105,10 @@ export default function DocumentModal({ patient, open, handleClose }: DocumentMo
     try {
       setIsUploading(true);
       const formData = new FormData();
-      formData.append('file', selectedFile);
+      // Fields go before the file so a streaming backend can read them first
       formData.append('title', selectedFile.name);
       formData.append('user_id', patient.id);
+      formData.append('file', selectedFile);
       
       await patientsApi.uploadDocument(patient.id, formData);
       
@@ -11,19 +11,29 @@ import {
 import {
   FilterList as FilterListIcon,
 } from '@mui/icons-material';
-import { useQuery  } from '@tanstack/react-query';
+import { useInfiniteQuery } from '@tanstack/react-query';
 import { adminsApi } from '../../services/api.ts';
 
 export default function AdminsPage() {
   const [searchTerm, setSearchTerm] = useState('');
 
-  const { data: admins, isLoading } = useQuery({
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['admins', searchTerm],
-    queryFn: () =>
+    queryFn: ({ pageParam }) =>
       adminsApi.getAdmins({
         search: searchTerm,
+        cursor: pageParam,
       }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
   });
+  const admins = data?.pages.flatMap((page) => page.items) ?? [];
 
   const columns: GridColDef[] = [
     { 
@@ -75,7 +85,7 @@ export default function AdminsPage() {
       </Box>
 
       <DataGrid
-        rows={admins ?? []}
+        rows={admins}
         columns={columns}
         loading={isLoading}
         autoHeight
@@ -84,6 +94,19 @@ export default function AdminsPage() {
           pagination: { paginationModel: { pageSize: 10 } },
         }}
       />
+
+      {hasNextPage && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            size="small"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
     </Box>
   );
 }
\ No newline at end of file
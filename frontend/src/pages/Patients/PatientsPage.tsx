@@ -19,7 +19,7 @@ import {
   MoreVert as MoreVertIcon,
   FilterList as FilterListIcon,
 } from '@mui/icons-material';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { patientsApi } from '../../services/api';
 import PatientModal from "../../components/ModalWindow/PatientModal.tsx";
 import DocumentModal from "../../components/ModalWindow/DocumentModal.tsx";
@@ -44,13 +44,33 @@ export default function PatientsPage() {
   const [isDocumentModalOpen, setIsDocumentModalOpen] = useState<boolean>(false);
   const queryClient = useQueryClient();
 
-  const { data: patients, isLoading } = useQuery({
+  const {
+    data,
+    isLoading,
+    fetchNextPage,
+    hasNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
     queryKey: ['patients', tabValue, searchTerm],
-    queryFn: () =>
+    queryFn: ({ pageParam }) =>
       patientsApi.getPatients({
         status: tabValue,
         search: searchTerm,
+        cursor: pageParam,
       }),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor,
+  });
+  const patients = data?.pages.flatMap((page) => page.items) ?? [];
+
+  const { data: approvedCount } = useQuery({
+    queryKey: ['patients', 'count', UsersStatus.APPROVED],
+    queryFn: () => patientsApi.countPatients(UsersStatus.APPROVED),
+  });
+
+  const { data: unapprovedCount } = useQuery({
+    queryKey: ['patients', 'count', UsersStatus.UNAPPROVED],
+    queryFn: () => patientsApi.countPatients(UsersStatus.UNAPPROVED),
   });
 
   const approveMutation = useMutation({
@@ -198,11 +218,11 @@ export default function PatientsPage() {
         >
           <Tab
             value={UsersStatus.APPROVED}
-            label={`Approved (${(patients ?? []).filter((patient: any) => patient.status === UsersStatus.APPROVED).length})`}
+            label={`Approved (${approvedCount ?? 0})`}
           />
           <Tab
             value={UsersStatus.UNAPPROVED}
-            label={`Unapproved (${(patients ?? []).filter((patient: any) => patient.status === UsersStatus.UNAPPROVED).length})`}
+            label={`Unapproved (${unapprovedCount ?? 0})`}
           />
         </Tabs>
       </Box>
@@ -239,7 +259,7 @@ export default function PatientsPage() {
       </Box>
 
       <DataGrid
-        rows={(patients ?? []).filter((patient: any) => patient.status === tabValue)}
+        rows={patients}
         columns={columns}
         loading={isLoading}
         autoHeight
@@ -253,6 +273,19 @@ export default function PatientsPage() {
         }}
       />
 
+      {hasNextPage && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button
+            variant="outlined"
+            size="small"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? 'Loading...' : 'Load more'}
+          </Button>
+        </Box>
+      )}
+
       <Menu
         anchorEl={anchorEl}
         open={Boolean(anchorEl)}
@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosResponse } from 'axios';
 import { useAuthStore } from '../store/authStore';
 import {UsersRoles} from "../constants.ts";
 
@@ -50,21 +50,46 @@ export const authApi = {
 interface GetPatientsParams {
   status: 'Approved' | 'Unapproved';
   search?: string;
+  cursor?: string;
 }
 
 interface GetAdminsParams {
   search?: string;
+  cursor?: string;
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor?: string;
+}
+
+// Lists come one page at a time, the cursor of the next page is in X-Next-Cursor
+const toPage = <T>(response: AxiosResponse<T[]>): Page<T> => ({
+  items: response.data,
+  nextCursor: response.headers['x-next-cursor'] || undefined,
+});
+
 export const patientsApi = {
-  getPatients: async ({ status, search }: GetPatientsParams): Promise<any> => {
-    const { data } = await api.get('/patients', {
+  getPatients: async ({ status, search, cursor }: GetPatientsParams): Promise<Page<any>> => {
+    const response = await api.get('/patients', {
       params: {
         status,
         search,
+        cursor,
       },
     });
-    return data;
+    return toPage(response);
+  },
+
+  countPatients: async (status: string): Promise<number> => {
+    const response = await api.get('/patients', {
+      params: {
+        status,
+        limit: 1,
+        include_total: true,
+      },
+    });
+    return Number(response.headers['x-total-count']);
   },
 
   approvePatient: async (id: string): Promise<void> => {
@@ -122,13 +147,14 @@ export const documentsApi = {
 
 
 export const adminsApi = {
-  getAdmins: async ({ search }: GetAdminsParams): Promise<any> => {
-    const { data } = await api.get('/admins/all', {
+  getAdmins: async ({ search, cursor }: GetAdminsParams): Promise<Page<any>> => {
+    const response = await api.get('/admins/all', {
       params: {
         search,
+        cursor,
       },
     });
-    return data;
+    return toPage(response);
   },
 
   deleteAdmin: async (id: string): Promise<void> => {